@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
-from typing import Dict, Any
+from typing import Dict, Any, List
 import os
+import tempfile
 
 class Settings(BaseSettings):
     """Application settings and configuration"""
@@ -9,43 +10,102 @@ class Settings(BaseSettings):
     DOCKER_IMAGE: str = "wakuorg/nwaku:v0.24.0"
     DOCKER_NETWORK_NAME: str = "waku"
     DOCKER_NETWORK_SUBNET: str = "172.18.0.0/16"
-    DOCKER_NETWORK_GATEWAY: str = "172.18.0.1"
-
-    # Node settings
-    NODE1_IP: str = "172.18.111.225"
-    NODE2_IP: str = "172.18.111.226"
-
-    # Port mappings
-    NODE1_PORTS: Dict[str, int] = {
-        "rest": 21161,
-        "websocket": 21163,
-        "tcp": 21162,
-        "discv5": 21164,
-        "metrics": 21165
-    }
-
-    NODE2_PORTS: Dict[str, int] = {
-        "rest": 21171,
-        "websocket": 21173,
-        "tcp": 21172,
-        "discv5": 21174,
-        "metrics": 21175
-    }
+
+    # Node image: optional repo digest to pin (sha256:...), tarball cache for offline runs
+    DOCKER_IMAGE_DIGEST: str = ""
+    IMAGE_CACHE_DIR: str = ""
+    IMAGE_PULL_TIMEOUT: float = 600.0
+    # Sidecar image providing tc for network impairment
+    IMPAIRMENT_IMAGE: str = "nicolaka/netshoot:v0.11"
+
+    # Node backend: "docker" runs nwaku containers, "fake" runs in-process stand-in nodes
+    BACKEND: str = "docker"
+    FAKE_LATENCY: float = 0.0
+    FAKE_JITTER: float = 0.0
+    FAKE_LOSS: float = 0.0
+
+    # Keep containers running between modules and sessions and adopt matching ones
+    REUSE_CONTAINERS: bool = False
+    RESET_TOPICS: List[str] = ["/my-app/2/chatroom-1/proto"]
+
+    # Flag profile of nodes that do not name one (see framework.profiles)
+    NODE_PROFILE: str = "default"
+    STORE_PAGE_SIZE: int = 100
+    # Light nodes started next to the service node by the light_nodes fixture
+    LIGHT_NODE_COUNT: int = 2
+
+    # Nodes of the cluster shared by all pytest-xdist workers
+    SHARED_CLUSTER_SIZE: int = 3
+
+    # Dynamic allocation (per pytest-xdist worker)
+    PORT_RANGE_START: int = 21200
+    PORT_RANGE_END: int = 32000
+    PORT_BLOCK_SIZE: int = 10
+    NETWORK_PREFIX_LENGTH: int = 24
+    LEASE_DIR: str = os.path.join(tempfile.gettempdir(), "waku-test-leases")
 
     # Test settings
     DEFAULT_TOPIC: str = "/my-app/2/chatroom-1/proto"
+    # Empty: lightpush and filter derive the shard from the content topic (autosharding)
+    DEFAULT_PUBSUB_TOPIC: str = ""
     DEFAULT_MESSAGE: str = "UmVsYXkgd29ya3MhIQ=="  # Base64 encoded "Relay works!!"
 
     # Timeouts
     NODE_STARTUP_TIMEOUT: int = 30
+    TEARDOWN_TIMEOUT: float = 5.0
     PEER_CONNECTION_TIMEOUT: int = 60
     MESSAGE_PROPAGATION_TIMEOUT: int = 10
 
+    # HTTP client settings
+    HTTP_TIMEOUT: float = 10.0
+    ASYNC_POOL_LIMIT: int = 200
+    ASYNC_POOL_LIMIT_PER_HOST: int = 8
+
+    # Node logs
+    NODE_LOG_LEVEL: str = "INFO"
+    LOG_DIR: str = "reports/logs"
+    LOG_ATTACH_MAX_LINES: int = 2000
+
+    # Node metrics collection
+    METRICS_SCRAPE_INTERVAL: float = 1.0
+    METRICS_SERIES: List[str] = [
+        "waku_node_messages_total",
+        "libp2p_peers",
+        "libp2p_network_bytes_total"
+    ]
+
+    # Peer graph monitoring
+    PEER_MONITOR_INTERVAL: float = 0.5
+    # Startup SLO: seconds from cluster bring-up to a fully converged peer graph
+    DISCOVERY_CONVERGENCE_SLO: float = 30.0
+    # Pause after relay peers connect for gossipsub heartbeats to graft the topic mesh
+    RELAY_MESH_SETTLE_TIME: float = 3.0
+
+    # Shared message drain loops
+    MULTIPLEXER_POLL_INTERVAL: float = 0.05
+    MULTIPLEXER_QUEUE_SIZE: int = 10000
+
+    # Phase timing report and regression gate
+    TIMING_REPORT: str = "reports/timing.json"
+    TIMING_BASELINE: str = ""
+    TIMING_REGRESSION_THRESHOLD: float = 1.5
+    TIMING_MIN_REGRESSION_SECONDS: float = 0.25
+    TIMING_FAIL_ON_REGRESSION: bool = False
+
+    # Benchmark result history and run comparison
+    RESULTS_DB: str = "reports/results.db"
+    RESULTS_ALPHA: float = 0.05
+    RESULTS_MIN_CHANGE: float = 0.05
+
     # API endpoints
     DEBUG_INFO_ENDPOINT: str = "/debug/v1/info"
     SUBSCRIPTIONS_ENDPOINT: str = "/relay/v1/auto/subscriptions"
     MESSAGES_ENDPOINT: str = "/relay/v1/auto/messages"
     PEERS_ENDPOINT: str = "/admin/v1/peers"
+    STORE_ENDPOINT: str = "/store/v1/messages"
+    LIGHTPUSH_ENDPOINT: str = "/lightpush/v1/message"
+    FILTER_SUBSCRIPTIONS_ENDPOINT: str = "/filter/v2/subscriptions"
+    FILTER_MESSAGES_ENDPOINT: str = "/filter/v2/messages"
 
     class Config:
         env_file = ".env"
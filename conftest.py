@@ -1,8 +1,20 @@
+import json
+import os
+import time
 import pytest
 import logging
-from framework.docker_manager import DockerManager
-from framework.waku_client import WakuClient
+import allure
 from config.settings import settings
+from framework.docker_manager import DockerManager
+from framework.fake_node import FakeNodeManager
+from framework.images import ImageStage
+from framework.log_capture import LogCapture
+from framework.metrics import MetricsCollector
+from framework.multiplexer import MessageMultiplexer
+from framework.shared_cluster import SharedCluster
+from framework.topology import Topology, TopologySpec
+
+pytest_plugins = ["framework.timing_plugin", "framework.results_plugin"]
 
 # Configure logging
 logging.basicConfig(
@@ -10,75 +22,238 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--backend",
+        choices=["docker", "fake"],
+        default=settings.BACKEND,
+        help="Run nodes as nwaku Docker containers or as in-process fake nodes"
+    )
+
+def pytest_sessionstart(session):
+    """Start making the node image available while collection and setup run"""
+    if session.config.getoption("--backend") == "docker":
+        try:
+            ImageStage.for_image(settings.DOCKER_IMAGE).start()
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"Could not start image stage: {e}")
+
 @pytest.fixture(scope="module")
-def docker_manager():
-    """Docker manager fixture"""
-    manager = DockerManager()
+def node_manager(request):
+    """Node manager fixture for the selected backend"""
+    if request.config.getoption("--backend") == "fake":
+        manager = FakeNodeManager()
+    else:
+        manager = DockerManager()
     yield manager
     manager.cleanup()
 
 @pytest.fixture(scope="module")
-def waku_network(docker_manager):
+def docker_manager(node_manager):
+    """Former name of ``node_manager``, kept for tests and plugins that still request it"""
+    return node_manager
+
+@pytest.fixture(scope="session")
+def shared_cluster(request):
+    """Read-only cluster built once per run and shared by every xdist worker
+
+    Tests using it must not change node state (subscriptions, peers, cached
+    messages), since other workers use the same nodes concurrently.
+    """
+    if request.config.getoption("--backend") == "fake":
+        # Fake nodes live inside the building process, so each worker keeps its own
+        manager = FakeNodeManager()
+        run_id = f"pid-{os.getpid()}"
+    else:
+        # Own scope: separate leases and network from each module's node_manager
+        manager = DockerManager(scope="shared")
+        run_id = None
+
+    names = [f"waku_shared{index}" for index in range(1, settings.SHARED_CLUSTER_SIZE + 1)]
+    cluster = SharedCluster("shared", manager, names, run_id=run_id)
+    yield cluster.attach()
+    cluster.detach()
+
+@pytest.fixture(scope="module")
+def waku_network(node_manager):
     """Create Waku network"""
-    return docker_manager.create_network()
+    return node_manager.create_network()
+
+@pytest.fixture(scope="module")
+def metrics_collector():
+    """Background scraper of the metrics endpoint of every started node"""
+    collector = MetricsCollector().start()
+    yield collector
+    collector.close()
+
+@pytest.fixture(scope="module")
+def message_multiplexer():
+    """Shared per-node drain loops that fan messages out to any number of consumers"""
+    multiplexer = MessageMultiplexer()
+    yield multiplexer
+    multiplexer.stop()
+    allure.attach(json.dumps(multiplexer.summary(), indent=2), "Message multiplexer", allure.attachment_type.JSON)
+
+@pytest.fixture(autouse=True)
+def node_metrics_delta(request):
+    """Attach the change in node metrics over each test that uses nodes"""
+    if "metrics_collector" not in request.fixturenames:
+        yield
+        return
+
+    collector = request.getfixturevalue("metrics_collector")
+    before = collector.scrape_now()
+    yield
+    delta = collector.delta(before, collector.scrape_now())
+    allure.attach(json.dumps(delta, indent=2), "Node metrics delta", allure.attachment_type.JSON)
+
+@pytest.hookimpl(tryfirst=True, hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Expose each phase's report on the item so fixtures can see failures"""
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f"rep_{report.when}", report)
+
+@pytest.fixture(scope="module")
+def log_capture():
+    """Streams node container logs to compressed files under LOG_DIR"""
+    capture = LogCapture()
+    yield capture
+    capture.close()
+
+@pytest.fixture(autouse=True)
+def node_logs_on_failure(request):
+    """Attach the nodes' log lines written during a failed test"""
+    if "log_capture" not in request.fixturenames:
+        yield
+        return
+
+    capture = request.getfixturevalue("log_capture")
+    started = time.time()
+    yield
+    report = getattr(request.node, "rep_call", None)
+    if report is None or not report.failed:
+        return
+
+    for node_name in capture.logs:
+        log_slice = capture.slice(node_name, start=started - 1, end=time.time())
+        if log_slice:
+            allure.attach(log_slice, f"{node_name} log", allure.attachment_type.TEXT)
+
+@pytest.fixture
+def resource_sampler(node_manager):
+    """Container CPU/memory/IO sampling for the duration of one test
+
+    Request it after the node fixtures so their containers are sampled.
+    """
+    sampler = node_manager.resource_sampler().start()
+    yield sampler
+    sampler.stop()
+    sampler.attach_to_allure()
+
+@pytest.fixture
+def network_impairment(node_manager):
+    """Impairer of the node manager; every impairment is removed after the test"""
+    yield node_manager.impairer
+    node_manager.impairer.clear_all()
+
+def release_nodes(node_manager, nodes, metrics_collector, log_capture):
+    """Stop a class fixture's nodes and stop scraping and logging them"""
+    for name in nodes:
+        metrics_collector.remove_target(name)
+        log_capture.unfollow(name)
+    node_manager.remove_nodes(nodes.values())
 
 @pytest.fixture(scope="class")
-def single_node(docker_manager, waku_network):
+def single_node(node_manager, waku_network, metrics_collector, log_capture):
     """Single Waku node fixture"""
-    container = docker_manager.start_waku_node(
-        node_name="waku_node_single",
-        ports=settings.NODE1_PORTS,
-        external_ip=settings.NODE1_IP
-    )
+    nodes = node_manager.start_cluster([
+        node_manager.node_spec("waku_node_single")
+    ])
+    for name, node in nodes.items():
+        metrics_collector.add_target(name, node.metrics_url)
+        log_capture.follow(name, node.container)
 
-    docker_manager.connect_container_to_network(container, settings.NODE1_IP)
+    yield nodes["waku_node_single"].as_fixture()
+    release_nodes(node_manager, nodes, metrics_collector, log_capture)
 
-    client = WakuClient(f"http://127.0.0.1:{settings.NODE1_PORTS['rest']}")
+@pytest.fixture(scope="class")
+def two_nodes(node_manager, waku_network, metrics_collector, log_capture):
+    """Two connected Waku nodes fixture"""
+    # Second node bootstraps from the first node's ENR
+    nodes = node_manager.start_cluster([
+        node_manager.node_spec("waku_node1"),
+        node_manager.node_spec("waku_node2", bootstrap_from=["waku_node1"])
+    ])
+    for name, node in nodes.items():
+        metrics_collector.add_target(name, node.metrics_url)
+        log_capture.follow(name, node.container)
 
     yield {
-        'container': container,
-        'client': client,
-        'base_url': f"http://127.0.0.1:{settings.NODE1_PORTS['rest']}"
+        'node1': nodes["waku_node1"].as_fixture(),
+        'node2': nodes["waku_node2"].as_fixture()
     }
+    release_nodes(node_manager, nodes, metrics_collector, log_capture)
 
 @pytest.fixture(scope="class")
-def two_nodes(docker_manager, waku_network):
-    """Two connected Waku nodes fixture"""
-    # Start first node
-    node1_container = docker_manager.start_waku_node(
-        node_name="waku_node1",
-        ports=settings.NODE1_PORTS,
-        external_ip=settings.NODE1_IP
-    )
+def store_nodes(node_manager, waku_network, metrics_collector, log_capture):
+    """Relay node plus a store node that archives everything it relays"""
+    nodes = node_manager.start_cluster([
+        node_manager.node_spec("waku_relay", profile="default"),
+        node_manager.node_spec("waku_store", bootstrap_from=["waku_relay"], profile="store")
+    ])
+    for name, node in nodes.items():
+        metrics_collector.add_target(name, node.metrics_url)
+        log_capture.follow(name, node.container)
 
-    docker_manager.connect_container_to_network(node1_container, settings.NODE1_IP)
+    yield {
+        'relay': nodes["waku_relay"].as_fixture(),
+        'store': {**nodes["waku_store"].as_fixture(), 'multiaddr': nodes["waku_store"].multiaddr}
+    }
+    release_nodes(node_manager, nodes, metrics_collector, log_capture)
 
-    node1_client = WakuClient(f"http://127.0.0.1:{settings.NODE1_PORTS['rest']}")
+@pytest.fixture(scope="class")
+def light_nodes(request, node_manager, waku_network, metrics_collector, log_capture):
+    """Service node serving lightpush and filter to light nodes
 
-    # Get ENR URI from first node
-    enr_uri = node1_client.get_enr_uri()
+    Parametrize indirectly with the number of light nodes.
+    """
+    count = getattr(request, "param", settings.LIGHT_NODE_COUNT)
+    light_names = [f"waku_light{index}" for index in range(1, count + 1)]
+    nodes = node_manager.start_cluster([
+        node_manager.node_spec("waku_service", profile="service"),
+        # Lightpush needs a relay peer to publish to
+        node_manager.node_spec("waku_service_peer", bootstrap_from=["waku_service"]),
+        *[node_manager.node_spec(name, profile="light", service_node="waku_service") for name in light_names]
+    ])
+    for name, node in nodes.items():
+        metrics_collector.add_target(name, node.metrics_url)
+        log_capture.follow(name, node.container)
 
-    # Start second node with bootstrap
-    node2_container = docker_manager.start_waku_node(
-        node_name="waku_node2",
-        ports=settings.NODE2_PORTS,
-        external_ip=settings.NODE2_IP,
-        bootstrap_node=enr_uri
-    )
+    yield {
+        'service': nodes["waku_service"].as_fixture(),
+        'relay': nodes["waku_service_peer"].as_fixture(),
+        'light': {name: nodes[name].as_fixture() for name in light_names}
+    }
+    release_nodes(node_manager, nodes, metrics_collector, log_capture)
 
-    docker_manager.connect_container_to_network(node2_container, settings.NODE2_IP)
+@pytest.fixture(scope="class")
+def waku_topology(request, node_manager, waku_network, metrics_collector, log_capture):
+    """Cluster laid out from a TopologySpec
 
-    node2_client = WakuClient(f"http://127.0.0.1:{settings.NODE2_PORTS['rest']}")
+    Parametrize indirectly with a dict of TopologySpec options or a YAML path.
+    """
+    param = getattr(request, "param", {"shape": "star", "size": 3})
+    if isinstance(param, str):
+        spec = TopologySpec.from_yaml(param)
+    else:
+        spec = TopologySpec.from_dict(param)
 
-    yield {
-        'node1': {
-            'container': node1_container,
-            'client': node1_client,
-            'base_url': f"http://127.0.0.1:{settings.NODE1_PORTS['rest']}"
-        },
-        'node2': {
-            'container': node2_container,
-            'client': node2_client,
-            'base_url': f"http://127.0.0.1:{settings.NODE2_PORTS['rest']}"
-        }
-    }
\ No newline at end of file
+    topology = Topology(spec)
+    nodes = topology.start(node_manager)
+    for name, node in nodes.items():
+        metrics_collector.add_target(name, node.metrics_url)
+        log_capture.follow(name, node.container)
+
+    yield topology
+    release_nodes(node_manager, nodes, metrics_collector, log_capture)
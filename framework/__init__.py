@@ -1,6 +1,30 @@
+from .cluster import NodeSpec, ClusterNode
 from .docker_manager import DockerManager
+from .images import ImageStage
+from .impairment import Impairment, NetworkImpairer
+from .profiles import NodeProfile, get_profile
+from .fake_node import FakeNodeManager, FakeWakuNetwork, FakeWakuNode
 from .waku_client import WakuClient
-from .utils import wait_for_condition, retry_on_exception
+from .decoding import WakuMessage
+from .async_waku_client import AsyncWakuClient, AsyncWakuClientPool, gather_cluster, run_on_cluster
+from .publisher import Publisher, PublishReport, publish_many
+from .log_capture import LogCapture
+from .metrics import MetricsCollector, parse_prometheus_text
+from .resources import ResourceSampler
+from .peer_monitor import PeerGraphMonitor
+from .multiplexer import MessageMultiplexer, NodeMultiplexer, Subscription
+from .shared_cluster import SharedCluster
+from .propagation import PropagationTracker, PropagationResult
+from .topology import Topology, TopologySpec
+from .utils import (
+    WaitResult,
+    deadline_scope,
+    retry_on_exception,
+    wait_for_all,
+    wait_for_any,
+    wait_for_condition,
+    wait_until
+)
 
 __version__ = "1.0.0"
 __author__ = "doinglivingtest"
@@ -8,7 +32,43 @@ __author__ = "doinglivingtest"
 # Export main classes and functions
 __all__ = [
     "DockerManager",
+    "ImageStage",
+    "Impairment",
+    "NetworkImpairer",
+    "NodeProfile",
+    "get_profile",
+    "FakeNodeManager",
+    "FakeWakuNetwork",
+    "FakeWakuNode",
+    "NodeSpec",
+    "ClusterNode",
     "WakuClient",
+    "WakuMessage",
+    "AsyncWakuClient",
+    "AsyncWakuClientPool",
+    "gather_cluster",
+    "run_on_cluster",
+    "Publisher",
+    "PublishReport",
+    "publish_many",
+    "LogCapture",
+    "MetricsCollector",
+    "parse_prometheus_text",
+    "ResourceSampler",
+    "PeerGraphMonitor",
+    "MessageMultiplexer",
+    "NodeMultiplexer",
+    "Subscription",
+    "SharedCluster",
+    "PropagationTracker",
+    "PropagationResult",
+    "Topology",
+    "TopologySpec",
+    "WaitResult",
+    "deadline_scope",
+    "wait_until",
     "wait_for_condition",
+    "wait_for_all",
+    "wait_for_any",
     "retry_on_exception"
 ]
\ No newline at end of file
@@ -0,0 +1,232 @@
+import ipaddress
+import json
+import logging
+import os
+import socket
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from filelock import FileLock
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Offsets of each node port within an allocated port block
+PORT_OFFSETS: Dict[str, int] = {
+    "rest": 0,
+    "tcp": 1,
+    "websocket": 2,
+    "discv5": 3,
+    "metrics": 4
+}
+
+# Host offset of the first node IP inside an allocated subnet (.1 is the gateway)
+FIRST_HOST_OFFSET = 10
+
+
+def current_worker_id() -> str:
+    """Name of the pytest-xdist worker running this process, or "master" """
+    return os.environ.get("PYTEST_XDIST_WORKER", "master")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ResourceAllocator:
+    """Hands out non-colliding port blocks and subnets to nodes across processes
+
+    Leases are recorded in a JSON file guarded by a file lock, so concurrent
+    pytest-xdist workers (or separate pytest runs) never pick the same ports or
+    subnet. Leases left behind by dead processes are reclaimed automatically,
+    except persistent leases, which the same worker takes over in a later run so
+    that warm containers keep their ports and addresses.
+
+    Every allocator is a separate lease owner, so several managers in one
+    process never share or release each other's leases. Allocators with
+    different ``scope`` names (such as the shared cluster's) also get their
+    own subnet and network name.
+    """
+
+    def __init__(
+            self,
+            worker_id: Optional[str] = None,
+            lease_dir: Optional[str] = None,
+            persistent: bool = False,
+            scope: str = ""
+    ):
+        self.worker_id = worker_id or current_worker_id()
+        self.pid = os.getpid()
+        self.owner = f"{self.pid}-{uuid.uuid4().hex[:12]}"
+        self.scope = scope
+        self.persistent = persistent
+        self.lease_dir = Path(lease_dir or settings.LEASE_DIR)
+        self.lease_dir.mkdir(parents=True, exist_ok=True)
+        self.lease_file = self.lease_dir / "leases.json"
+        self.lock = FileLock(str(self.lease_dir / "leases.lock"))
+
+        self._subnet: Optional[ipaddress.IPv4Network] = None
+        self._node_ips: Dict[str, str] = {}
+
+    @contextmanager
+    def _leases(self) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """Read, yield and write back the lease table under the file lock"""
+        with self.lock:
+            try:
+                leases = json.loads(self.lease_file.read_text())
+            except (FileNotFoundError, ValueError):
+                leases = {}
+            leases.setdefault("ports", {})
+            leases.setdefault("subnets", {})
+            leases.setdefault("ips", {})
+
+            for table in leases.values():
+                stale = [i for i, lease in table.items() if not lease.get("persistent") and not _pid_alive(lease["pid"])]
+                for index in stale:
+                    logger.debug(f"Reclaiming stale lease {index} from pid {table[index]['pid']}")
+                    del table[index]
+
+            yield leases
+
+            tmp_file = self.lease_file.with_suffix(".tmp")
+            tmp_file.write_text(json.dumps(leases))
+            os.replace(tmp_file, self.lease_file)
+
+    def _lease(self, key: str) -> Dict[str, Any]:
+        return {
+            "worker": self.worker_id,
+            "pid": self.pid,
+            "owner": self.owner,
+            "scope": self.scope,
+            "key": key,
+            "persistent": self.persistent
+        }
+
+    def _owns(self, lease: Dict[str, Any]) -> bool:
+        if lease.get("owner") == self.owner:
+            return True
+        # A persistent lease passes to the next manager of the same worker and
+        # scope, in a later module of this process or a later run
+        return (
+            self.persistent
+            and lease.get("persistent", False)
+            and lease["worker"] == self.worker_id
+            and lease.get("scope", "") == self.scope
+            and (lease["pid"] == self.pid or not _pid_alive(lease["pid"]))
+        )
+
+    def _find(self, table: Dict[str, Dict[str, Any]], key: str) -> Optional[str]:
+        """Index of this allocator's lease for ``key``, taking over a persistent one if needed"""
+        for index, lease in table.items():
+            if lease["key"] == key and self._owns(lease):
+                lease.update(pid=self.pid, owner=self.owner)
+                return index
+        return None
+
+    def scoped_name(self, name: str) -> str:
+        """Make a container or network name unique to this worker"""
+        if self.worker_id == "master":
+            return name
+        return f"{name}_{self.worker_id}"
+
+    def allocate_ports(self, key: str) -> Dict[str, int]:
+        """Lease a free block of node ports; the same key always gets the same block"""
+        block_size = settings.PORT_BLOCK_SIZE
+        block_count = (settings.PORT_RANGE_END - settings.PORT_RANGE_START) // block_size
+
+        with self._leases() as leases:
+            index = self._find(leases["ports"], key)
+            if index is not None:
+                return self._block_ports(int(index))
+
+            for index in range(block_count):
+                if str(index) in leases["ports"]:
+                    continue
+                ports = self._block_ports(index)
+                if not self._ports_free(ports):
+                    continue
+                leases["ports"][str(index)] = self._lease(key)
+                logger.info(f"Allocated ports for {key}: {ports}")
+                return ports
+
+        raise RuntimeError(
+            f"No free port block between {settings.PORT_RANGE_START} and {settings.PORT_RANGE_END}"
+        )
+
+    def allocate_subnet(self) -> Tuple[str, str]:
+        """Lease a subnet of DOCKER_NETWORK_SUBNET for this worker's network"""
+        if self._subnet is None:
+            supernet = ipaddress.ip_network(settings.DOCKER_NETWORK_SUBNET)
+            subnets = supernet.subnets(new_prefix=settings.NETWORK_PREFIX_LENGTH)
+
+            with self._leases() as leases:
+                owned = self._find(leases["subnets"], "network")
+                for index, subnet in enumerate(subnets):
+                    if owned is not None and str(index) == owned:
+                        self._subnet = subnet
+                        break
+                    if owned is None and str(index) not in leases["subnets"]:
+                        leases["subnets"][str(index)] = self._lease("network")
+                        self._subnet = subnet
+                        break
+                else:
+                    raise RuntimeError(f"No free subnet left in {settings.DOCKER_NETWORK_SUBNET}")
+
+            logger.info(f"Allocated subnet {self._subnet} for worker {self.worker_id}")
+
+        return str(self._subnet), str(self._subnet.network_address + 1)
+
+    def allocate_ip(self, key: str) -> str:
+        """Assign an address inside this worker's subnet; the same key always gets the same IP"""
+        if key not in self._node_ips:
+            subnet, _ = self.allocate_subnet()
+            with self._leases() as leases:
+                index = self._find(leases["ips"], f"{subnet}/{key}")
+                if index is None:
+                    hosts = range(FIRST_HOST_OFFSET, self._subnet.num_addresses - 1)
+                    address = next(
+                        (str(self._subnet.network_address + host) for host in hosts
+                         if str(self._subnet.network_address + host) not in leases["ips"]),
+                        None
+                    )
+                    if address is None:
+                        raise RuntimeError(f"Subnet {subnet} has no free addresses left")
+                    leases["ips"][address] = self._lease(f"{subnet}/{key}")
+                    index = address
+            self._node_ips[key] = index
+        return self._node_ips[key]
+
+    def release_all(self):
+        """Release every lease held by this allocator, persistent ones included"""
+        with self._leases() as leases:
+            for table in leases.values():
+                for index in [i for i, lease in table.items() if lease.get("owner") == self.owner]:
+                    del table[index]
+
+        self._subnet = None
+        self._node_ips.clear()
+        logger.info(f"Released resource leases for worker {self.worker_id}")
+
+    @staticmethod
+    def _block_ports(index: int) -> Dict[str, int]:
+        base = settings.PORT_RANGE_START + index * settings.PORT_BLOCK_SIZE
+        return {name: base + offset for name, offset in PORT_OFFSETS.items()}
+
+    @staticmethod
+    def _ports_free(ports: Dict[str, int]) -> bool:
+        for port_name, port_num in ports.items():
+            kind = socket.SOCK_DGRAM if port_name == "discv5" else socket.SOCK_STREAM
+            with socket.socket(socket.AF_INET, kind) as sock:
+                try:
+                    sock.bind(('0.0.0.0', port_num))
+                except OSError:
+                    return False
+        return True
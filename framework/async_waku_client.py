@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+import aiohttp
+from tenacity import retry, stop_after_attempt, wait_exponential
+from config.settings import settings
+from .decoding import WakuMessage, decode_messages, loads
+from .payloads import Payload, encode_message_body
+from .subscriptions import ledger
+
+logger = logging.getLogger(__name__)
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+
+class AsyncWakuClient:
+    """asyncio HTTP client for the Waku node REST API
+
+    Mirrors :class:`framework.waku_client.WakuClient`. Clients created through an
+    :class:`AsyncWakuClientPool` share one connection pool.
+    """
+
+    def __init__(self, base_url: str, session: Optional[aiohttp.ClientSession] = None):
+        self.base_url = base_url.rstrip('/')
+        self._session = session
+        self._owns_session = session is None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            self._session = AsyncWakuClientPool.create_session()
+        return self._session
+
+    async def close(self):
+        """Close the session if this client created it"""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncWakuClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10)
+    )
+    async def get_node_info(self) -> Dict[str, Any]:
+        """Get node debug information"""
+        url = f"{self.base_url}{settings.DEBUG_INFO_ENDPOINT}"
+        async with self.session.get(url) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def get_enr_uri(self) -> str:
+        """Extract ENR URI from node info"""
+        node_info = await self.get_node_info()
+        return node_info.get('enrUri', '')
+
+    async def subscribe_to_topic(self, topics: List[str]) -> bool:
+        """Subscribe to relay topics"""
+        url = f"{self.base_url}{settings.SUBSCRIPTIONS_ENDPOINT}"
+        async with self.session.post(url, json=topics) as response:
+            response.raise_for_status()
+        # The ledger's file lock blocks, so keep it off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, ledger.add, self.base_url, "relay", topics)
+        return response.status == 200
+
+    async def publish_message(
+            self,
+            payload: Payload,
+            content_topic: str,
+            timestamp: Optional[int] = None
+    ) -> bool:
+        """Publish a message to a topic
+
+        ``payload`` is base64 text or raw bytes, which are encoded once.
+        """
+        url = f"{self.base_url}{settings.MESSAGES_ENDPOINT}"
+        body = encode_message_body(payload, content_topic, timestamp)
+        async with self.session.post(url, data=body, headers=JSON_HEADERS) as response:
+            response.raise_for_status()
+            return response.status == 200
+
+    async def get_messages(self, content_topic: str) -> List[WakuMessage]:
+        """Retrieve messages for a topic"""
+        encoded_topic = quote(content_topic, safe='')
+        url = f"{self.base_url}{settings.MESSAGES_ENDPOINT}/{encoded_topic}"
+        async with self.session.get(url) as response:
+            response.raise_for_status()
+            return decode_messages(await response.read())
+
+    @retry(
+        stop=stop_after_attempt(10),
+        wait=wait_exponential(multiplier=2, min=5, max=30)
+    )
+    async def get_peers(self) -> List[Dict[str, Any]]:
+        """Get connected peers"""
+        url = f"{self.base_url}{settings.PEERS_ENDPOINT}"
+        async with self.session.get(url) as response:
+            response.raise_for_status()
+            return loads(await response.read())
+
+
+class AsyncWakuClientPool:
+    """Shared connection pool handing out async clients for many nodes"""
+
+    def __init__(
+            self,
+            limit: int = settings.ASYNC_POOL_LIMIT,
+            limit_per_host: int = settings.ASYNC_POOL_LIMIT_PER_HOST,
+            timeout: float = settings.HTTP_TIMEOUT
+    ):
+        self.session = self.create_session(limit, limit_per_host, timeout)
+        self.clients: Dict[str, AsyncWakuClient] = {}
+
+    @staticmethod
+    def create_session(
+            limit: int = settings.ASYNC_POOL_LIMIT,
+            limit_per_host: int = settings.ASYNC_POOL_LIMIT_PER_HOST,
+            timeout: float = settings.HTTP_TIMEOUT
+    ) -> aiohttp.ClientSession:
+        """Create a session with bounded per-host connections and request timeouts"""
+        connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host)
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            headers={'Accept': 'application/json'}
+        )
+
+    def client(self, base_url: str) -> AsyncWakuClient:
+        """Get the pooled client for a node"""
+        base_url = base_url.rstrip('/')
+        if base_url not in self.clients:
+            self.clients[base_url] = AsyncWakuClient(base_url, session=self.session)
+        return self.clients[base_url]
+
+    async def gather(self, base_urls: Iterable[str], method: str, *args, **kwargs) -> Dict[str, Any]:
+        """Call one client method on every node at once"""
+        return await gather_cluster([self.client(url) for url in base_urls], method, *args, **kwargs)
+
+    async def close(self):
+        await self.session.close()
+        self.clients.clear()
+
+    async def __aenter__(self) -> "AsyncWakuClientPool":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+async def gather_cluster(
+        clients: Iterable[AsyncWakuClient],
+        method: str,
+        *args,
+        **kwargs
+) -> Dict[str, Any]:
+    """Run the same client call on every node concurrently
+
+    Returns a mapping of base URL to the call result, or to the exception the
+    call raised, so one unreachable node does not hide the others' results.
+    """
+    clients = list(clients)
+    results = await asyncio.gather(
+        *(getattr(client, method)(*args, **kwargs) for client in clients),
+        return_exceptions=True
+    )
+    for client, result in zip(clients, results):
+        if isinstance(result, Exception):
+            logger.debug(f"{method} failed on {client.base_url}: {result}")
+    return {client.base_url: result for client, result in zip(clients, results)}
+
+
+def run_on_cluster(base_urls: Iterable[str], method: str, *args, **kwargs) -> Dict[str, Any]:
+    """Synchronous wrapper around :func:`gather_cluster` for use in tests"""
+    async def _run():
+        async with AsyncWakuClientPool() as pool:
+            return await pool.gather(base_urls, method, *args, **kwargs)
+
+    return asyncio.run(_run())
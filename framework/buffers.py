@@ -0,0 +1,156 @@
+from array import array
+from typing import Any, Dict, Iterable, Optional
+
+
+class LatencyHistogram:
+    """Compact log-linear histogram of durations
+
+    Values are recorded in microseconds into a flat ``array`` of counters. Buckets
+    are exact below ``2 ** precision_bits`` microseconds and keep a relative error
+    below ``2 ** -(precision_bits - 1)`` above that, so a few KB cover anything
+    from microseconds to hours.
+    """
+
+    def __init__(self, precision_bits: int = 7):
+        self.precision_bits = precision_bits
+        self._linear_limit = 1 << precision_bits
+        self._half = 1 << (precision_bits - 1)
+        self.counts = array('Q')
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+
+    def _index(self, value: int) -> int:
+        if value < self._linear_limit:
+            return value
+        shift = value.bit_length() - self.precision_bits
+        return (shift << (self.precision_bits - 1)) + (value >> shift)
+
+    def _bucket_value(self, index: int) -> int:
+        """Midpoint of the range of values that map to ``index``"""
+        if index < self._linear_limit:
+            return index
+        shift = (index >> (self.precision_bits - 1)) - 1
+        mantissa = index - (shift << (self.precision_bits - 1))
+        return (mantissa << shift) + ((1 << shift) >> 1)
+
+    def record(self, seconds: float, count: int = 1):
+        """Record a duration given in seconds"""
+        value = max(int(seconds * 1_000_000), 0)
+        index = self._index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += count
+
+        if not self.count or value < self.min_us:
+            self.min_us = value
+        if value > self.max_us:
+            self.max_us = value
+        self.count += count
+        self.total_us += value * count
+
+    def record_many(self, seconds: Iterable[float]):
+        for value in seconds:
+            self.record(value)
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add the counts of another histogram with the same precision"""
+        if other.precision_bits != self.precision_bits:
+            raise ValueError("Cannot merge histograms with different precision")
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, bucket_count in enumerate(other.counts):
+            self.counts[index] += bucket_count
+
+        if other.count:
+            self.min_us = other.min_us if not self.count else min(self.min_us, other.min_us)
+            self.max_us = max(self.max_us, other.max_us)
+        self.count += other.count
+        self.total_us += other.total_us
+
+    def percentile(self, percentile: float) -> float:
+        """Value in seconds below which ``percentile`` percent of samples fall"""
+        if not self.count:
+            return 0.0
+        rank = max(int(self.count * percentile / 100 + 0.5), 1)
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                value = min(max(self._bucket_value(index), self.min_us), self.max_us)
+                return value / 1_000_000
+        return self.max_us / 1_000_000
+
+    @property
+    def mean(self) -> float:
+        return self.total_us / self.count / 1_000_000 if self.count else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """Count and latency percentiles in milliseconds"""
+        return {
+            "count": self.count,
+            "min_ms": round(self.min_us / 1000, 3),
+            "mean_ms": round(self.mean * 1000, 3),
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max_us / 1000, 3)
+        }
+
+
+class TimeSeriesBuffer:
+    """Fixed-capacity ring buffer of ``(timestamp, value)`` samples in flat arrays"""
+
+    def __init__(self, capacity: int = 3600):
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+        self._next = 0
+        self._size = 0
+
+    def append(self, timestamp: float, value: float):
+        self.timestamps[self._next] = timestamp
+        self.values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _ordered_indexes(self) -> range:
+        start = (self._next - self._size) % self.capacity
+        return range(start, start + self._size)
+
+    def samples(self) -> Iterable[tuple]:
+        """Samples from oldest to newest"""
+        for index in self._ordered_indexes():
+            index %= self.capacity
+            yield self.timestamps[index], self.values[index]
+
+    def latest(self) -> Optional[tuple]:
+        if not self._size:
+            return None
+        index = (self._next - 1) % self.capacity
+        return self.timestamps[index], self.values[index]
+
+    def value_at(self, timestamp: float) -> Optional[float]:
+        """Last value recorded at or before ``timestamp``"""
+        found = None
+        for sample_time, value in self.samples():
+            if sample_time > timestamp:
+                break
+            found = value
+        return found
+
+    def summary(self) -> Dict[str, Any]:
+        values = [value for _, value in self.samples()]
+        if not values:
+            return {"samples": 0}
+        return {
+            "samples": len(values),
+            "min": min(values),
+            "mean": sum(values) / len(values),
+            "max": max(values),
+            "last": values[-1]
+        }
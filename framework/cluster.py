@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import settings
+from .profiles import NodeProfile, get_profile
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class NodeSpec:
+    """Description of a single Waku node in a cluster"""
+
+    name: str
+    ports: Dict[str, int]
+    external_ip: str
+    # Names of the nodes this node bootstraps from (discv5)
+    bootstrap_from: List[str] = field(default_factory=list)
+    log_level: str = settings.NODE_LOG_LEVEL
+    profile: NodeProfile = field(default_factory=get_profile)
+    # Name of the node serving lightpush and filter to this (light) node
+    service_node: Optional[str] = None
+
+    @property
+    def dependencies(self) -> List[str]:
+        """Nodes that must be running before this one starts"""
+        if self.service_node and self.service_node not in self.bootstrap_from:
+            return self.bootstrap_from + [self.service_node]
+        return self.bootstrap_from
+
+
+@dataclass
+class ClusterNode:
+    """A started Waku node and the handles needed to talk to it"""
+
+    spec: NodeSpec
+    container: Any
+    client: Any
+    base_url: str
+    enr_uri: str = ""
+    metrics_url: str = ""
+    # libp2p peer ID, resolved once at start-up together with the ENR
+    peer_id: str = ""
+    # time.monotonic() when the bring-up that started this node began
+    started_at: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return self.spec.name
+
+    @property
+    def ip(self) -> str:
+        return self.spec.external_ip
+
+    @property
+    def multiaddr(self) -> str:
+        """Address other nodes on the Docker network use to dial this node"""
+        if not self.peer_id:
+            self.peer_id = self.client.get_peer_id()
+        return f"/ip4/{self.ip}/tcp/{self.spec.ports['tcp']}/p2p/{self.peer_id}"
+
+    def as_fixture(self) -> Dict[str, Any]:
+        """Dictionary shape used by the node fixtures in conftest.py"""
+        return {
+            'container': self.container,
+            'client': self.client,
+            'base_url': self.base_url,
+            'ip': self.ip,
+            'started_at': self.started_at
+        }
+
+
+def order_specs(specs: List[NodeSpec]) -> List[NodeSpec]:
+    """Return specs in dependency order, bootstrap and service nodes first"""
+    by_name = {spec.name: spec for spec in specs}
+    if len(by_name) != len(specs):
+        raise ValueError("Node names in a cluster must be unique")
+
+    ordered: List[NodeSpec] = []
+    state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+    def visit(spec: NodeSpec, path: List[str]):
+        if state.get(spec.name) == 2:
+            return
+        if state.get(spec.name) == 1:
+            raise ValueError(f"Bootstrap cycle detected: {' -> '.join(path + [spec.name])}")
+
+        state[spec.name] = 1
+        for dependency in spec.dependencies:
+            if dependency not in by_name:
+                raise ValueError(f"Node {spec.name} depends on unknown node {dependency}")
+            visit(by_name[dependency], path + [spec.name])
+        state[spec.name] = 2
+        ordered.append(spec)
+
+    for spec in specs:
+        visit(spec, [])
+
+    return ordered
+
+
+def start_in_waves(
+        specs: List[NodeSpec],
+        start_node: Callable[[NodeSpec, List[ClusterNode], Optional[ClusterNode]], ClusterNode],
+        max_workers: Optional[int] = None
+) -> Dict[str, ClusterNode]:
+    """Start nodes concurrently, holding each node back only until its bootstrap nodes are up
+
+    ``start_node`` receives the spec, the already started bootstrap nodes and
+    the started service node, if the spec names one. Nodes without pending
+    dependencies start immediately, so the cluster comes up in dependency
+    waves instead of one node at a time.
+    """
+    ordered = order_specs(specs)
+    if not ordered:
+        return {}
+    started_at = time.monotonic()
+
+    futures: Dict[str, Future] = {}
+    failed = threading.Event()
+
+    def run(spec: NodeSpec) -> ClusterNode:
+        # Dependencies were submitted earlier, so they are already running or done
+        started = {name: futures[name].result() for name in spec.dependencies}
+        if failed.is_set():
+            raise RuntimeError(f"Cluster bring-up aborted before starting {spec.name}")
+        try:
+            bootstrap_nodes = [started[name] for name in spec.bootstrap_from]
+            return start_node(spec, bootstrap_nodes, started.get(spec.service_node))
+        except Exception:
+            failed.set()
+            raise
+
+    workers = max_workers or len(ordered)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cluster") as executor:
+        for spec in ordered:
+            futures[spec.name] = executor.submit(run, spec)
+
+        nodes: Dict[str, ClusterNode] = {}
+        errors: List[str] = []
+        for spec in ordered:
+            try:
+                nodes[spec.name] = futures[spec.name].result()
+            except Exception as e:
+                errors.append(f"{spec.name}: {e}")
+
+    if errors:
+        logger.error(f"Cluster bring-up failed: {errors}")
+        raise RuntimeError(f"Failed to start cluster nodes: {'; '.join(errors)}")
+
+    for node in nodes.values():
+        if node.started_at is None:
+            node.started_at = started_at
+    logger.info(f"Started cluster of {len(nodes)} nodes in {time.monotonic() - started_at:.2f}s")
+    return {spec.name: nodes[spec.name] for spec in specs}
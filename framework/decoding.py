@@ -0,0 +1,81 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional: faster decoding when installed
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class WakuMessage:
+    """Relay message reduced to the fields the tests read
+
+    ``get`` accepts the REST field names, so code written against the raw
+    dicts keeps working.
+    """
+
+    __slots__ = ("payload", "content_topic", "timestamp")
+
+    FIELDS = {"payload": "payload", "contentTopic": "content_topic", "timestamp": "timestamp"}
+
+    def __init__(self, payload: str = "", content_topic: str = "", timestamp: Optional[int] = None):
+        self.payload = payload
+        self.content_topic = content_topic
+        self.timestamp = timestamp
+
+    def get(self, key: str, default: Any = None) -> Any:
+        attribute = self.FIELDS.get(key)
+        return getattr(self, attribute) if attribute else default
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, WakuMessage):
+            return NotImplemented
+        return (self.payload, self.content_topic, self.timestamp) == (other.payload, other.content_topic, other.timestamp)
+
+    def __repr__(self) -> str:
+        return f"WakuMessage(content_topic={self.content_topic!r}, timestamp={self.timestamp}, payload={self.payload[:32]!r})"
+
+
+def _message_from_pairs(pairs: List[Tuple[str, Any]]) -> WakuMessage:
+    message = WakuMessage()
+    for key, value in pairs:
+        if key == "payload":
+            message.payload = value
+        elif key == "contentTopic":
+            message.content_topic = value
+        elif key == "timestamp":
+            message.timestamp = value
+    return message
+
+
+def loads(body: bytes) -> Any:
+    """Decode a JSON response body, with orjson when it is available"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def decode_messages(body: bytes) -> List[WakuMessage]:
+    """Decode a ``get_messages`` response straight into :class:`WakuMessage` records"""
+    if orjson is not None:
+        return [
+            WakuMessage(item.get("payload", ""), item.get("contentTopic", ""), item.get("timestamp"))
+            for item in orjson.loads(body)
+        ]
+    # Messages are flat objects, so the pairs hook builds records without intermediate dicts
+    return json.loads(body, object_pairs_hook=_message_from_pairs)
+
+
+def decode_store_page(body: bytes) -> Tuple[List[WakuMessage], Optional[Dict[str, Any]]]:
+    """Messages and next-page cursor of a store query response"""
+    response = loads(body)
+    if response.get("errorMessage"):
+        raise RuntimeError(f"Store query failed: {response['errorMessage']}")
+    messages = [
+        WakuMessage(item.get("payload", ""), item.get("contentTopic", ""), item.get("timestamp"))
+        for item in response.get("messages") or []
+    ]
+    return messages, response.get("cursor") or None
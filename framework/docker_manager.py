@@ -1,107 +1,131 @@
 import docker
+import hashlib
+import json
 import logging
+import threading
 import time
-from typing import Optional, Dict, Any, List
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterable, List, Union
 from docker.models.containers import Container
 from docker.models.networks import Network
 from config.settings import settings
+from .allocator import ResourceAllocator
+from .cluster import ClusterNode, NodeSpec, start_in_waves
+from .images import ImageStage
+from .impairment import NetworkImpairer
+from .profiles import NodeProfile, get_profile
+from .readiness import NodeReadiness, ReadinessReport
+from .resources import ResourceSampler
+from .subscriptions import ledger
+from .timing import phase, timed
+from .waku_client import WakuClient
 
 logger = logging.getLogger(__name__)
 
+CONFIG_HASH_LABEL = "waku.test.config-hash"
+WORKER_LABEL = "waku.test.worker"
+MANAGER_LABEL = "waku.test.manager"
+
 class DockerManager:
-    """Manages Docker containers and networks for Waku nodes"""
+    """Manages Docker containers and networks for Waku nodes
+
+    Managers with different ``scope`` names (e.g. the shared cluster next to a
+    module's nodes) run side by side in one process on separate networks.
+    """
 
-    def __init__(self):
+    def __init__(
+            self,
+            allocator: Optional[ResourceAllocator] = None,
+            reuse: bool = settings.REUSE_CONTAINERS,
+            scope: str = ""
+    ):
         self.client = docker.from_env()
+        self.reuse = reuse
+        self.manager_id = uuid.uuid4().hex
+        self.allocator = allocator or ResourceAllocator(persistent=reuse, scope=scope)
+        network_name = f"{settings.DOCKER_NETWORK_NAME}_{scope}" if scope else settings.DOCKER_NETWORK_NAME
+        self.network_name = self.allocator.scoped_name(network_name)
         self.containers: List[Container] = []
         self.network: Optional[Network] = None
+        self.readiness = NodeReadiness(self.client)
+        self.readiness_reports: Dict[str, ReadinessReport] = {}
+        # REST URLs of the nodes started or adopted, to forget their subscriptions on teardown
+        self.base_urls: List[str] = []
+        self._impairer: Optional[NetworkImpairer] = None
+        self._lock = threading.Lock()
 
-    def _wait_for_ports_available(self, ports: Dict[str, int], max_attempts: int = 30):
-        """Wait for ports to become available"""
-        import socket
-        import time
-
-        for attempt in range(max_attempts):
-            all_available = True
-
-            for port_name, port_num in ports.items():
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                try:
-                    # Try to bind to the port
-                    sock.bind(('127.0.0.1', port_num))
-                    sock.close()
-                except socket.error:
-                    logger.info(f"Port {port_num} ({port_name}) still in use, waiting...")
-                    all_available = False
-                    break
-                finally:
-                    try:
-                        sock.close()
-                    except:
-                        pass
-
-            if all_available:
-                logger.info("All ports are now available")
-                return True
-
-            time.sleep(2)
-
-        logger.error(f"Ports still not available after {max_attempts * 2} seconds")
-        return False
-
+    @timed("docker.create_network")
     def create_network(self) -> Network:
         """Create Docker network for Waku nodes"""
         try:
-            # Remove existing network if exists
+            subnet, gateway = self.allocator.allocate_subnet()
+
+            # Adopt a matching network in reuse mode, otherwise remove it
             try:
-                existing_network = self.client.networks.get(settings.DOCKER_NETWORK_NAME)
+                existing_network = self.client.networks.get(self.network_name)
+                pools = existing_network.attrs.get("IPAM", {}).get("Config") or []
+                if self.reuse and any(pool.get("Subnet") == subnet for pool in pools):
+                    self.network = existing_network
+                    logger.info(f"Reusing existing network: {self.network_name} ({subnet})")
+                    return self.network
                 existing_network.remove()
-                logger.info(f"Removed existing network: {settings.DOCKER_NETWORK_NAME}")
+                logger.info(f"Removed existing network: {self.network_name}")
             except docker.errors.NotFound:
                 pass
 
-            # Create new network
+            # Create new network on a subnet leased for this worker
             ipam_pool = docker.types.IPAMPool(
-                subnet=settings.DOCKER_NETWORK_SUBNET,
-                gateway=settings.DOCKER_NETWORK_GATEWAY
+                subnet=subnet,
+                gateway=gateway
             )
             ipam_config = docker.types.IPAMConfig(pool_configs=[ipam_pool])
 
             self.network = self.client.networks.create(
-                name=settings.DOCKER_NETWORK_NAME,
+                name=self.network_name,
                 driver="bridge",
                 ipam=ipam_config
             )
-            logger.info(f"Created network: {settings.DOCKER_NETWORK_NAME}")
+            logger.info(f"Created network: {self.network_name} ({subnet})")
             return self.network
 
         except Exception as e:
             logger.error(f"Failed to create network: {e}")
             raise
 
+    def node_spec(
+            self,
+            name: str,
+            bootstrap_from: Optional[List[str]] = None,
+            profile: Union[str, NodeProfile, None] = None,
+            service_node: Optional[str] = None
+    ) -> NodeSpec:
+        """Build a node spec with ports and IP leased from the allocator"""
+        return NodeSpec(
+            name=name,
+            ports=self.allocator.allocate_ports(name),
+            external_ip=self.allocator.allocate_ip(name),
+            bootstrap_from=bootstrap_from or [],
+            profile=get_profile(profile),
+            service_node=service_node
+        )
+
     def start_waku_node(
             self,
             node_name: str,
             ports: Dict[str, int],
             external_ip: str,
-            bootstrap_node: Optional[str] = None
+            bootstrap_node: Optional[Union[str, List[str]]] = None,
+            log_level: str = settings.NODE_LOG_LEVEL,
+            profile: Optional[NodeProfile] = None,
+            service_node: Optional[str] = None
     ) -> Container:
-        """Start a Waku node container"""
-
-        # First, ensure ports are available
-        if not self._wait_for_ports_available(ports):
-            raise RuntimeError(f"Required ports for {node_name} are not available")
+        """Start a Waku node container with the flags of its profile
 
-        # Remove any existing container with the same name
-        try:
-            existing_container = self.client.containers.get(node_name)
-            existing_container.stop(timeout=10)
-            existing_container.remove()
-            logger.info(f"Removed existing container: {node_name}")
-            # Wait a bit after removal
-            time.sleep(3)
-        except docker.errors.NotFound:
-            pass  # Container doesn't exist, which is fine
+        ``service_node`` is the multiaddr of the node a light node sends
+        lightpush and filter requests to.
+        """
+        container_name = self.allocator.scoped_name(node_name)
 
         # Base command arguments
         cmd_args = [
@@ -109,8 +133,7 @@ class DockerManager:
             f"--rest=true",
             f"--rest-admin=true",
             f"--websocket-support=true",
-            f"--log-level=TRACE",
-            f"--rest-relay-cache-capacity=100",
+            f"--log-level={log_level.upper()}",
             f"--websocket-port={ports['websocket']}",
             f"--rest-port={ports['rest']}",
             f"--tcp-port={ports['tcp']}",
@@ -119,12 +142,17 @@ class DockerManager:
             f"--nat=extip:{external_ip}",
             f"--peer-exchange=true",
             f"--discv5-discovery=true",
-            f"--relay=true"
+            f"--metrics-server=true",
+            f"--metrics-server-address=0.0.0.0",
+            f"--metrics-server-port={ports['metrics']}",
+            *get_profile(profile).args(service_node)
         ]
 
-        # Add bootstrap node if provided
-        if bootstrap_node:
-            cmd_args.append(f"--discv5-bootstrap-node={bootstrap_node}")
+        # Add bootstrap node(s) if provided
+        if isinstance(bootstrap_node, str):
+            bootstrap_node = [bootstrap_node]
+        for enr_uri in bootstrap_node or []:
+            cmd_args.append(f"--discv5-bootstrap-node={enr_uri}")
 
         # Port mappings
         port_mappings = {
@@ -135,21 +163,54 @@ class DockerManager:
             f"{ports['metrics']}/tcp": ports['metrics']
         }
 
+        config_hash = self._config_hash(cmd_args, port_mappings)
+
+        # Adopt a matching warm container in reuse mode; otherwise remove any
+        # existing container with the same name (removal is synchronous)
         try:
-            container = self.client.containers.run(
-                image=settings.DOCKER_IMAGE,
-                command=cmd_args,
-                name=node_name,
-                ports=port_mappings,
-                detach=True,
-                remove=False,
-            )
+            with phase("docker.existing_container"):
+                existing_container = self.client.containers.get(container_name)
+                if self.reuse and self._adopt_container(node_name, existing_container, config_hash, ports):
+                    return existing_container
+                existing_container.remove(force=True)
+            logger.info(f"Removed existing container: {container_name}")
+        except docker.errors.NotFound:
+            pass  # Container doesn't exist, which is fine
 
-            self.containers.append(container)
-            logger.info(f"Started container: {node_name}")
+        # Normally already done by the session-start image stage
+        with phase("docker.image_wait"):
+            ImageStage.for_image(settings.DOCKER_IMAGE).wait()
+
+        try:
+            with phase("docker.containers_run"):
+                container = self.client.containers.run(
+                    image=settings.DOCKER_IMAGE,
+                    command=cmd_args,
+                    name=container_name,
+                    ports=port_mappings,
+                    labels={
+                        CONFIG_HASH_LABEL: config_hash,
+                        WORKER_LABEL: self.allocator.worker_id,
+                        MANAGER_LABEL: self.manager_id
+                    },
+                    detach=True,
+                    remove=False,
+                )
 
-            # Wait for container to be ready
-            self._wait_for_container_ready(container)
+            # A fresh container has none of the subscriptions recorded for its predecessor
+            ledger.pop(f"http://127.0.0.1:{ports['rest']}")
+            with self._lock:
+                self.containers.append(container)
+                self.base_urls.append(f"http://127.0.0.1:{ports['rest']}")
+            logger.info(f"Started container: {container_name}")
+
+            # Wait for container and REST API to be ready
+            report = self.readiness.wait_until_ready(
+                container,
+                base_url=f"http://127.0.0.1:{ports['rest']}"
+            )
+            with self._lock:
+                self.readiness_reports[node_name] = report
 
             return container
 
@@ -157,49 +218,263 @@ class DockerManager:
             logger.error(f"Failed to start container {node_name}: {e}")
             raise
 
+    @staticmethod
+    def _config_hash(cmd_args: List[str], port_mappings: Dict[str, int]) -> str:
+        """Fingerprint of everything that defines a node container"""
+        config = {"image": settings.DOCKER_IMAGE, "command": cmd_args, "ports": port_mappings}
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+    def _adopt_container(
+            self,
+            node_name: str,
+            container: Container,
+            config_hash: str,
+            ports: Dict[str, int]
+    ) -> bool:
+        """Take over a healthy running container started with the same configuration"""
+        if container.labels.get(CONFIG_HASH_LABEL) != config_hash or container.status != "running":
+            return False
+
+        started = time.monotonic()
+        base_url = f"http://127.0.0.1:{ports['rest']}"
+        try:
+            self.readiness.wait_for_api(base_url, timeout=2)
+            WakuClient(base_url).reset_state(settings.RESET_TOPICS)
+        except Exception as e:
+            logger.info(f"Not reusing container {container.name}: {e}")
+            return False
+
+        with self._lock:
+            self.containers.append(container)
+            self.base_urls.append(base_url)
+            self.readiness_reports[node_name] = ReadinessReport(
+                container_name=container.name,
+                phases={"adopted": time.monotonic() - started}
+            )
+        logger.info(f"Reusing warm container: {container.name}")
+        return True
+
+    def start_cluster(
+            self,
+            specs: List[NodeSpec],
+            max_workers: Optional[int] = None
+    ) -> Dict[str, ClusterNode]:
+        """Start several Waku nodes in parallel, in bootstrap dependency waves"""
+        return start_in_waves(specs, self._start_cluster_node, max_workers=max_workers)
+
+    def _start_cluster_node(
+            self,
+            spec: NodeSpec,
+            bootstrap_nodes: List[ClusterNode],
+            service_node: Optional[ClusterNode] = None
+    ) -> ClusterNode:
+        """Start one cluster node once its bootstrap and service nodes are running"""
+        container = self.start_waku_node(
+            node_name=spec.name,
+            ports=spec.ports,
+            external_ip=spec.external_ip,
+            bootstrap_node=[node.enr_uri for node in bootstrap_nodes],
+            log_level=spec.log_level,
+            profile=spec.profile,
+            service_node=service_node.multiaddr if service_node else None
+        )
+
+        self.connect_container_to_network(container, spec.external_ip)
+
+        base_url = f"http://127.0.0.1:{spec.ports['rest']}"
+        client = WakuClient(base_url)
+        # One info request gives both identities; dependants dial by multiaddr or ENR
+        node_info = client.get_node_info()
+        return ClusterNode(
+            spec=spec,
+            container=container,
+            client=client,
+            base_url=base_url,
+            enr_uri=node_info.get('enrUri', ''),
+            metrics_url=f"http://127.0.0.1:{spec.ports['metrics']}/metrics",
+            peer_id=WakuClient.peer_id_from_info(node_info)
+        )
+
+    def get_container(self, container_id: Optional[str]) -> Optional[Container]:
+        """Look up a container by id, e.g. one started by another worker"""
+        if not container_id:
+            return None
+        try:
+            return self.client.containers.get(container_id)
+        except docker.errors.NotFound:
+            return None
+
+    def adopt(self, manager_id: str, network_name: str):
+        """Take over the containers and network of another manager so cleanup removes them"""
+        self.manager_id = manager_id
+        self.network_name = network_name
+        self._impairer = None
+        try:
+            self.network = self.client.networks.get(network_name)
+        except docker.errors.NotFound:
+            self.network = None
+        logger.info(f"Adopted containers of manager {manager_id} on network {network_name}")
+
+    @property
+    def impairer(self) -> NetworkImpairer:
+        """Applies netem impairments to this manager's containers"""
+        with self._lock:
+            if self._impairer is None:
+                self._impairer = NetworkImpairer(self.client, self.network_name)
+            return self._impairer
+
+    def resource_sampler(self, capacity: int = 3600) -> ResourceSampler:
+        """Sampler streaming Docker stats of every container started so far"""
+        with self._lock:
+            return ResourceSampler(list(self.containers), capacity=capacity)
+
     def connect_container_to_network(self, container: Container, ip_address: str):
         """Connect container to the Waku network"""
         if not self.network:
             raise RuntimeError("Network not created")
 
+        container.reload()
+        attached = container.attrs.get("NetworkSettings", {}).get("Networks", {})
+        if self.network.name in attached:
+            logger.info(f"{container.name} already connected to {self.network.name}")
+            return
+
         try:
-            self.network.connect(container, ipv4_address=ip_address)
+            with phase("docker.network_connect"):
+                self.network.connect(container, ipv4_address=ip_address)
             logger.info(f"Connected {container.name} to network with IP: {ip_address}")
         except Exception as e:
             logger.error(f"Failed to connect container to network: {e}")
             raise
 
-    def _wait_for_container_ready(self, container: Container, timeout: int = 30):
-        """Wait for container to be in running state"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            container.reload()
-            if container.status == "running":
-                # Additional wait for service to be ready
-                time.sleep(5)
-                return
-            time.sleep(1)
-
-        raise TimeoutError(f"Container {container.name} not ready within {timeout} seconds")
-
-    def cleanup(self):
-        """Clean up containers and network"""
-        # Stop and remove containers
-        for container in self.containers:
+    @timed("docker.teardown")
+    def teardown(
+            self,
+            timeout: float = settings.TEARDOWN_TIMEOUT,
+            only: Optional[List[Container]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Stop and remove all node containers concurrently within one global deadline
+
+        Every container gets SIGTERM at once; whatever is still running when the
+        deadline passes is killed. Containers and their anonymous volumes are then
+        removed in bulk, found by this manager's label as well as by reference.
+        ``only`` restricts the teardown to the given containers. Returns a
+        per-container report of stop times.
+        """
+        if only is not None:
+            containers = {container.id: container for container in only}
+        else:
+            containers = {container.id: container for container in self.containers}
             try:
-                container.stop(timeout=10)
-                container.remove()
-                logger.info(f"Cleaned up container: {container.name}")
+                for container in self.client.containers.list(
+                        all=True,
+                        filters={"label": f"{MANAGER_LABEL}={self.manager_id}"}
+                ):
+                    containers.setdefault(container.id, container)
             except Exception as e:
-                logger.warning(f"Failed to cleanup container {container.name}: {e}")
+                logger.warning(f"Failed to list labelled containers: {e}")
+
+        if not containers:
+            return {}
+
+        report: Dict[str, Dict[str, Any]] = {
+            container.name: {"stop_seconds": None, "killed": False, "removed": False}
+            for container in containers.values()
+        }
+        started = time.monotonic()
+        deadline = started + timeout
+
+        def terminate(container: Container):
+            try:
+                container.kill(signal="SIGTERM")
+            except docker.errors.APIError:
+                pass  # Already stopped
+
+        def wait_stopped(container: Container):
+            remaining = max(deadline - time.monotonic(), 0.1)
+            try:
+                container.wait(timeout=remaining)
+                report[container.name]["stop_seconds"] = round(time.monotonic() - started, 3)
+            except Exception:
+                try:
+                    container.kill()
+                    report[container.name]["killed"] = True
+                    report[container.name]["stop_seconds"] = round(time.monotonic() - started, 3)
+                except docker.errors.APIError as e:
+                    report[container.name]["error"] = str(e)
+
+        def remove(container: Container):
+            try:
+                container.remove(v=True, force=True)
+                report[container.name]["removed"] = True
+            except docker.errors.NotFound:
+                report[container.name]["removed"] = True
+            except Exception as e:
+                report[container.name]["error"] = str(e)
+
+        with ThreadPoolExecutor(max_workers=len(containers), thread_name_prefix="teardown") as executor:
+            list(executor.map(terminate, containers.values()))
+            list(executor.map(wait_stopped, containers.values()))
+            list(executor.map(remove, containers.values()))
+
+        elapsed = time.monotonic() - started
+        killed = sum(1 for entry in report.values() if entry["killed"])
+        logger.info(f"Tore down {len(report)} containers in {elapsed:.2f}s ({killed} killed)")
+        return report
+
+    def remove_nodes(self, nodes: Iterable[ClusterNode]) -> Dict[str, Dict[str, Any]]:
+        """Tear down some nodes before cleanup, e.g. when a class fixture ends
+
+        In reuse mode the containers stay warm for adoption instead.
+        """
+        nodes = list(nodes)
+        if self.reuse or not nodes:
+            return {}
+        report = self.teardown(only=[node.container for node in nodes])
+        removed = {node.container.id for node in nodes}
+        with self._lock:
+            self.containers = [container for container in self.containers if container.id not in removed]
+            for node in nodes:
+                if node.base_url in self.base_urls:
+                    self.base_urls.remove(node.base_url)
+        if self._impairer is not None:
+            for node in nodes:
+                self._impairer.applied.pop(node.container.id, None)
+        for node in nodes:
+            ledger.pop(node.base_url)
+        return report
+
+    def cleanup(self, force: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Clean up containers and network
+
+        In reuse mode containers, network and leases are kept warm for the next
+        module or session unless ``force`` is set. Returns the teardown report.
+        """
+        # Warm containers must not carry a test's impairment into the next one
+        if self._impairer is not None:
+            self._impairer.clear_all()
+
+        if self.reuse and not force:
+            logger.info(f"Keeping {len(self.containers)} containers warm for reuse")
+            self.containers.clear()
+            self.base_urls.clear()
+            self.network = None
+            return {}
+
+        report = self.teardown()
+        for base_url in self.base_urls:
+            ledger.pop(base_url)
+        self.base_urls.clear()
 
         # Remove network
         if self.network:
             try:
                 self.network.remove()
-                logger.info(f"Cleaned up network: {settings.DOCKER_NETWORK_NAME}")
+                logger.info(f"Cleaned up network: {self.network_name}")
             except Exception as e:
                 logger.warning(f"Failed to cleanup network: {e}")
 
         self.containers.clear()
-        self.network = None
\ No newline at end of file
+        self.network = None
+        self.allocator.release_all()
+        return report
\ No newline at end of file
@@ -0,0 +1,785 @@
+import heapq
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ipaddress import ip_network
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from config.settings import settings
+from .cluster import ClusterNode, NodeSpec, start_in_waves
+from .impairment import Impairment
+from .profiles import NodeProfile, get_profile
+from .resources import ResourceSampler
+from .subscriptions import ledger
+from .waku_client import WakuClient
+
+logger = logging.getLogger(__name__)
+
+RELAY_PROTOCOL = "/vac/waku/relay/2.0.0"
+STORE_PROTOCOL = "/vac/waku/store/2.0.0-beta4"
+LIGHTPUSH_PROTOCOL = "/vac/waku/lightpush/2.0.0-beta1"
+FILTER_PROTOCOL = "/vac/waku/filter-subscribe/2.0.0-beta1"
+MAX_STORE_PAGE_SIZE = 100
+# Seconds between shutdown checks of each fake node's HTTP server loop
+SHUTDOWN_POLL_INTERVAL = 0.05
+
+
+def _peer_id() -> str:
+    alphabet = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+    return "16Uiu2" + "".join(random.choice(alphabet) for _ in range(47))
+
+
+class FakeWakuNetwork:
+    """In-process stand-in for a relay network of Waku nodes
+
+    Messages published on one node are delivered to every subscribed node in
+    the same connected component. Each hop adds ``latency`` seconds plus up to
+    ``jitter`` seconds, and each delivery is dropped with probability ``loss``.
+    Impaired nodes add their :class:`Impairment` delay and loss to the hops
+    they send on, like netem on a container's egress; rate limits are ignored.
+    """
+
+    def __init__(
+            self,
+            latency: float = settings.FAKE_LATENCY,
+            jitter: float = settings.FAKE_JITTER,
+            loss: float = settings.FAKE_LOSS,
+            seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.nodes: Dict[str, "FakeWakuNode"] = {}
+        self.links: Dict[str, set] = {}
+        # Egress impairment per node: (impairment, peer IDs it applies to or None for all)
+        self.impairments: Dict[str, Tuple[Impairment, Optional[set]]] = {}
+
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[float, int, Callable[[], None]]] = []
+        self._sequence = 0
+        self._wakeup = threading.Condition(self._lock)
+        self._closed = False
+        self._scheduler = threading.Thread(target=self._run_scheduler, name="fake-relay", daemon=True)
+        self._scheduler.start()
+
+    def add_node(self, node: "FakeWakuNode"):
+        with self._lock:
+            self.nodes[node.peer_id] = node
+            self.links.setdefault(node.peer_id, set())
+
+    def remove_node(self, node: "FakeWakuNode"):
+        with self._lock:
+            self.nodes.pop(node.peer_id, None)
+            for peer in self.links.pop(node.peer_id, set()):
+                self.links.get(peer, set()).discard(node.peer_id)
+
+    def node_by_enr(self, enr_uri: str) -> Optional["FakeWakuNode"]:
+        with self._lock:
+            for node in self.nodes.values():
+                if node.enr_uri == enr_uri:
+                    return node
+        return None
+
+    def connect(self, first: "FakeWakuNode", second: "FakeWakuNode"):
+        with self._lock:
+            self.links[first.peer_id].add(second.peer_id)
+            self.links[second.peer_id].add(first.peer_id)
+
+    def hops_from(self, origin: "FakeWakuNode") -> Dict[str, int]:
+        """Hop distance from ``origin`` to every node reachable from it"""
+        with self._lock:
+            hops = {origin.peer_id: 0}
+            frontier = [origin.peer_id]
+            while frontier:
+                next_frontier = []
+                for peer_id in frontier:
+                    for neighbour in self.links.get(peer_id, ()):
+                        if neighbour not in hops:
+                            hops[neighbour] = hops[peer_id] + 1
+                            next_frontier.append(neighbour)
+                frontier = next_frontier
+            return hops
+
+    def _parents_from(self, origin: "FakeWakuNode") -> Dict[str, Optional[str]]:
+        """Breadth-first tree from ``origin``: the previous hop towards every reachable node"""
+        with self._lock:
+            parents: Dict[str, Optional[str]] = {origin.peer_id: None}
+            frontier = [origin.peer_id]
+            while frontier:
+                next_frontier = []
+                for peer_id in frontier:
+                    for neighbour in self.links.get(peer_id, ()):
+                        if neighbour not in parents:
+                            parents[neighbour] = peer_id
+                            next_frontier.append(neighbour)
+                frontier = next_frontier
+            return parents
+
+    def impair(self, node: "FakeWakuNode", impairment: Impairment, peer_ids: Optional[Iterable[str]] = None):
+        with self._lock:
+            self.impairments[node.peer_id] = (impairment, set(peer_ids) if peer_ids else None)
+
+    def clear_impairment(self, node: "FakeWakuNode"):
+        with self._lock:
+            self.impairments.pop(node.peer_id, None)
+
+    def _path_delay(self, parents: Dict[str, Optional[str]], peer_id: str) -> Optional[float]:
+        """Delay along the path to ``peer_id``, or None when an impaired hop drops the message"""
+        delay = 0.0
+        while parents[peer_id] is not None:
+            sender = parents[peer_id]
+            delay += self.latency + self.random.uniform(0, self.jitter)
+            impairment, peer_ids = self.impairments.get(sender, (None, None))
+            if impairment is not None and (peer_ids is None or peer_id in peer_ids):
+                if impairment.loss_percent and self.random.random() * 100 < impairment.loss_percent:
+                    return None
+                delay += impairment.sample_delay(self.random)
+            peer_id = sender
+        return delay
+
+    def peers_of(self, node: "FakeWakuNode") -> List["FakeWakuNode"]:
+        """Nodes ``node`` has discovered: everything in its connected component"""
+        hops = self.hops_from(node)
+        with self._lock:
+            return [self.nodes[peer_id] for peer_id in hops if peer_id != node.peer_id and peer_id in self.nodes]
+
+    def relay(self, origin: "FakeWakuNode", message: Dict[str, Any]):
+        """Deliver a published message to every relay node reachable from ``origin`` that wants it
+
+        Relay subscribers, store nodes and service nodes with filter
+        subscriptions for the topic all receive it.
+        """
+        topic = message["contentTopic"]
+        parents = self._parents_from(origin)
+        for peer_id in parents:
+            node = self.nodes.get(peer_id)
+            if node is None or not node.profile.relay:
+                continue
+            if topic not in node.subscriptions and not node.profile.store and topic not in node.filter_subscribers:
+                continue
+            if peer_id != origin.peer_id and self.loss and self.random.random() < self.loss:
+                continue
+
+            delay = self._path_delay(parents, peer_id)
+            if delay is None:
+                continue
+            if delay <= 0:
+                node.deliver(message)
+            else:
+                self._schedule(delay, lambda node=node: node.deliver(message))
+
+    def push(self, target: "FakeWakuNode", message: Dict[str, Any]):
+        """Deliver a filter push from a service node to a light node, one hop away"""
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay <= 0:
+            target.filter_deliver(message)
+        else:
+            self._schedule(delay, lambda: target.filter_deliver(message))
+
+    def _schedule(self, delay: float, callback: Callable[[], None]):
+        with self._wakeup:
+            self._sequence += 1
+            heapq.heappush(self._pending, (time.monotonic() + delay, self._sequence, callback))
+            self._wakeup.notify()
+
+    def _run_scheduler(self):
+        with self._wakeup:
+            while not self._closed:
+                if not self._pending:
+                    self._wakeup.wait()
+                    continue
+                due, _, callback = self._pending[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._wakeup.wait(delay)
+                    continue
+                heapq.heappop(self._pending)
+                self._lock.release()
+                try:
+                    callback()
+                finally:
+                    self._lock.acquire()
+
+    def close(self):
+        with self._wakeup:
+            self._closed = True
+            self._pending.clear()
+            self._wakeup.notify()
+        self._scheduler.join()
+
+
+class _FakeNodeHandler(BaseHTTPRequestHandler):
+    """Implements the subset of the nwaku REST API used by the framework"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "_FakeNodeServer"
+
+    def log_message(self, format: str, *args):
+        logger.debug(f"{self.server.node.name}: {format % args}")
+
+    def _send(self, status: int, body: Any = None):
+        if isinstance(body, (dict, list)):
+            data = json.dumps(body).encode()
+            content_type = "application/json"
+        else:
+            data = (body or "").encode()
+            content_type = "text/plain"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> Any:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def do_GET(self):
+        node = self.server.node
+        path = urlsplit(self.path).path
+        messages_prefix = settings.MESSAGES_ENDPOINT + "/"
+        filter_prefix = settings.FILTER_MESSAGES_ENDPOINT + "/"
+
+        if path == settings.DEBUG_INFO_ENDPOINT:
+            self._send(200, node.info())
+        elif path == "/metrics":
+            self._send(200, node.metrics())
+        elif path == settings.PEERS_ENDPOINT:
+            self._send(200, node.peers())
+        elif path == settings.STORE_ENDPOINT:
+            self._store_query()
+        elif path.startswith(messages_prefix):
+            content_topic = unquote(path[len(messages_prefix):])
+            if content_topic not in node.subscriptions:
+                self._send(404, f"Not subscribed to topic: {content_topic}")
+            else:
+                self._send(200, node.drain(content_topic))
+        elif path.startswith(filter_prefix):
+            content_topic = unquote(path[len(filter_prefix):])
+            if content_topic not in node.filter_topics:
+                self._send(404, f"Not subscribed to topic: {content_topic}")
+            else:
+                self._send(200, node.drain_filter(content_topic))
+        else:
+            self._send(404, "Not found")
+
+    def _service_peer(self, protocol: str) -> Optional["FakeWakuNode"]:
+        service = self.server.node.service_peer
+        if service is None or service.status != "running" or protocol not in service.protocols:
+            return None
+        return service
+
+    def _filter_response(self, status: int, request_id: str, description: str):
+        self._send(status, {"requestId": request_id, "statusCode": status, "statusDesc": description})
+
+    def _store_query(self):
+        params = {key: values[0] for key, values in parse_qs(urlsplit(self.path).query).items()}
+        store_node = self.server.node
+        if params.get("peerAddr"):
+            store_node = store_node.network.nodes.get(params["peerAddr"].rsplit("/p2p/", 1)[-1])
+        if store_node is None or not store_node.profile.store:
+            self._send(412, "No suitable store peer")
+            return
+
+        content_topics = set(filter(None, params.get("contentTopics", "").split(",")))
+        page_size = min(int(params.get("pageSize") or MAX_STORE_PAGE_SIZE), MAX_STORE_PAGE_SIZE)
+        cursor = int(params["storeTime"]) if params.get("storeTime") else None
+        messages, next_cursor = store_node.query_archive(
+            content_topics,
+            page_size,
+            ascending=params.get("ascending", "true") != "false",
+            cursor=cursor,
+            start_time=int(params["startTime"]) if params.get("startTime") else None,
+            end_time=int(params["endTime"]) if params.get("endTime") else None
+        )
+        self._send(200, {
+            "messages": messages,
+            "cursor": {"storeTime": next_cursor} if next_cursor is not None else None,
+            "errorMessage": ""
+        })
+
+    def do_POST(self):
+        node = self.server.node
+        path = urlsplit(self.path).path
+        try:
+            body = self._read_json()
+        except ValueError as e:
+            self._send(400, f"Invalid JSON: {e}")
+            return
+
+        if path == settings.SUBSCRIPTIONS_ENDPOINT:
+            if not isinstance(body, list):
+                self._send(400, "Expected a list of content topics")
+                return
+            node.subscriptions.update(body)
+            self._send(200, "OK")
+        elif path == settings.PEERS_ENDPOINT:
+            if not isinstance(body, list):
+                self._send(400, "Expected a list of multiaddrs")
+                return
+            for multiaddr in body:
+                peer = self.server.node.network.nodes.get(multiaddr.rsplit("/p2p/", 1)[-1])
+                if peer is None:
+                    self._send(400, f"Unknown peer: {multiaddr}")
+                    return
+                node.network.connect(node, peer)
+            self._send(200, "OK")
+        elif path == settings.MESSAGES_ENDPOINT:
+            if not isinstance(body, dict) or "payload" not in body or "contentTopic" not in body:
+                self._send(400, "Message needs payload and contentTopic")
+                return
+            node.publish(body)
+            self._send(200, "OK")
+        elif path == settings.LIGHTPUSH_ENDPOINT:
+            message = body.get("message") if isinstance(body, dict) else None
+            if not isinstance(message, dict) or "payload" not in message or "contentTopic" not in message:
+                self._send(400, "Request needs a message with payload and contentTopic")
+                return
+            service = self._service_peer(LIGHTPUSH_PROTOCOL)
+            if service is None:
+                self._send(503, "Failed to request a message push: no suitable remote peers")
+                return
+            service.publish(message)
+            self._send(200, "OK")
+        elif path == settings.FILTER_SUBSCRIPTIONS_ENDPOINT:
+            request_id = body.get("requestId", "") if isinstance(body, dict) else ""
+            content_topics = body.get("contentFilters") if isinstance(body, dict) else None
+            if not content_topics:
+                self._filter_response(400, request_id, "contentFilters is required")
+                return
+            service = self._service_peer(FILTER_PROTOCOL)
+            if service is None:
+                self._filter_response(503, request_id, "No suitable filter peer")
+                return
+            service.filter_subscribe(node, content_topics)
+            node.filter_topics.update(content_topics)
+            self._filter_response(200, request_id, "OK")
+        else:
+            self._send(404, "Not found")
+
+    def do_DELETE(self):
+        node = self.server.node
+        path = urlsplit(self.path).path
+        if path == settings.SUBSCRIPTIONS_ENDPOINT:
+            for topic in self._read_json() or []:
+                node.subscriptions.discard(topic)
+                node.cache.pop(topic, None)
+            self._send(200, "OK")
+        elif path in (settings.FILTER_SUBSCRIPTIONS_ENDPOINT, settings.FILTER_SUBSCRIPTIONS_ENDPOINT + "/all"):
+            body = self._read_json() or {}
+            if path.endswith("/all"):
+                content_topics = list(node.filter_topics)
+            else:
+                content_topics = body.get("contentFilters") or []
+            if node.service_peer is not None:
+                node.service_peer.filter_unsubscribe(node, content_topics)
+            for topic in content_topics:
+                node.filter_topics.discard(topic)
+                node.filter_cache.pop(topic, None)
+            self._filter_response(200, body.get("requestId", ""), "OK")
+        else:
+            self._send(404, "Not found")
+
+
+class _FakeNodeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, node: "FakeWakuNode"):
+        self.node = node
+        super().__init__(("127.0.0.1", 0), _FakeNodeHandler)
+
+
+class FakeWakuNode:
+    """A fake nwaku node serving the REST API from a local HTTP server
+
+    Exposes the container attributes the tests use (``name``, ``status``) so it
+    can stand in for a Docker container in the node fixtures.
+    """
+
+    def __init__(
+            self,
+            network: FakeWakuNetwork,
+            name: str,
+            external_ip: str,
+            ports: Dict[str, int],
+            profile: Optional[NodeProfile] = None
+    ):
+        self.network = network
+        self.name = name
+        self.profile = get_profile(profile)
+        self.external_ip = external_ip
+        self.ports = ports
+        self.peer_id = _peer_id()
+        self.id = self.peer_id
+        self.enr_uri = f"enr:-fake-{self.peer_id}"
+        self.status = "created"
+        self.subscriptions: set = set()
+        self.cache: Dict[str, Deque[Dict[str, Any]]] = {}
+        # Store archive; ``archive[0]`` has absolute index ``archive_start``, which cursors refer to
+        self.archive: List[Dict[str, Any]] = []
+        self.archive_start = 0
+        # Light node side of filter: its service node and the messages pushed to it
+        self.service_peer: Optional["FakeWakuNode"] = None
+        self.filter_topics: set = set()
+        self.filter_cache: Dict[str, Deque[Dict[str, Any]]] = {}
+        # Service node side of filter: light nodes subscribed per content topic
+        self.filter_subscribers: Dict[str, set] = {}
+        self.counters = {"relay": 0, "bytes_in": 0, "bytes_out": 0}
+        self._cache_lock = threading.Lock()
+        self._server = _FakeNodeServer(self)
+        # A short poll interval lets shutdown() return promptly instead of after up to 0.5s
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            kwargs={"poll_interval": SHUTDOWN_POLL_INTERVAL},
+            name=f"fake-{name}",
+            daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def multiaddr(self) -> str:
+        return f"/ip4/{self.external_ip}/tcp/{self.ports['tcp']}/p2p/{self.peer_id}"
+
+    def start(self):
+        self.network.add_node(self)
+        self._thread.start()
+        self.status = "running"
+
+    def stop(self, timeout: int = 0):
+        if self.status == "running":
+            self._server.shutdown()
+            # Subscriptions end with the node; its port may be handed to another
+            ledger.pop(self.base_url)
+        self._server.server_close()
+        self.network.remove_node(self)
+        self.status = "exited"
+
+    def remove(self, **kwargs):
+        self.stop()
+
+    def reload(self):
+        pass
+
+    def info(self) -> Dict[str, Any]:
+        return {"listenAddresses": [self.multiaddr], "enrUri": self.enr_uri}
+
+    @property
+    def protocols(self) -> List[str]:
+        flags = [
+            (self.profile.relay, RELAY_PROTOCOL),
+            (self.profile.store, STORE_PROTOCOL),
+            (self.profile.lightpush, LIGHTPUSH_PROTOCOL),
+            (self.profile.filter, FILTER_PROTOCOL)
+        ]
+        return [protocol for enabled, protocol in flags if enabled]
+
+    def peers(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "multiaddr": peer.multiaddr,
+                "protocols": [{"protocol": protocol, "connected": True} for protocol in peer.protocols]
+            }
+            for peer in self.network.peers_of(self)
+        ]
+
+    def metrics(self) -> str:
+        """Prometheus text exposition of the counters nwaku reports"""
+        return "\n".join([
+            "# TYPE waku_node_messages_total counter",
+            f'waku_node_messages_total{{type="relay"}} {self.counters["relay"]}',
+            "# TYPE libp2p_peers gauge",
+            f"libp2p_peers {len(self.network.peers_of(self))}",
+            "# TYPE libp2p_network_bytes_total counter",
+            f'libp2p_network_bytes_total{{direction="in"}} {self.counters["bytes_in"]}',
+            f'libp2p_network_bytes_total{{direction="out"}} {self.counters["bytes_out"]}',
+            ""
+        ])
+
+    def publish(self, message: Dict[str, Any]):
+        with self._cache_lock:
+            self.counters["bytes_out"] += len(message["payload"])
+        message = dict(message)
+        message.setdefault("version", 0)
+        message["timestamp"] = message.get("timestamp") or time.time_ns()
+        self.network.relay(self, message)
+
+    def deliver(self, message: Dict[str, Any]):
+        topic = message["contentTopic"]
+        for light_node in list(self.filter_subscribers.get(topic, ())):
+            self.network.push(light_node, message)
+        with self._cache_lock:
+            if self.profile.store:
+                self._archive(message)
+            if topic not in self.subscriptions:
+                return
+            self.counters["relay"] += 1
+            self.counters["bytes_in"] += len(message["payload"])
+            if topic not in self.cache:
+                self.cache[topic] = deque(maxlen=self.profile.relay_cache_capacity)
+            self.cache[topic].append(message)
+
+    def filter_subscribe(self, light_node: "FakeWakuNode", content_topics: List[str]):
+        with self._cache_lock:
+            for topic in content_topics:
+                self.filter_subscribers.setdefault(topic, set()).add(light_node)
+
+    def filter_unsubscribe(self, light_node: "FakeWakuNode", content_topics: List[str]):
+        with self._cache_lock:
+            for topic in content_topics:
+                subscribers = self.filter_subscribers.get(topic, set())
+                subscribers.discard(light_node)
+                if not subscribers:
+                    self.filter_subscribers.pop(topic, None)
+
+    def filter_deliver(self, message: Dict[str, Any]):
+        topic = message["contentTopic"]
+        with self._cache_lock:
+            if topic not in self.filter_topics:
+                return
+            self.counters["bytes_in"] += len(message["payload"])
+            if topic not in self.filter_cache:
+                self.filter_cache[topic] = deque(maxlen=self.profile.relay_cache_capacity)
+            self.filter_cache[topic].append(message)
+
+    def drain_filter(self, content_topic: str) -> List[Dict[str, Any]]:
+        with self._cache_lock:
+            messages = self.filter_cache.pop(content_topic, None)
+        return list(messages or [])
+
+    def _archive(self, message: Dict[str, Any]):
+        self.archive.append(message)
+        capacity = self.profile.retention_capacity
+        if capacity is not None and len(self.archive) > capacity * 1.1:
+            # Trim in batches so retention stays cheap per message
+            excess = len(self.archive) - capacity
+        elif self.profile.retention_seconds is not None:
+            expiry = time.time_ns() - self.profile.retention_seconds * 1_000_000_000
+            excess = 0
+            while excess < len(self.archive) and self.archive[excess]["timestamp"] < expiry:
+                excess += 1
+        else:
+            return
+        if excess:
+            del self.archive[:excess]
+            self.archive_start += excess
+
+    def query_archive(
+            self,
+            content_topics: set,
+            page_size: int,
+            ascending: bool = True,
+            cursor: Optional[int] = None,
+            start_time: Optional[int] = None,
+            end_time: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """One page of archived messages and the cursor of the next page, if any"""
+        with self._cache_lock:
+            end = self.archive_start + len(self.archive)
+            if ascending:
+                positions = range(max(cursor if cursor is not None else 0, self.archive_start), end)
+            else:
+                start = min(cursor if cursor is not None else end - 1, end - 1)
+                positions = range(start, self.archive_start - 1, -1)
+
+            page = []
+            for position in positions:
+                message = self.archive[position - self.archive_start]
+                if content_topics and message["contentTopic"] not in content_topics:
+                    continue
+                timestamp = message.get("timestamp") or 0
+                if (start_time is not None and timestamp < start_time) or (end_time is not None and timestamp > end_time):
+                    continue
+                if len(page) == page_size:
+                    return page, position
+                page.append(message)
+            return page, None
+
+    def drain(self, content_topic: str) -> List[Dict[str, Any]]:
+        with self._cache_lock:
+            messages = self.cache.pop(content_topic, None)
+        return list(messages or [])
+
+
+class FakeImpairer:
+    """Counterpart of :class:`NetworkImpairer` acting on the fake network's hop delays"""
+
+    def __init__(self, manager: "FakeNodeManager"):
+        self.manager = manager
+        self.applied: Dict[str, Tuple[FakeWakuNode, Impairment]] = {}
+
+    def apply(self, container: FakeWakuNode, impairment: Impairment, peers: Optional[List[str]] = None):
+        """Impair messages ``container`` sends, to every peer or only to the ``peers`` IPs"""
+        peer_ids = None
+        if peers:
+            by_ip = {node.external_ip: node.peer_id for node in self.manager.containers}
+            peer_ids = [by_ip[ip] for ip in peers if ip in by_ip]
+        self.manager.network.impair(container, impairment, peer_ids)
+        self.applied[container.id] = (container, impairment)
+        logger.info(f"Impaired {container.name}: {impairment}" + (f" towards {peers}" if peers else ""))
+
+    def clear(self, container: FakeWakuNode):
+        self.manager.network.clear_impairment(container)
+        self.applied.pop(container.id, None)
+
+    def clear_all(self):
+        for container, _ in list(self.applied.values()):
+            self.clear(container)
+
+
+class FakeNodeManager:
+    """Drop-in replacement for DockerManager backed by in-process fake nodes"""
+
+    def __init__(self, network: Optional[FakeWakuNetwork] = None):
+        self.network = network or FakeWakuNetwork()
+        self.containers: List[FakeWakuNode] = []
+        self._lock = threading.Lock()
+        self._subnet = ip_network(settings.DOCKER_NETWORK_SUBNET)
+        self._next_index = 0
+        self.impairer = FakeImpairer(self)
+
+    def create_network(self) -> FakeWakuNetwork:
+        return self.network
+
+    def node_spec(
+            self,
+            name: str,
+            bootstrap_from: Optional[List[str]] = None,
+            profile: Optional[Union[str, NodeProfile]] = None,
+            service_node: Optional[str] = None
+    ) -> NodeSpec:
+        """Build a node spec with synthetic ports and IP; REST is served on an ephemeral port"""
+        with self._lock:
+            self._next_index += 1
+            index = self._next_index
+        base = settings.PORT_RANGE_START + index * settings.PORT_BLOCK_SIZE
+        return NodeSpec(
+            name=name,
+            ports={"rest": 0, "tcp": base + 1, "websocket": base + 2, "discv5": base + 3, "metrics": base + 4},
+            external_ip=str(self._subnet.network_address + 10 + index),
+            bootstrap_from=bootstrap_from or [],
+            profile=get_profile(profile),
+            service_node=service_node
+        )
+
+    def start_waku_node(
+            self,
+            node_name: str,
+            ports: Dict[str, int],
+            external_ip: str,
+            bootstrap_node: Optional[List[str]] = None,
+            log_level: str = settings.NODE_LOG_LEVEL,
+            profile: Optional[NodeProfile] = None,
+            service_node: Optional[str] = None
+    ) -> FakeWakuNode:
+        """Start a fake node and connect it to its bootstrap and service nodes"""
+        node = FakeWakuNode(self.network, node_name, external_ip, ports, profile)
+        if service_node:
+            node.service_peer = self.network.nodes.get(service_node.rsplit("/p2p/", 1)[-1])
+            if node.service_peer is None:
+                raise RuntimeError(f"{node_name}: unknown service node {service_node}")
+        node.start()
+        with self._lock:
+            self.containers.append(node)
+
+        for enr_uri in bootstrap_node or []:
+            bootstrap = self.network.node_by_enr(enr_uri)
+            if bootstrap is None:
+                raise RuntimeError(f"{node_name}: unknown bootstrap ENR {enr_uri}")
+            self.network.connect(node, bootstrap)
+        if node.service_peer is not None:
+            self.network.connect(node, node.service_peer)
+
+        logger.info(f"Started fake node: {node_name} at {node.base_url}")
+        return node
+
+    def start_cluster(
+            self,
+            specs: List[NodeSpec],
+            max_workers: Optional[int] = None
+    ) -> Dict[str, ClusterNode]:
+        """Start several fake nodes in bootstrap dependency waves"""
+        return start_in_waves(specs, self._start_cluster_node, max_workers=max_workers)
+
+    def _start_cluster_node(
+            self,
+            spec: NodeSpec,
+            bootstrap_nodes: List[ClusterNode],
+            service_node: Optional[ClusterNode] = None
+    ) -> ClusterNode:
+        node = self.start_waku_node(
+            node_name=spec.name,
+            ports=spec.ports,
+            external_ip=spec.external_ip,
+            bootstrap_node=[bootstrap.enr_uri for bootstrap in bootstrap_nodes],
+            profile=spec.profile,
+            service_node=service_node.container.multiaddr if service_node else None
+        )
+        return ClusterNode(
+            spec=spec,
+            container=node,
+            client=WakuClient(node.base_url),
+            base_url=node.base_url,
+            enr_uri=node.enr_uri,
+            metrics_url=f"{node.base_url}/metrics",
+            peer_id=node.peer_id
+        )
+
+    def resource_sampler(self, capacity: int = 3600) -> ResourceSampler:
+        """Fake nodes have no container stats; the sampler records nothing"""
+        return ResourceSampler(list(self.containers), capacity=capacity)
+
+    def get_container(self, container_id: Optional[str]) -> Optional[FakeWakuNode]:
+        """Node started by this manager with the given id"""
+        return next((node for node in self.containers if node.id == container_id), None)
+
+    def _stop_nodes(self, nodes: List[FakeWakuNode]) -> Dict[str, Dict[str, Any]]:
+        """Stop nodes concurrently, like DockerManager.teardown; returns per-node stop times"""
+        report = {}
+        started = time.monotonic()
+
+        def stop(node: FakeWakuNode):
+            node.stop()
+            report[node.name] = {"stop_seconds": round(time.monotonic() - started, 3), "killed": False, "removed": True}
+
+        if nodes:
+            with ThreadPoolExecutor(max_workers=min(len(nodes), 32), thread_name_prefix="teardown") as executor:
+                list(executor.map(stop, nodes))
+        return report
+
+    def remove_nodes(self, nodes: Iterable[ClusterNode]) -> Dict[str, Dict[str, Any]]:
+        """Stop some nodes before cleanup, e.g. when a class fixture ends"""
+        containers = [node.container for node in nodes]
+        for container in containers:
+            if container.id in self.impairer.applied:
+                self.impairer.clear(container)
+        report = self._stop_nodes(containers)
+        with self._lock:
+            self.containers = [node for node in self.containers if node not in containers]
+        return report
+
+    def cleanup(self, force: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Stop all fake nodes and the relay scheduler; returns per-node stop times
+
+        ``force`` is accepted for parity with DockerManager; fake nodes are never kept warm.
+        """
+        self.impairer.clear_all()
+        report = self._stop_nodes(self.containers)
+        self.containers.clear()
+        self.network.close()
+        self.network = FakeWakuNetwork(
+            latency=self.network.latency,
+            jitter=self.network.jitter,
+            loss=self.network.loss
+        )
+        return report
@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import docker
+from docker.models.images import Image
+from docker.utils import parse_repository_tag
+from config.settings import settings
+from .timing import timings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ImageReport:
+    """Where the node image came from and how long getting it took"""
+
+    image: str
+    source: str  # "local", "cache" or "pull"
+    seconds: float
+    image_id: str = ""
+
+    def __str__(self) -> str:
+        return f"{self.image} from {self.source} in {self.seconds:.3f}s ({self.image_id[:19]})"
+
+
+def cache_path(image: str, cache_dir: str) -> Path:
+    """Tarball in ``cache_dir`` holding ``image``, as written by ``docker save``"""
+    return Path(cache_dir) / f"{image.replace('/', '_').replace(':', '_')}.tar"
+
+
+class ImageStage:
+    """Makes the node image available locally before any node starts
+
+    The image is looked up locally first (and checked against ``digest`` when
+    one is configured), then loaded from the tarball cache, and only then
+    pulled. ``start`` runs this in the background so it overlaps other session
+    setup; node starts call ``wait``. Time spent here is reported as its own
+    phase rather than as node start-up.
+    """
+
+    _stages: Dict[str, "ImageStage"] = {}
+    _stages_lock = threading.Lock()
+
+    def __init__(
+            self,
+            image: str = settings.DOCKER_IMAGE,
+            digest: str = settings.DOCKER_IMAGE_DIGEST,
+            cache_dir: str = settings.IMAGE_CACHE_DIR,
+            client: Optional[docker.DockerClient] = None
+    ):
+        self.image = image
+        self.digest = digest
+        self.cache_dir = cache_dir
+        self._client = client
+        self.report: Optional[ImageReport] = None
+        self.error: Optional[BaseException] = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def for_image(cls, image: str = settings.DOCKER_IMAGE) -> "ImageStage":
+        """The process-wide stage for ``image``, so the work happens once per session"""
+        with cls._stages_lock:
+            if image not in cls._stages:
+                # The configured digest pins the node image only
+                digest = settings.DOCKER_IMAGE_DIGEST if image == settings.DOCKER_IMAGE else ""
+                cls._stages[image] = cls(image, digest=digest)
+            return cls._stages[image]
+
+    @property
+    def client(self) -> docker.DockerClient:
+        if self._client is None:
+            self._client = docker.from_env()
+        return self._client
+
+    def _matches(self, image: Image) -> bool:
+        if not self.digest:
+            return True
+        repo_digests = image.attrs.get("RepoDigests") or []
+        return image.id == self.digest or any(entry.endswith(f"@{self.digest}") for entry in repo_digests)
+
+    def _local(self) -> Optional[Image]:
+        try:
+            image = self.client.images.get(self.image)
+        except docker.errors.ImageNotFound:
+            return None
+        if not self._matches(image):
+            logger.warning(f"Local {self.image} ({image.id[:19]}) does not match digest {self.digest}")
+            return None
+        return image
+
+    def _load_from_cache(self) -> Optional[Image]:
+        if not self.cache_dir:
+            return None
+        path = cache_path(self.image, self.cache_dir)
+        if not path.exists():
+            logger.info(f"No cached tarball for {self.image} at {path}")
+            return None
+        with open(path, "rb") as tarball:
+            self.client.images.load(tarball)
+        return self._local()
+
+    def _pull(self) -> Image:
+        repository, tag = parse_repository_tag(self.image)
+        if self.digest:
+            # Pull exactly the pinned image, then give it the configured tag
+            image = self.client.images.pull(f"{repository}@{self.digest}")
+            image.tag(repository, tag or "latest")
+        else:
+            image = self.client.images.pull(repository, tag=tag or "latest")
+        if not self._matches(image):
+            raise RuntimeError(f"Pulled {self.image} ({image.id[:19]}) does not match digest {self.digest}")
+        return image
+
+    def ensure(self) -> ImageReport:
+        """Make the image available now; local, then cache, then registry"""
+        with self._lock:
+            if self.report is not None:
+                return self.report
+
+            started = time.perf_counter()
+            source = "local"
+            image = self._local()
+            if image is None:
+                source = "cache"
+                image = self._load_from_cache()
+            if image is None:
+                source = "pull"
+                logger.info(f"Pulling {self.image}")
+                image = self._pull()
+
+            seconds = time.perf_counter() - started
+            timings.record(f"image.{source}", seconds)
+            self.report = ImageReport(self.image, source, seconds, image.id)
+            logger.info(f"Node image ready: {self.report}")
+            return self.report
+
+    def _run(self):
+        try:
+            self.ensure()
+        except Exception as e:
+            self.error = e
+            logger.error(f"Failed to make {self.image} available: {e}")
+        finally:
+            self._done.set()
+
+    def start(self) -> "ImageStage":
+        """Begin making the image available in the background"""
+        with self._lock:
+            if self._thread is None and self.report is None:
+                self._thread = threading.Thread(target=self._run, name="image-stage", daemon=True)
+                self._thread.start()
+        return self
+
+    def wait(self, timeout: float = settings.IMAGE_PULL_TIMEOUT) -> ImageReport:
+        """Block until the image is available, starting the stage if needed"""
+        if self._thread is None:
+            return self.ensure()
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self.image} not available after {timeout}s")
+        if self.error is not None:
+            raise RuntimeError(f"Node image {self.image} is not available: {self.error}") from self.error
+        return self.report
+
+    def save_to_cache(self) -> Path:
+        """Write the image to the tarball cache, e.g. to seed an air-gapped runner"""
+        if not self.cache_dir:
+            raise ValueError("IMAGE_CACHE_DIR is not set")
+        self.wait()
+        path = cache_path(self.image, self.cache_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        image = self.client.images.get(self.image)
+        with open(path, "wb") as tarball:
+            for chunk in image.save(named=True):
+                tarball.write(chunk)
+        logger.info(f"Saved {self.image} to {path}")
+        return path
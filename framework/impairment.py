@@ -0,0 +1,160 @@
+import logging
+import random
+import shlex
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import docker
+from docker.models.containers import Container
+from config.settings import settings
+from .images import ImageStage
+from .timing import phase
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Impairment:
+    """netem-style link conditions applied to a node's outgoing traffic
+
+    ``jitter_ms`` varies each packet's delay by up to that much either way;
+    ``rate_kbit`` caps bandwidth. Zero values leave that aspect untouched.
+    """
+
+    delay_ms: float = 0.0
+    jitter_ms: float = 0.0
+    loss_percent: float = 0.0
+    rate_kbit: Optional[int] = None
+
+    @property
+    def is_noop(self) -> bool:
+        return not (self.delay_ms or self.jitter_ms or self.loss_percent or self.rate_kbit)
+
+    def netem_args(self) -> List[str]:
+        args = []
+        if self.delay_ms or self.jitter_ms:
+            args += ["delay", f"{self.delay_ms}ms"]
+            if self.jitter_ms:
+                args.append(f"{self.jitter_ms}ms")
+        if self.loss_percent:
+            args += ["loss", f"{self.loss_percent}%"]
+        if self.rate_kbit:
+            args += ["rate", f"{self.rate_kbit}kbit"]
+        return args
+
+    def sample_delay(self, rng: random.Random) -> float:
+        """One packet's delay in seconds, as netem would draw it"""
+        return max(self.delay_ms + rng.uniform(-self.jitter_ms, self.jitter_ms), 0.0) / 1000
+
+    def __str__(self) -> str:
+        return " ".join(self.netem_args()) or "none"
+
+
+# Cross-region conditions from none to a poor intercontinental link
+SWEEP_LEVELS = (
+    Impairment(),
+    Impairment(delay_ms=25, jitter_ms=5),
+    Impairment(delay_ms=50, jitter_ms=10, loss_percent=0.5),
+    Impairment(delay_ms=100, jitter_ms=20, loss_percent=1),
+    Impairment(delay_ms=200, jitter_ms=50, loss_percent=3)
+)
+
+
+def _find_device(ip: str) -> str:
+    """Shell snippet setting ``DEV`` to the interface that holds ``ip``"""
+    return (
+        f"DEV=$(ip -o -4 addr show | awk '$4 ~ /^{ip.replace('.', '[.]')}\\// {{print $2}}' | cut -d@ -f1)\n"
+        f'[ -n "$DEV" ] || {{ echo "no interface with {ip}" >&2; exit 1; }}\n'
+    )
+
+
+def tc_script(ip: str, impairment: Optional[Impairment], peer_ips: Optional[Iterable[str]] = None) -> str:
+    """Shell script that replaces the egress qdisc of the interface holding ``ip``
+
+    Without ``peer_ips`` netem applies to all traffic leaving the interface.
+    With them, a prio qdisc sends only packets to those addresses through
+    netem, impairing just those links. ``None`` or a no-op impairment removes
+    any impairment.
+    """
+    script = "set -e\n" + _find_device(ip) + 'tc qdisc del dev "$DEV" root 2>/dev/null || true\n'
+    if impairment is None or impairment.is_noop:
+        return script
+
+    netem = " ".join(shlex.quote(arg) for arg in impairment.netem_args())
+    if not peer_ips:
+        return script + f'tc qdisc add dev "$DEV" root netem {netem}\n'
+
+    # Bands 1-3 keep the default priomap; band 4 only receives filtered traffic
+    script += 'tc qdisc add dev "$DEV" root handle 1: prio bands 4\n'
+    script += f'tc qdisc add dev "$DEV" parent 1:4 handle 40: netem {netem}\n'
+    for peer_ip in peer_ips:
+        script += f'tc filter add dev "$DEV" parent 1:0 protocol ip prio 1 u32 match ip dst {peer_ip}/32 flowid 1:4\n'
+    return script
+
+
+class NetworkImpairer:
+    """Applies and removes impairments on node containers through a sidecar
+
+    The sidecar runs ``tc`` in the node container's network namespace
+    (``network_mode=container:<id>`` with ``NET_ADMIN``), so the node image
+    needs neither ``tc`` nor extra privileges. Impairments can be changed or
+    removed at any point of a test; ``clear_all`` restores every container.
+    """
+
+    def __init__(
+            self,
+            client: docker.DockerClient,
+            network_name: str,
+            image: str = settings.IMPAIRMENT_IMAGE
+    ):
+        self.client = client
+        self.network_name = network_name
+        self.image = image
+        self.applied: Dict[str, Tuple[Container, Impairment]] = {}
+        self._lock = threading.Lock()
+
+    def _ip(self, container: Container) -> str:
+        container.reload()
+        networks = container.attrs.get("NetworkSettings", {}).get("Networks", {})
+        ip = networks.get(self.network_name, {}).get("IPAddress")
+        if not ip:
+            raise RuntimeError(f"{container.name} is not attached to {self.network_name}")
+        return ip
+
+    def _run(self, container: Container, script: str):
+        ImageStage.for_image(self.image).wait()
+        try:
+            self.client.containers.run(
+                self.image,
+                command=["sh", "-c", script],
+                network_mode=f"container:{container.id}",
+                cap_add=["NET_ADMIN"],
+                remove=True
+            )
+        except docker.errors.ContainerError as e:
+            raise RuntimeError(f"tc failed in {container.name}: {(e.stderr or b'').decode(errors='replace').strip()}") from e
+
+    def apply(self, container: Container, impairment: Impairment, peers: Optional[List[str]] = None):
+        """Impair traffic leaving ``container``, to every peer or only to the ``peers`` IPs"""
+        with phase("impairment.apply"):
+            self._run(container, tc_script(self._ip(container), impairment, peers))
+        with self._lock:
+            self.applied[container.id] = (container, impairment)
+        logger.info(f"Impaired {container.name}: {impairment}" + (f" towards {peers}" if peers else ""))
+
+    def clear(self, container: Container):
+        with phase("impairment.clear"):
+            self._run(container, tc_script(self._ip(container), None))
+        with self._lock:
+            self.applied.pop(container.id, None)
+        logger.info(f"Cleared impairment of {container.name}")
+
+    def clear_all(self):
+        with self._lock:
+            containers = [container for container, _ in self.applied.values()]
+        for container in containers:
+            try:
+                self.clear(container)
+            except Exception as e:
+                logger.warning(f"Failed to clear impairment of {container.name}: {e}")
@@ -0,0 +1,253 @@
+import gzip
+import logging
+import re
+import threading
+import time
+import zlib
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from docker.models.containers import Container
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# nwaku (chronicles) level prefixes, in increasing severity
+LEVELS = ["TRC", "DBG", "INF", "NTC", "WRN", "ERR", "FAT"]
+LEVEL_NAMES = {
+    "TRACE": "TRC", "DEBUG": "DBG", "INFO": "INF", "NOTICE": "NTC",
+    "WARN": "WRN", "WARNING": "WRN", "ERROR": "ERR", "FATAL": "FAT"
+}
+UNKNOWN_LEVEL = 255
+
+FIELD_PATTERNS = {
+    "topic": re.compile(r'\btopic="([^"]+)"'),
+    "peer_id": re.compile(r'\b(?:peerId|peer_id|peer)=(16U\w+)'),
+    "msg_hash": re.compile(r'\b(?:msg_hash|msgHash|message_hash|hash)=(0x[0-9a-fA-F]+)')
+}
+LEVEL_PATTERN = re.compile(r'\b(TRC|DBG|INF|NTC|WRN|ERR|FAT)\b')
+
+
+def level_code(level: str) -> int:
+    """Numeric severity of a level name such as "INFO" or "INF" """
+    level = LEVEL_NAMES.get(level.upper(), level.upper())
+    return LEVELS.index(level) if level in LEVELS else 0
+
+
+def _parse_docker_timestamp(value: str) -> float:
+    # Docker prints RFC 3339 with nanoseconds; datetime handles microseconds
+    value = value.rstrip("Z")
+    if "." in value:
+        head, fraction = value.split(".", 1)
+        value = f"{head}.{fraction[:6]}"
+    try:
+        return datetime.fromisoformat(value + "+00:00").timestamp()
+    except ValueError:
+        return time.time()
+
+
+class LogIndex:
+    """Per-line index of a captured log: timestamp, level and structured fields
+
+    Only line numbers are kept in memory; the text itself lives in the
+    compressed file on disk.
+    """
+
+    def __init__(self):
+        self.timestamps = array('d')
+        self.levels = array('B')
+        self.fields: Dict[str, Dict[str, array]] = {name: {} for name in FIELD_PATTERNS}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def add(self, timestamp: float, text: str):
+        line_number = len(self.timestamps)
+        self.timestamps.append(timestamp)
+        match = LEVEL_PATTERN.search(text, 0, 40)
+        self.levels.append(LEVELS.index(match.group(1)) if match else UNKNOWN_LEVEL)
+        for name, pattern in FIELD_PATTERNS.items():
+            for value in pattern.findall(text):
+                self.fields[name].setdefault(value, array('I')).append(line_number)
+
+    def select(
+            self,
+            start: Optional[float] = None,
+            end: Optional[float] = None,
+            min_level: Optional[str] = None,
+            **fields: str
+    ) -> List[int]:
+        """Line numbers matching a time window, minimum level and field values"""
+        if fields:
+            candidates = None
+            for name, value in fields.items():
+                lines = set(self.fields.get(name, {}).get(value, ()))
+                candidates = lines if candidates is None else candidates & lines
+            line_numbers = sorted(candidates or ())
+        else:
+            line_numbers = range(len(self.timestamps))
+
+        minimum = level_code(min_level) if min_level else None
+        selected = []
+        for line_number in line_numbers:
+            timestamp = self.timestamps[line_number]
+            if start is not None and timestamp < start:
+                continue
+            if end is not None and timestamp > end:
+                continue
+            level = self.levels[line_number]
+            if minimum is not None and (level == UNKNOWN_LEVEL or level < minimum):
+                continue
+            selected.append(line_number)
+        return selected
+
+
+class NodeLog:
+    """One container's log streamed into a gzip file with a line index"""
+
+    def __init__(self, node_name: str, path: Path):
+        self.node_name = node_name
+        self.path = path
+        self.index = LogIndex()
+        self._file = gzip.open(path, "wb", compresslevel=3)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stream = None
+        self._stopping = threading.Event()
+
+    def _write(self, raw_line: bytes):
+        text = raw_line.decode(errors="replace").rstrip("\n")
+        timestamp_text, _, message = text.partition(" ")
+        with self._lock:
+            if self._file.closed:
+                return
+            self.index.add(_parse_docker_timestamp(timestamp_text), message)
+            self._file.write(message.encode() + b"\n")
+
+    def follow(self, container: Container):
+        def run():
+            pending = b""
+            try:
+                self._stream = container.logs(stream=True, follow=True, timestamps=True)
+                if self._stopping.is_set():
+                    return
+                for chunk in self._stream:
+                    pending += chunk
+                    *lines, pending = pending.split(b"\n")
+                    for line in lines:
+                        self._write(line)
+                if pending:
+                    self._write(pending)
+            except Exception as e:
+                # Closing the stream in stop() ends the loop with an error as well
+                if not self._stopping.is_set():
+                    logger.warning(f"Log stream for {self.node_name} ended: {e}")
+            finally:
+                self.close()
+
+        self._thread = threading.Thread(target=run, name=f"logs-{self.node_name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """End the log stream, wait for its thread and close the file"""
+        self._stopping.set()
+        stream = self._stream
+        if stream is not None and hasattr(stream, "close"):
+            try:
+                stream.close()
+            except Exception as e:
+                logger.debug(f"Closing log stream of {self.node_name} failed: {e}")
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning(f"Log stream thread of {self.node_name} did not stop within {timeout}s")
+        self.close()
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def read_lines(self, line_numbers: List[int]) -> Iterator[str]:
+        """Stream the given lines back from the compressed file"""
+        self.flush()
+        wanted = iter(line_numbers)
+        target = next(wanted, None)
+        if target is None:
+            return
+
+        # Decompress incrementally; the file may still be open for writing
+        decompressor = zlib.decompressobj(wbits=31)
+        pending = b""
+        line_number = 0
+        with open(self.path, "rb") as raw:
+            while True:
+                chunk = raw.read(65536)
+                if not chunk:
+                    return
+                pending += decompressor.decompress(chunk)
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    if line_number == target:
+                        yield line.decode(errors="replace")
+                        target = next(wanted, None)
+                        if target is None:
+                            return
+                    line_number += 1
+
+
+class LogCapture:
+    """Streams the logs of node containers to compressed files while tests run"""
+
+    def __init__(self, output_dir: str = settings.LOG_DIR):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.logs: Dict[str, NodeLog] = {}
+
+    def follow(self, node_name: str, container: Container) -> Optional[NodeLog]:
+        """Start streaming a container's logs; nodes without Docker logs are skipped"""
+        if not hasattr(container, "logs"):
+            logger.info(f"{node_name} has no Docker logs, not capturing them")
+            return None
+
+        previous = self.logs.get(node_name)
+        if previous is not None:
+            previous.stop()
+
+        path = self.output_dir / f"{node_name}-{container.short_id}-{int(time.time())}.log.gz"
+        node_log = NodeLog(node_name, path)
+        node_log.follow(container)
+        self.logs[node_name] = node_log
+        logger.info(f"Capturing logs of {node_name} to {path}")
+        return node_log
+
+    def slice(
+            self,
+            node_name: str,
+            start: Optional[float] = None,
+            end: Optional[float] = None,
+            min_level: Optional[str] = None,
+            max_lines: int = settings.LOG_ATTACH_MAX_LINES,
+            **fields: str
+    ) -> str:
+        """Text of the matching lines of one node, keeping the last ``max_lines``"""
+        node_log = self.logs[node_name]
+        line_numbers = node_log.index.select(start, end, min_level, **fields)[-max_lines:]
+        return "\n".join(node_log.read_lines(line_numbers))
+
+    def unfollow(self, node_name: str):
+        """Stop capturing a node that is going away; its log is no longer sliced"""
+        node_log = self.logs.pop(node_name, None)
+        if node_log is not None:
+            node_log.stop()
+
+    def close(self):
+        for node_log in self.logs.values():
+            node_log.stop()
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from config.settings import settings
+from .buffers import TimeSeriesBuffer
+
+logger = logging.getLogger(__name__)
+
+# Latest value of every selected series per node: {node: {series: value}}
+MetricsSnapshot = Dict[str, Dict[str, float]]
+
+
+def parse_prometheus_text(lines: Iterable[str]) -> Iterator[Tuple[str, str, float]]:
+    """Parse Prometheus text exposition lines into ``(name, series, value)`` tuples
+
+    ``series`` is the metric name with its label set, e.g.
+    ``libp2p_network_bytes_total{direction="in"}``. Lines are consumed one at a
+    time, so a large scrape is never held in memory.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        brace = line.find("{")
+        space = line.find(" ")
+        try:
+            if brace != -1 and (space == -1 or brace < space):
+                close = line.rfind("}")
+                name = line[:brace]
+                series = line[:close + 1]
+                value = line[close + 1:].split()[0]
+            else:
+                name, value = line.split()[:2]
+                series = name
+            yield name, series, float(value)
+        except (IndexError, ValueError):
+            logger.debug(f"Skipping unparsable metrics line: {line}")
+
+
+def _selected(name: str, prefixes: List[str]) -> bool:
+    # Histograms and summaries expose <name>_bucket, <name>_sum and <name>_count
+    return any(name == prefix or name.startswith(prefix + "_") for prefix in prefixes)
+
+
+class MetricsCollector:
+    """Scrapes the metrics endpoint of every node on a fixed cadence in the background
+
+    Only the metric families listed in ``series`` are kept, each series in a
+    fixed-size :class:`TimeSeriesBuffer` per node.
+    """
+
+    def __init__(
+            self,
+            series: Optional[List[str]] = None,
+            interval: float = settings.METRICS_SCRAPE_INTERVAL,
+            capacity: int = 3600
+    ):
+        self.series = series or settings.METRICS_SERIES
+        self.interval = interval
+        self.capacity = capacity
+        self.targets: Dict[str, str] = {}
+        self.buffers: Dict[str, Dict[str, TimeSeriesBuffer]] = {}
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="metrics")
+
+    def add_target(self, node_name: str, metrics_url: str):
+        with self._lock:
+            self.targets[node_name] = metrics_url
+            self.buffers.setdefault(node_name, {})
+
+    def remove_target(self, node_name: str):
+        with self._lock:
+            self.targets.pop(node_name, None)
+
+    def _scrape_node(self, node_name: str, url: str, timestamp: float) -> Dict[str, float]:
+        values: Dict[str, float] = {}
+        try:
+            with requests.get(url, stream=True, timeout=max(self.interval, 2)) as response:
+                response.raise_for_status()
+                for name, series, value in parse_prometheus_text(response.iter_lines(decode_unicode=True)):
+                    if _selected(name, self.series):
+                        values[series] = value
+        except requests.RequestException as e:
+            logger.debug(f"Scraping {node_name} at {url} failed: {e}")
+            return values
+
+        with self._lock:
+            buffers = self.buffers.setdefault(node_name, {})
+            for series, value in values.items():
+                if series not in buffers:
+                    buffers[series] = TimeSeriesBuffer(self.capacity)
+                buffers[series].append(timestamp, value)
+        return values
+
+    def scrape_now(self) -> MetricsSnapshot:
+        """Scrape every node once, concurrently, and return the values read"""
+        timestamp = time.time()
+        with self._lock:
+            targets = dict(self.targets)
+        futures = {
+            name: self._executor.submit(self._scrape_node, name, url, timestamp)
+            for name, url in targets.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            self.scrape_now()
+            next_tick += self.interval
+            self._stop.wait(max(next_tick - time.monotonic(), 0))
+
+    def start(self) -> "MetricsCollector":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-collector", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        self._executor.shutdown(wait=True)
+
+    @staticmethod
+    def delta(before: MetricsSnapshot, after: MetricsSnapshot) -> MetricsSnapshot:
+        """Change of every series between two snapshots, e.g. messages relayed during a test"""
+        return {
+            node: {
+                series: value - before.get(node, {}).get(series, 0.0)
+                for series, value in values.items()
+            }
+            for node, values in after.items()
+        }
+
+    def series_summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Min/mean/max/last of every buffered series per node"""
+        with self._lock:
+            return {
+                node: {series: buffer.summary() for series, buffer in buffers.items()}
+                for node, buffers in self.buffers.items()
+            }
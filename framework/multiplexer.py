@@ -0,0 +1,307 @@
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from config.settings import settings
+from .decoding import WakuMessage
+from .waku_client import WakuClient
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("block", "drop")
+
+# How a node receives messages: relay subscriptions or, on light nodes, filter
+RECEIVE_PROTOCOLS = ("relay", "filter")
+
+MessageCallback = Callable[[WakuMessage], Any]
+
+
+class Subscription:
+    """One consumer's view of the messages of a set of content topics on one node
+
+    Messages land in a bounded queue, or are handed to ``callback`` on the
+    node's drain thread. With the ``block`` policy a full queue (or a slow
+    callback) stalls that node's drain loop, so unread messages wait in the
+    node's relay cache; with ``drop`` the newest messages are discarded and
+    counted instead.
+    """
+
+    def __init__(
+            self,
+            multiplexer: "NodeMultiplexer",
+            content_topics: Iterable[str],
+            callback: Optional[MessageCallback] = None,
+            maxsize: int = settings.MULTIPLEXER_QUEUE_SIZE,
+            overflow: str = "block"
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}', expected one of {OVERFLOW_POLICIES}")
+        self.multiplexer = multiplexer
+        self.content_topics: FrozenSet[str] = frozenset(content_topics)
+        self.callback = callback
+        self.overflow = overflow
+        self.queue: "queue.Queue[WakuMessage]" = queue.Queue(maxsize)
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.closed = threading.Event()
+
+    def _dispatch(self, message: WakuMessage, stop: threading.Event):
+        if self.callback is not None:
+            try:
+                self.callback(message)
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Subscription callback failed on {self.multiplexer.name}: {e}")
+            return
+
+        if self.overflow == "drop":
+            try:
+                self.queue.put_nowait(message)
+                self.delivered += 1
+            except queue.Full:
+                self.dropped += 1
+            return
+
+        # Block, but give up if the consumer goes away or the multiplexer stops
+        while not (self.closed.is_set() or stop.is_set()):
+            try:
+                self.queue.put(message, timeout=0.1)
+                self.delivered += 1
+                return
+            except queue.Full:
+                continue
+        self.dropped += 1
+
+    def get(self, timeout: Optional[float] = None) -> Optional[WakuMessage]:
+        """Next message, or None if none arrives within ``timeout``"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self) -> List[WakuMessage]:
+        """All messages queued so far, without waiting"""
+        messages = []
+        while True:
+            try:
+                messages.append(self.queue.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def __iter__(self) -> Iterator[WakuMessage]:
+        """Messages as they arrive, until the subscription is closed"""
+        while not self.closed.is_set() or not self.queue.empty():
+            message = self.get(timeout=0.1)
+            if message is not None:
+                yield message
+
+    def close(self):
+        self.multiplexer.unsubscribe(self)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "content_topics": sorted(self.content_topics),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "queued": self.queue.qsize()
+        }
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class NodeMultiplexer:
+    """Single drain loop for one node, fanning its messages out to subscriptions
+
+    Every ``poll_interval`` the loop calls ``get_messages`` once per content
+    topic that any subscription wants, and dispatches each message exactly
+    once to every subscription of that topic. Node requests therefore do not
+    grow with the number of consumers. New topics are subscribed on the node
+    the first time a consumer asks for them, through relay or, with
+    ``protocol="filter"``, on the light node's filter service node.
+    """
+
+    def __init__(
+            self,
+            base_url: str,
+            name: Optional[str] = None,
+            poll_interval: float = settings.MULTIPLEXER_POLL_INTERVAL,
+            subscribe_node: bool = True,
+            protocol: str = "relay"
+    ):
+        if protocol not in RECEIVE_PROTOCOLS:
+            raise ValueError(f"Unknown receive protocol '{protocol}', expected one of {RECEIVE_PROTOCOLS}")
+        self.base_url = base_url
+        self.name = name or base_url
+        self.poll_interval = poll_interval
+        self.subscribe_node = subscribe_node
+        self.protocol = protocol
+        self.client = WakuClient(base_url)
+        self._fetch = self.client.get_filter_messages if protocol == "filter" else self.client.get_messages
+        self.subscriptions: List[Subscription] = []
+        self.requests = 0
+        self.messages = 0
+        self.cycles = 0
+
+        self._topics: Dict[str, List[Subscription]] = {}
+        self._node_topics: set = set()
+        self._lock = threading.Lock()
+        self._cycle = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(
+            self,
+            content_topics: Iterable[str],
+            callback: Optional[MessageCallback] = None,
+            maxsize: int = settings.MULTIPLEXER_QUEUE_SIZE,
+            overflow: str = "block"
+    ) -> Subscription:
+        """Register a consumer and start the drain loop if it is not running"""
+        subscription = Subscription(self, content_topics, callback, maxsize, overflow)
+        new_topics = [topic for topic in subscription.content_topics if topic not in self._node_topics]
+        if new_topics and self.subscribe_node:
+            # The drain loop owns ``self.client``'s session, so use a separate one here
+            client = WakuClient(self.base_url)
+            if self.protocol == "filter":
+                client.filter_subscribe(new_topics)
+            else:
+                client.subscribe_to_topic(new_topics)
+
+        with self._lock:
+            self._node_topics.update(new_topics)
+            self.subscriptions.append(subscription)
+            # Copy on write, so the drain loop iterates without holding the lock
+            topics = {topic: list(consumers) for topic, consumers in self._topics.items()}
+            for topic in subscription.content_topics:
+                topics.setdefault(topic, []).append(subscription)
+            self._topics = topics
+        self.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.closed.set()
+        with self._lock:
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
+            # Topics stay subscribed on the node but are no longer polled once nobody wants them
+            topics = {}
+            for topic, consumers in self._topics.items():
+                remaining = [consumer for consumer in consumers if consumer is not subscription]
+                if remaining:
+                    topics[topic] = remaining
+            self._topics = topics
+
+    def poll(self) -> int:
+        """Drain every wanted topic once and dispatch the messages; returns the count"""
+        dispatched = 0
+        for topic, consumers in self._topics.items():
+            try:
+                messages = self._fetch(topic)
+            except Exception as e:
+                logger.debug(f"Draining {topic} from {self.name} failed: {e}")
+                continue
+            finally:
+                self.requests += 1
+
+            for message in messages:
+                for consumer in consumers:
+                    if not consumer.closed.is_set():
+                        consumer._dispatch(message, self._stop)
+            dispatched += len(messages)
+
+        self.messages += dispatched
+        with self._cycle:
+            self.cycles += 1
+            self._cycle.notify_all()
+        return dispatched
+
+    def sync(self, timeout: float = settings.MESSAGE_PROPAGATION_TIMEOUT) -> bool:
+        """Wait until a full drain cycle has started and finished after this call"""
+        with self._cycle:
+            target = self.cycles + 2
+            return self._cycle.wait_for(lambda: self.cycles >= target or self._stop.is_set(), timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.poll():
+                self._stop.wait(self.poll_interval)
+
+    def start(self) -> "NodeMultiplexer":
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=f"mux-{self.name}", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._cycle:
+            self._cycle.notify_all()
+        for subscription in list(self.subscriptions):
+            subscription.closed.set()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "protocol": self.protocol,
+            "requests": self.requests,
+            "messages": self.messages,
+            "cycles": self.cycles,
+            "subscriptions": [subscription.summary() for subscription in self.subscriptions]
+        }
+
+
+class MessageMultiplexer:
+    """One :class:`NodeMultiplexer` per node and receive protocol, created on first use"""
+
+    def __init__(self, poll_interval: float = settings.MULTIPLEXER_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.nodes: Dict[Tuple[str, str], NodeMultiplexer] = {}
+        self._lock = threading.Lock()
+
+    def node(self, base_url: str, name: Optional[str] = None, protocol: str = "relay") -> NodeMultiplexer:
+        with self._lock:
+            key = (base_url, protocol)
+            if key not in self.nodes:
+                self.nodes[key] = NodeMultiplexer(base_url, name, self.poll_interval, protocol=protocol)
+            return self.nodes[key]
+
+    def subscribe(
+            self,
+            base_url: str,
+            content_topics: Iterable[str],
+            protocol: str = "relay",
+            **kwargs
+    ) -> Subscription:
+        """Subscribe to a node's messages; takes the options of :meth:`NodeMultiplexer.subscribe`"""
+        return self.node(base_url, protocol=protocol).subscribe(content_topics, **kwargs)
+
+    def requests(self) -> int:
+        return sum(node.requests for node in self.nodes.values())
+
+    def stop(self):
+        for node in self.nodes.values():
+            node.stop()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            node.name if node.protocol == "relay" else f"{node.name} ({node.protocol})": node.summary()
+            for node in self.nodes.values()
+        }
+
+    def __enter__(self) -> "MessageMultiplexer":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
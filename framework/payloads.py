@@ -0,0 +1,69 @@
+import base64
+import json
+import logging
+import os
+import struct
+from typing import Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Raw payloads are base64-encoded exactly once, straight into the request body
+BinaryPayload = Union[bytes, bytearray, memoryview]
+Payload = Union[str, BinaryPayload]
+
+SIZE_SWEEP = (16, 256, 1024, 4096, 16384, 65536, 131072, 262144, 524288, 1048576)
+
+
+def encode_message_body(payload: Payload, content_topic: str, timestamp: Optional[int] = None) -> bytes:
+    """JSON body of a relay publish request
+
+    ``str`` payloads are sent as given (normally base64 already) and escaped
+    like any JSON string; bytes-like payloads are base64-encoded here, without
+    intermediate ``str`` copies, and need no escaping.
+    """
+    if isinstance(payload, str):
+        encoded = json.dumps(payload).encode()
+    else:
+        encoded = b'"' + base64.b64encode(payload) + b'"'
+
+    parts = [b'{"payload":', encoded, b',"contentTopic":', json.dumps(content_topic).encode()]
+    if timestamp:
+        parts.append(b',"timestamp":%d' % timestamp)
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+def encode_lightpush_body(
+        payload: Payload,
+        content_topic: str,
+        pubsub_topic: str = "",
+        timestamp: Optional[int] = None
+) -> bytes:
+    """JSON body of a lightpush request: the relay message wrapped with its pubsub topic"""
+    message = encode_message_body(payload, content_topic, timestamp)
+    if not pubsub_topic:
+        return b'{"message":' + message + b"}"
+    return b'{"pubsubTopic":' + json.dumps(pubsub_topic).encode() + b',"message":' + message + b"}"
+
+
+def payload_size(payload: Payload) -> int:
+    """Raw size in bytes of a payload, decoding nothing"""
+    if isinstance(payload, str):
+        return len(payload) * 3 // 4 - payload[-2:].count("=")
+    return memoryview(payload).nbytes
+
+
+def sized_payloads(size: int, count: Optional[int] = None, seed: Optional[bytes] = None) -> Iterator[bytes]:
+    """Generate distinct raw payloads of ``size`` bytes, endlessly unless ``count`` is given
+
+    Relay drops repeated messages, so each payload starts with its sequence
+    number; the rest is random filler generated once.
+    """
+    buffer = bytearray(seed or os.urandom(size))
+    buffer = (buffer * (size // max(len(buffer), 1) + 1))[:size]
+    header = min(size, 8)
+    sequence = 0
+    while count is None or sequence < count:
+        buffer[:header] = struct.pack(">Q", sequence)[8 - header:]
+        yield bytes(buffer)
+        sequence += 1
@@ -0,0 +1,310 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import allure
+import requests
+from config.settings import settings
+from .decoding import loads
+from .utils import WaitResult, wait_until
+from .waku_client import WakuClient
+
+logger = logging.getLogger(__name__)
+
+RELAY_PROTOCOL_PREFIX = "/vac/waku/relay/"
+
+
+@dataclass
+class ChurnEvent:
+    """A peer connection appearing or disappearing in one node's view"""
+
+    elapsed: float
+    node: str
+    peer: str
+    connected: bool
+
+
+def connected_peer_ids(peers: List[Dict[str, Any]]) -> Set[str]:
+    """Peer IDs of the currently connected entries of an ``/admin/v1/peers`` response"""
+    peer_ids = set()
+    for peer in peers:
+        multiaddr = peer.get("multiaddr", "")
+        if "/p2p/" not in multiaddr:
+            continue
+        # nwaku lists every known peer; connection state is kept per protocol
+        protocols = peer.get("protocols")
+        if protocols and not any(protocol.get("connected") for protocol in protocols):
+            continue
+        if peer.get("connected") is False:
+            continue
+        peer_ids.add(multiaddr.rsplit("/p2p/", 1)[1])
+    return peer_ids
+
+
+def relay_peer_count(peers: List[Dict[str, Any]]) -> int:
+    """Number of entries of an ``/admin/v1/peers`` response connected over relay"""
+    return sum(
+        1 for peer in peers
+        if any(
+            protocol.get("protocol", "").startswith(RELAY_PROTOCOL_PREFIX) and protocol.get("connected", True)
+            for protocol in peer.get("protocols") or []
+        )
+    )
+
+
+def wait_for_relay_mesh(
+        base_urls: List[str],
+        min_peers: int = 1,
+        timeout: float = settings.PEER_CONNECTION_TIMEOUT,
+        settle: float = settings.RELAY_MESH_SETTLE_TIME
+) -> WaitResult:
+    """Wait until every node has relay peers, then give gossipsub time to build its mesh
+
+    Subscribing joins a topic, but peers are grafted into the topic's mesh
+    only on later gossipsub heartbeats; messages published before that can
+    be lost. Call this after subscribing and before publishing.
+    """
+    sessions = {base_url.rstrip("/"): requests.Session() for base_url in base_urls}
+
+    def relay_peers(base_url: str) -> int:
+        response = sessions[base_url].get(f"{base_url}{settings.PEERS_ENDPOINT}", timeout=settings.HTTP_TIMEOUT)
+        response.raise_for_status()
+        return relay_peer_count(loads(response.content))
+
+    try:
+        result = wait_until(
+            lambda: all(relay_peers(base_url) >= min_peers for base_url in sessions),
+            timeout=timeout,
+            description=f"relay peers on {len(sessions)} nodes",
+            initial_interval=0.05,
+            max_interval=settings.PEER_MONITOR_INTERVAL
+        )
+    finally:
+        for session in sessions.values():
+            session.close()
+    if result:
+        time.sleep(settle)
+    return result
+
+
+class PeerGraphMonitor:
+    """Follows peer discovery across a cluster as an incrementally updated graph
+
+    Every ``interval`` the peer list of every node is fetched concurrently and
+    diffed against that node's previous view; only the changed edges are
+    applied to the adjacency sets. The graph is undirected and an edge stays
+    while at least one side reports it. The cluster counts as converged once
+    every node has ``min_peers`` peers and all nodes form one component.
+    """
+
+    def __init__(
+            self,
+            nodes: Dict[str, str],
+            interval: float = settings.PEER_MONITOR_INTERVAL,
+            min_peers: int = 1,
+            since: Optional[float] = None
+    ):
+        self.nodes = nodes
+        self.interval = interval
+        self.min_peers = min_peers
+        # Milestones are measured from ``since`` (a time.monotonic() reading), e.g. cluster start
+        self.since = since
+
+        self.views: Dict[str, Set[str]] = {name: set() for name in nodes}
+        self.adjacency: Dict[str, Set[str]] = {name: set() for name in nodes}
+        self.events: List[ChurnEvent] = []
+        self.first_peer: Dict[str, float] = {}
+        self.converged_at: Optional[float] = None
+        self.polls = 0
+
+        self._names: Dict[str, str] = {}
+        self._edge_reports: Counter = Counter()
+        self._converged = threading.Event()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sessions = {name: requests.Session() for name in nodes}
+        self._executor = ThreadPoolExecutor(max_workers=min(len(nodes), 32) or 1, thread_name_prefix="peers")
+
+    def _elapsed(self) -> float:
+        return time.monotonic() - self.since
+
+    def _identify(self):
+        """Learn each node's peer ID so peers can be reported by node name"""
+        def identify(item: Tuple[str, str]) -> Tuple[str, str]:
+            name, base_url = item
+            return WakuClient(base_url).get_peer_id(), name
+
+        for peer_id, name in self._executor.map(identify, self.nodes.items()):
+            if peer_id:
+                self._names[peer_id] = name
+
+    def _fetch(self, name: str) -> Optional[Set[str]]:
+        url = f"{self.nodes[name].rstrip('/')}{settings.PEERS_ENDPOINT}"
+        try:
+            response = self._sessions[name].get(url, timeout=max(self.interval, 2))
+            response.raise_for_status()
+            return {self._names.get(peer_id, peer_id) for peer_id in connected_peer_ids(loads(response.content))}
+        except (requests.RequestException, ValueError) as e:
+            logger.debug(f"Fetching peers of {name} failed: {e}")
+            return None
+
+    def _link(self, a: str, b: str, connected: bool) -> bool:
+        """Count one side's report of an edge; True when the edge itself changed"""
+        edge = (a, b) if a < b else (b, a)
+        if connected:
+            self._edge_reports[edge] += 1
+            if self._edge_reports[edge] > 1:
+                return False
+            self.adjacency.setdefault(a, set()).add(b)
+            self.adjacency.setdefault(b, set()).add(a)
+        else:
+            self._edge_reports[edge] -= 1
+            if self._edge_reports[edge] > 0:
+                return False
+            del self._edge_reports[edge]
+            self.adjacency[a].discard(b)
+            self.adjacency[b].discard(a)
+        return True
+
+    def _apply(self, name: str, view: Set[str], elapsed: float) -> bool:
+        previous = self.views[name]
+        added, removed = view - previous, previous - view
+        self.views[name] = view
+
+        changed = False
+        for peer in added:
+            self.events.append(ChurnEvent(elapsed, name, peer, True))
+            changed |= self._link(name, peer, True)
+        for peer in removed:
+            self.events.append(ChurnEvent(elapsed, name, peer, False))
+            changed |= self._link(name, peer, False)
+
+        if view and name not in self.first_peer:
+            self.first_peer[name] = elapsed
+        return changed
+
+    def poll(self) -> bool:
+        """Fetch every node's peers once and apply the differences; returns convergence"""
+        futures = {name: self._executor.submit(self._fetch, name) for name in self.nodes}
+        views = {name: future.result() for name, future in futures.items()}
+        elapsed = self._elapsed()
+
+        with self._lock:
+            self.polls += 1
+            changed = False
+            for name, view in views.items():
+                if view is not None:
+                    changed |= self._apply(name, view, elapsed)
+
+            # Degrees can only reach min_peers through an edge change, so skip the check otherwise
+            converged = self._is_converged() if changed else self._converged.is_set()
+            if converged and self.converged_at is None:
+                self.converged_at = elapsed
+                logger.info(f"Peer graph of {len(self.nodes)} nodes converged after {elapsed:.3f}s")
+            if converged:
+                self._converged.set()
+            else:
+                self._converged.clear()
+        return converged
+
+    def _component(self, start: str) -> Dict[str, int]:
+        """Hop distance from ``start`` to every monitored node it can reach"""
+        distances = {start: 0}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for neighbour in self.adjacency.get(node, ()):
+                if neighbour in self.nodes and neighbour not in distances:
+                    distances[neighbour] = distances[node] + 1
+                    queue.append(neighbour)
+        return distances
+
+    def _is_converged(self) -> bool:
+        if any(len(self.adjacency[name]) < self.min_peers for name in self.nodes):
+            return False
+        return len(self._component(next(iter(self.nodes)))) == len(self.nodes)
+
+    def diameter(self) -> Optional[int]:
+        """Longest shortest path between monitored nodes, or None while disconnected"""
+        with self._lock:
+            longest = 0
+            for name in self.nodes:
+                distances = self._component(name)
+                if len(distances) < len(self.nodes):
+                    return None
+                longest = max(longest, max(distances.values()))
+            return longest
+
+    def degree_distribution(self) -> Dict[int, int]:
+        """Number of monitored nodes per peer count"""
+        with self._lock:
+            return dict(sorted(Counter(len(self.adjacency[name]) for name in self.nodes).items()))
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            self.poll()
+            next_tick += self.interval
+            self._stop.wait(max(next_tick - time.monotonic(), 0))
+
+    def start(self) -> "PeerGraphMonitor":
+        if self.since is None:
+            self.since = time.monotonic()
+        self._identify()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="peer-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait_for_convergence(self, timeout: float = settings.PEER_CONNECTION_TIMEOUT) -> bool:
+        return self._converged.wait(timeout)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=True)
+        for session in self._sessions.values():
+            session.close()
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            converged_at = self.converged_at
+            connects = sum(1 for event in self.events if event.connected)
+            disconnects = len(self.events) - connects
+            after_convergence = sum(
+                1 for event in self.events if converged_at is not None and event.elapsed > converged_at
+            )
+            first_peer = dict(self.first_peer)
+
+        return {
+            "nodes": len(self.nodes),
+            "polls": self.polls,
+            "time_to_first_peer_s": {name: round(elapsed, 3) for name, elapsed in first_peer.items()},
+            "max_time_to_first_peer_s": round(max(first_peer.values()), 3) if len(first_peer) == len(self.nodes) else None,
+            "time_to_convergence_s": round(converged_at, 3) if converged_at is not None else None,
+            "diameter": self.diameter(),
+            "degree_distribution": self.degree_distribution(),
+            "churn": {
+                "connects": connects,
+                "disconnects": disconnects,
+                "events_after_convergence": after_convergence
+            }
+        }
+
+    def attach_to_allure(self, name: str = "Peer graph convergence"):
+        allure.attach(json.dumps(self.summary(), indent=2), name, allure.attachment_type.JSON)
+
+    def __enter__(self) -> "PeerGraphMonitor":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,85 @@
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from config.settings import settings
+
+
+@dataclass(frozen=True)
+class NodeProfile:
+    """Node flags that vary between test scenarios
+
+    ``store_retention`` is an nwaku retention policy such as ``capacity:100000``
+    (messages kept) or ``time:3600`` (seconds kept). ``lightpush`` and
+    ``filter`` serve those protocols to light nodes; a light node turns
+    ``relay`` off and is pointed at its service node through
+    ``NodeSpec.service_node``. ``extra_args`` are appended to the command line
+    as given.
+    """
+
+    relay_cache_capacity: int = 100
+    relay: bool = True
+    store: bool = False
+    store_retention: str = "capacity:100000"
+    lightpush: bool = False
+    filter: bool = False
+    extra_args: Tuple[str, ...] = ()
+
+    def args(self, service_node: Optional[str] = None) -> List[str]:
+        """Command line flags; ``service_node`` is the multiaddr of a light node's service node"""
+        args = [f"--relay={str(self.relay).lower()}"]
+        if self.relay:
+            args.append(f"--rest-relay-cache-capacity={self.relay_cache_capacity}")
+        if self.store:
+            args += ["--store=true", f"--store-message-retention-policy={self.store_retention}"]
+        if self.lightpush:
+            args.append("--lightpush=true")
+        if self.filter:
+            args.append("--filter=true")
+        if service_node:
+            args += [f"--lightpushnode={service_node}", f"--filternode={service_node}"]
+        return args + list(self.extra_args)
+
+    @property
+    def retention_capacity(self) -> Optional[int]:
+        """Message count kept by a ``capacity:`` policy, or None for other policies"""
+        kind, _, value = self.store_retention.partition(":")
+        return int(value) if kind == "capacity" else None
+
+    @property
+    def retention_seconds(self) -> Optional[int]:
+        """Seconds kept by a ``time:`` policy, or None for other policies"""
+        kind, _, value = self.store_retention.partition(":")
+        return int(value) if kind == "time" else None
+
+
+PROFILES: Dict[str, NodeProfile] = {
+    "default": NodeProfile(),
+    # Large relay cache for load tests that poll get_messages
+    "high_volume": NodeProfile(relay_cache_capacity=50000),
+    # Archive every relayed message for retrieval through the store protocol
+    "store": NodeProfile(store=True, store_retention="capacity:1000000"),
+    # Relay node serving lightpush and filter to light nodes
+    "service": NodeProfile(lightpush=True, filter=True),
+    # Light node: no relay, publishes through lightpush and receives through filter
+    "light": NodeProfile(relay=False)
+}
+
+
+def get_profile(profile: Union[str, Dict[str, Any], NodeProfile, None] = None) -> NodeProfile:
+    """Resolve a profile given by name, as a dict of fields, or as a profile"""
+    if profile is None:
+        profile = settings.NODE_PROFILE
+    if isinstance(profile, NodeProfile):
+        return profile
+    if isinstance(profile, dict):
+        known = {profile_field.name for profile_field in fields(NodeProfile)}
+        unknown = set(profile) - known
+        if unknown:
+            raise ValueError(f"Unknown node profile options: {sorted(unknown)}")
+        options = dict(profile)
+        if "extra_args" in options:
+            options["extra_args"] = tuple(options["extra_args"])
+        return NodeProfile(**options)
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown node profile '{profile}', expected one of {sorted(PROFILES)}")
+    return PROFILES[profile]
@@ -0,0 +1,486 @@
+import base64
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import allure
+from config.settings import settings
+from .buffers import LatencyHistogram
+from .decoding import WakuMessage
+from .impairment import SWEEP_LEVELS, Impairment
+from .multiplexer import MessageMultiplexer, Subscription
+from .payloads import SIZE_SWEEP
+from .publisher import PublishReport, publish_many
+from .resources import ResourceSampler
+from .waku_client import WakuClient
+
+logger = logging.getLogger(__name__)
+
+# magic, run id, sequence number, send time (ns since epoch)
+STAMP_FORMAT = ">4s8sQQ"
+STAMP_MAGIC = b"WKPT"
+STAMP_SIZE = struct.calcsize(STAMP_FORMAT)
+
+
+def stamp_payload(run_id: bytes, sequence: int, size: int = STAMP_SIZE) -> bytes:
+    """Build a raw payload carrying a sequence number and send time, padded to ``size``"""
+    header = struct.pack(STAMP_FORMAT, STAMP_MAGIC, run_id, sequence, time.time_ns())
+    return header + bytes(max(size - STAMP_SIZE, 0))
+
+
+def read_stamp(payload: str, run_id: bytes) -> Optional[Tuple[int, int]]:
+    """Return ``(sequence, send_time_ns)`` of a base64 payload stamped for ``run_id``"""
+    try:
+        # Only the header is needed; 40 base64 chars decode to 30 bytes
+        raw = base64.b64decode(payload[:40])
+    except (ValueError, TypeError):
+        return None
+    if len(raw) < STAMP_SIZE:
+        return None
+    magic, stamp_run, sequence, sent_ns = struct.unpack_from(STAMP_FORMAT, raw)
+    if magic != STAMP_MAGIC or stamp_run != run_id:
+        return None
+    return sequence, sent_ns
+
+
+@dataclass
+class NodeDelivery:
+    """Delivery statistics for one subscriber node"""
+
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    received: bytearray = field(default_factory=bytearray)
+    unique: int = 0
+    duplicates: int = 0
+    out_of_order: int = 0
+    highest_sequence: int = -1
+
+    def record(self, sequence: int, latency: Optional[float] = None):
+        """Count a received message; ``latency`` is left out for store retrievals"""
+        if sequence >= len(self.received):
+            self.received.extend(bytes(sequence + 1 - len(self.received)))
+        if self.received[sequence]:
+            self.duplicates += 1
+            return
+
+        self.received[sequence] = 1
+        self.unique += 1
+        if latency is not None:
+            self.latency.record(latency)
+        if sequence < self.highest_sequence:
+            self.out_of_order += 1
+        else:
+            self.highest_sequence = sequence
+
+
+@dataclass
+class PropagationResult:
+    """Per-node relay delivery latency, loss, duplicates and reordering"""
+
+    content_topic: str
+    published: int
+    duration: float
+    nodes: Dict[str, NodeDelivery]
+
+    def node_summary(self, name: str) -> Dict[str, Any]:
+        delivery = self.nodes[name]
+        summary = delivery.latency.summary()
+        summary.update({
+            "received": delivery.unique,
+            "lost": self.published - delivery.unique,
+            "loss_ratio": round(1 - delivery.unique / self.published, 6) if self.published else 0.0,
+            "duplicates": delivery.duplicates,
+            "out_of_order": delivery.out_of_order
+        })
+        return summary
+
+    def lost(self, name: str) -> int:
+        return self.published - self.nodes[name].unique
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "content_topic": self.content_topic,
+            "published": self.published,
+            "duration_s": round(self.duration, 3),
+            "nodes": {name: self.node_summary(name) for name in self.nodes}
+        }
+
+    def attach_to_allure(self, name: str = "Relay propagation"):
+        allure.attach(
+            json.dumps(self.summary(), indent=2),
+            name,
+            allure.attachment_type.JSON
+        )
+
+
+class PropagationTracker:
+    """Measures end-to-end relay delivery from publishers to subscriber nodes
+
+    Every payload carries a sequence number and its send time. While tracking,
+    one thread per subscriber drains ``get_messages`` continuously and records
+    the delivery latency of each stamped message it sees. Given a
+    ``multiplexer``, the tracker instead subscribes to the nodes' shared drain
+    loops, so it adds no requests of its own. Light node subscribers receive
+    through filter with ``receive_protocol="filter"``.
+    """
+
+    def __init__(
+            self,
+            subscribers: Dict[str, str],
+            content_topic: str = settings.DEFAULT_TOPIC,
+            poll_interval: float = 0.05,
+            multiplexer: Optional[MessageMultiplexer] = None,
+            receive_protocol: str = "relay"
+    ):
+        self.subscribers = subscribers
+        self.content_topic = content_topic
+        self.poll_interval = poll_interval
+        self.multiplexer = multiplexer
+        self.receive_protocol = receive_protocol
+        self.run_id = os.urandom(8)
+        self.nodes: Dict[str, NodeDelivery] = {name: NodeDelivery() for name in subscribers}
+
+        self._published = 0
+        self._failed = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._subscriptions: List[Subscription] = []
+        self._started_at = 0.0
+
+    def payloads(self, count: int, size: int = STAMP_SIZE) -> Iterator[bytes]:
+        """Generate stamped raw payloads of ``size`` bytes (at least the stamp)
+
+        Each is timestamped as it is drawn. The stamp is written into one
+        reused buffer, so a payload costs a single copy whatever its size.
+        """
+        buffer = bytearray(max(size, STAMP_SIZE))
+        for _ in range(count):
+            with self._lock:
+                sequence = self._published
+                self._published += 1
+            struct.pack_into(STAMP_FORMAT, buffer, 0, STAMP_MAGIC, self.run_id, sequence, time.time_ns())
+            yield bytes(buffer)
+
+    def publish(
+            self,
+            base_urls: Union[str, List[str]],
+            count: int,
+            rate: Optional[float] = None,
+            concurrency: int = 16,
+            size: int = STAMP_SIZE,
+            protocol: str = "relay"
+    ) -> PublishReport:
+        """Publish ``count`` stamped messages through the batch publisher, by relay or lightpush"""
+        report = publish_many(
+            base_urls,
+            self.payloads(count, size),
+            content_topic=self.content_topic,
+            rate=rate,
+            concurrency=concurrency,
+            protocol=protocol
+        )
+        with self._lock:
+            self._failed += report.errors
+        return report
+
+    def start(self) -> "PropagationTracker":
+        self._started_at = time.monotonic()
+        for name, base_url in self.subscribers.items():
+            if self.multiplexer is not None:
+                delivery = self.nodes[name]
+                self.multiplexer.node(base_url, name, self.receive_protocol)
+                self._subscriptions.append(self.multiplexer.subscribe(
+                    base_url,
+                    [self.content_topic],
+                    protocol=self.receive_protocol,
+                    callback=lambda message, delivery=delivery: self._record(delivery, message, time.time_ns())
+                ))
+                continue
+            thread = threading.Thread(
+                target=self._drain,
+                args=(name, WakuClient(base_url)),
+                name=f"propagation-{name}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _drain(self, name: str, client: WakuClient):
+        delivery = self.nodes[name]
+        fetch = client.get_filter_messages if self.receive_protocol == "filter" else client.get_messages
+        while True:
+            stopping = self._stop.is_set()
+            try:
+                messages = fetch(self.content_topic)
+            except Exception as e:
+                logger.debug(f"Draining messages from {name} failed: {e}")
+                messages = []
+            received_ns = time.time_ns()
+
+            for message in messages:
+                self._record(delivery, message, received_ns)
+
+            # One last drain after stop so late messages are still counted
+            if stopping:
+                return
+            if not messages:
+                self._stop.wait(self.poll_interval)
+
+    def _record(self, delivery: NodeDelivery, message: WakuMessage, received_ns: int):
+        stamp = read_stamp(message.payload, self.run_id)
+        if stamp is not None:
+            sequence, sent_ns = stamp
+            delivery.record(sequence, (received_ns - sent_ns) / 1e9)
+
+    @property
+    def published(self) -> int:
+        """Messages published successfully so far"""
+        return self._published - self._failed
+
+    def verify_store(self, client: WakuClient, peer_addr: Optional[str] = None, **query) -> NodeDelivery:
+        """Count this run's messages in a store node's archive
+
+        Results are streamed page by page and tracked in a one-byte-per-message
+        bitmap, so runs of hundreds of thousands of messages stay cheap.
+        """
+        delivery = NodeDelivery()
+        for message in client.query_store([self.content_topic], peer_addr=peer_addr, **query):
+            stamp = read_stamp(message.payload, self.run_id)
+            if stamp is not None:
+                delivery.record(stamp[0])
+        logger.info(f"Store holds {delivery.unique} of {self.published} messages ({delivery.duplicates} duplicates)")
+        return delivery
+
+    def _complete(self) -> bool:
+        expected = self.published
+        return all(delivery.unique >= expected for delivery in self.nodes.values())
+
+    def stop(self, settle_timeout: float = settings.MESSAGE_PROPAGATION_TIMEOUT) -> PropagationResult:
+        """Wait until every node has everything or the timeout passes, then stop draining"""
+        deadline = time.monotonic() + settle_timeout
+        while not self._complete() and time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+        self._close_subscriptions()
+
+        result = PropagationResult(
+            content_topic=self.content_topic,
+            published=self.published,
+            duration=time.monotonic() - self._started_at,
+            nodes=self.nodes
+        )
+        logger.info(f"Propagation result: {result.summary()}")
+        return result
+
+    def _close_subscriptions(self):
+        """Let each shared drain loop finish one more cycle so late messages are counted"""
+        for subscription in self._subscriptions:
+            subscription.multiplexer.sync()
+            subscription.close()
+        self._subscriptions.clear()
+
+    def __enter__(self) -> "PropagationTracker":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        if not self._stop.is_set():
+            self._stop.set()
+            for thread in self._threads:
+                thread.join()
+            self._close_subscriptions()
+
+
+def payload_size_sweep(
+        publisher_url: str,
+        subscribers: Dict[str, str],
+        sizes: Iterable[int] = SIZE_SWEEP,
+        count: int = 20,
+        rate: Optional[float] = None,
+        concurrency: int = 4,
+        content_topic: str = settings.DEFAULT_TOPIC
+) -> List[Dict[str, Any]]:
+    """Publish ``count`` stamped messages per payload size and measure each size
+
+    Every row holds publish latency and throughput from the publisher and the
+    end-to-end delivery latency and loss over all subscribers. Sizes below the
+    stamp are sent as :data:`STAMP_SIZE` bytes.
+    """
+    rows = []
+    for size in sizes:
+        tracker = PropagationTracker(subscribers, content_topic).start()
+        report = tracker.publish(publisher_url, count, rate=rate, concurrency=concurrency, size=size)
+        result = tracker.stop()
+
+        delivery = LatencyHistogram()
+        for node in result.nodes.values():
+            delivery.merge(node.latency)
+        publish = report.summary()
+        rows.append({
+            "payload_bytes": max(size, STAMP_SIZE),
+            "published": report.count,
+            "publish_errors": report.errors,
+            "publish_p50_ms": publish["latency_p50_ms"],
+            "publish_p95_ms": publish["latency_p95_ms"],
+            "throughput_msgs_per_s": publish["throughput_msgs_per_s"],
+            "throughput_bytes_per_s": publish["throughput_bytes_per_s"],
+            "delivery_p50_ms": round(delivery.percentile(50) * 1000, 3),
+            "delivery_p95_ms": round(delivery.percentile(95) * 1000, 3),
+            "lost": sum(result.lost(name) for name in result.nodes)
+        })
+        logger.info(f"Payload size {size}: {rows[-1]}")
+    return rows
+
+
+def impairment_sweep(
+        impairer: Any,
+        nodes: List[Dict[str, Any]],
+        publisher_url: str,
+        subscribers: Dict[str, str],
+        levels: Iterable[Impairment] = SWEEP_LEVELS,
+        count: int = 50,
+        rate: Optional[float] = 20.0,
+        content_topic: str = settings.DEFAULT_TOPIC
+) -> List[Dict[str, Any]]:
+    """Measure relay delivery latency and ratio at each impairment level
+
+    ``nodes`` are node fixture dicts (``container`` and ``ip``). Each level is
+    applied through the node manager's ``impairer`` to the traffic every node
+    sends to the other nodes, and removed again before the next one, so a
+    message crossing several impaired hops is delayed on each of them. REST
+    traffic between the nodes and the test host stays unimpaired, so publish
+    calls and polling do not add to the measured delivery.
+    """
+    rows = []
+    for level in levels:
+        for node in nodes:
+            peers = [other["ip"] for other in nodes if other is not node]
+            impairer.apply(node["container"], level, peers=peers)
+        try:
+            tracker = PropagationTracker(subscribers, content_topic).start()
+            report = tracker.publish(publisher_url, count, rate=rate, concurrency=8)
+            result = tracker.stop()
+        finally:
+            for node in nodes:
+                impairer.clear(node["container"])
+
+        delivery = LatencyHistogram()
+        for node in result.nodes.values():
+            delivery.merge(node.latency)
+        expected = result.published * len(result.nodes)
+        received = sum(node.unique for node in result.nodes.values())
+        rows.append({
+            "delay_ms": level.delay_ms,
+            "jitter_ms": level.jitter_ms,
+            "loss_percent": level.loss_percent,
+            "rate_kbit": level.rate_kbit,
+            "published": result.published,
+            "publish_errors": report.errors,
+            "delivery_ratio": round(received / expected, 4) if expected else 0.0,
+            "delivery_p50_ms": round(delivery.percentile(50) * 1000, 3),
+            "delivery_p95_ms": round(delivery.percentile(95) * 1000, 3),
+            "delivery_p99_ms": round(delivery.percentile(99) * 1000, 3),
+            "delivery_max_ms": round(delivery.max_us / 1000, 3)
+        })
+        logger.info(f"Impairment {level}: {rows[-1]}")
+    return rows
+
+
+def light_client_benchmark(
+        light_nodes: Dict[str, str],
+        clients: int = 20,
+        messages_per_client: int = 20,
+        rate: Optional[float] = 2.0,
+        size: int = STAMP_SIZE,
+        topic_prefix: str = "/light-bench/1",
+        sampler: Optional[ResourceSampler] = None,
+        service_container: Optional[str] = None
+) -> Dict[str, Any]:
+    """Run ``clients`` simulated light clients at once against one service node
+
+    Client ``i`` has its own content topic. It lightpushes
+    ``messages_per_client`` stamped messages at ``rate`` per second through
+    light node ``i`` and receives them through a filter subscription on the
+    next light node, so every message crosses the service node twice. Filter
+    messages are collected by one shared drain loop per light node. Reports
+    push latency, filter delivery latency and loss, and the service node's
+    resource use when ``sampler`` covers ``service_container``.
+    """
+    names = list(light_nodes)
+    if not names:
+        raise ValueError("At least one light node is required")
+
+    multiplexer = MessageMultiplexer()
+    trackers = []
+    try:
+        for index in range(clients):
+            receiver = names[(index + 1) % len(names)]
+            tracker = PropagationTracker(
+                {receiver: light_nodes[receiver]},
+                content_topic=f"{topic_prefix}/client-{index:04d}/proto",
+                multiplexer=multiplexer,
+                receive_protocol="filter"
+            )
+            trackers.append((light_nodes[names[index % len(names)]], tracker.start()))
+
+        def push(item: Tuple[str, PropagationTracker]) -> PublishReport:
+            sender_url, tracker = item
+            return tracker.publish(
+                sender_url, messages_per_client, rate=rate, concurrency=2, size=size, protocol="lightpush"
+            )
+
+        with ThreadPoolExecutor(max_workers=clients or 1, thread_name_prefix="light-client") as executor:
+            reports = list(executor.map(push, trackers))
+        results = [tracker.stop() for _, tracker in trackers]
+    finally:
+        multiplexer.stop()
+        for base_url in light_nodes.values():
+            try:
+                WakuClient(base_url).filter_unsubscribe_all()
+            except Exception as e:
+                logger.debug(f"Removing filter subscriptions of {base_url} failed: {e}")
+
+    push_latency, delivery = LatencyHistogram(), LatencyHistogram()
+    for report in reports:
+        push_latency.record_many(report.latency)
+    for result in results:
+        for node in result.nodes.values():
+            delivery.merge(node.latency)
+
+    published = sum(result.published for result in results)
+    received = sum(node.unique for result in results for node in result.nodes.values())
+    duration = max((report.duration for report in reports), default=0.0)
+    summary = {
+        "clients": clients,
+        "light_nodes": len(names),
+        "messages_per_client": messages_per_client,
+        "rate_per_client": rate,
+        "push": {
+            **push_latency.summary(),
+            "errors": sum(report.errors for report in reports),
+            "throughput_msgs_per_s": round(published / duration, 1) if duration else 0.0
+        },
+        "filter_delivery": {
+            **delivery.summary(),
+            "published": published,
+            "received": received,
+            "lost": published - received,
+            "duplicates": sum(node.duplicates for result in results for node in result.nodes.values()),
+            "max_client_loss": max((result.lost(name) for result in results for name in result.nodes), default=0)
+        },
+        "filter_poll_requests": multiplexer.requests()
+    }
+    if sampler is not None and service_container:
+        summary["service_resources"] = sampler.summary().get(service_container, {})
+    logger.info(f"Light client benchmark: {summary}")
+    return summary
@@ -0,0 +1,226 @@
+import asyncio
+import itertools
+import logging
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import aiohttp
+from config.settings import settings
+from .async_waku_client import JSON_HEADERS, AsyncWakuClientPool
+from .payloads import Payload, encode_lightpush_body, encode_message_body, payload_size
+
+logger = logging.getLogger(__name__)
+
+# Publish endpoint per protocol
+PUBLISH_ENDPOINTS = {
+    "relay": settings.MESSAGES_ENDPOINT,
+    "lightpush": settings.LIGHTPUSH_ENDPOINT
+}
+
+
+@dataclass
+class PublishReport:
+    """Per-message results of a publish run
+
+    Entries are stored in completion order in parallel arrays: ``sent_at`` is the
+    wall-clock send time, ``scheduled_at`` the intended send time (equal to
+    ``sent_at`` in closed-loop mode), ``latency`` the HTTP round trip in seconds,
+    ``sequence`` the payload's position in the input and ``status`` the HTTP
+    status code (0 for transport errors). ``payload_bytes`` counts the raw
+    payload bytes of successful publishes.
+    """
+
+    sequence: array = field(default_factory=lambda: array('Q'))
+    scheduled_at: array = field(default_factory=lambda: array('d'))
+    sent_at: array = field(default_factory=lambda: array('d'))
+    latency: array = field(default_factory=lambda: array('d'))
+    status: array = field(default_factory=lambda: array('H'))
+    payload_bytes: int = 0
+    duration: float = 0.0
+
+    def record(self, sequence: int, scheduled_at: float, sent_at: float, latency: float, status: int):
+        self.sequence.append(sequence)
+        self.scheduled_at.append(scheduled_at)
+        self.sent_at.append(sent_at)
+        self.latency.append(latency)
+        self.status.append(status)
+
+    @property
+    def count(self) -> int:
+        return len(self.status)
+
+    @property
+    def errors(self) -> int:
+        return sum(1 for status in self.status if status != 200)
+
+    @property
+    def throughput(self) -> float:
+        """Successfully published messages per second"""
+        return (self.count - self.errors) / self.duration if self.duration else 0.0
+
+    @property
+    def byte_throughput(self) -> float:
+        """Successfully published payload bytes per second"""
+        return self.payload_bytes / self.duration if self.duration else 0.0
+
+    def latency_percentile(self, percentile: float) -> float:
+        if not self.latency:
+            return 0.0
+        ordered = sorted(self.latency)
+        index = min(int(len(ordered) * percentile / 100), len(ordered) - 1)
+        return ordered[index]
+
+    def summary(self) -> Dict[str, Any]:
+        lag = [sent - scheduled for sent, scheduled in zip(self.sent_at, self.scheduled_at)]
+        return {
+            "messages": self.count,
+            "errors": self.errors,
+            "duration_s": round(self.duration, 3),
+            "throughput_msgs_per_s": round(self.throughput, 1),
+            "throughput_bytes_per_s": round(self.byte_throughput, 1),
+            "latency_p50_ms": round(self.latency_percentile(50) * 1000, 3),
+            "latency_p95_ms": round(self.latency_percentile(95) * 1000, 3),
+            "latency_p99_ms": round(self.latency_percentile(99) * 1000, 3),
+            "latency_max_ms": round(max(self.latency, default=0.0) * 1000, 3),
+            "max_schedule_lag_ms": round(max(lag, default=0.0) * 1000, 3)
+        }
+
+
+class Publisher:
+    """Publishes a stream of payloads to one or more nodes as fast as allowed
+
+    With ``rate`` set the publisher runs open loop: message ``i`` is scheduled at
+    ``i / rate`` seconds after the start, with at most ``concurrency`` requests in
+    flight. Without a rate it runs closed loop, keeping exactly ``concurrency``
+    requests in flight. Payloads are spread round-robin across ``base_urls``.
+    ``protocol`` is ``relay``, or ``lightpush`` to publish through light nodes.
+    """
+
+    def __init__(
+            self,
+            base_urls: Union[str, List[str]],
+            content_topic: str = settings.DEFAULT_TOPIC,
+            rate: Optional[float] = None,
+            concurrency: int = 64,
+            timeout: float = settings.HTTP_TIMEOUT,
+            protocol: str = "relay"
+    ):
+        if isinstance(base_urls, str):
+            base_urls = [base_urls]
+        if not base_urls:
+            raise ValueError("At least one node URL is required")
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        if protocol not in PUBLISH_ENDPOINTS:
+            raise ValueError(f"Unknown publish protocol '{protocol}', expected one of {sorted(PUBLISH_ENDPOINTS)}")
+
+        self.protocol = protocol
+        self.urls = [f"{url.rstrip('/')}{PUBLISH_ENDPOINTS[protocol]}" for url in base_urls]
+        self.content_topic = content_topic
+        self.rate = rate
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    async def run(self, payloads: Iterable[Payload]) -> PublishReport:
+        """Publish every payload and return the per-message report"""
+        report = PublishReport()
+        pool = AsyncWakuClientPool(
+            limit=self.concurrency,
+            limit_per_host=self.concurrency,
+            timeout=self.timeout
+        )
+        started = time.perf_counter()
+        try:
+            if self.rate:
+                await self._open_loop(pool.session, payloads, report)
+            else:
+                await self._closed_loop(pool.session, payloads, report)
+        finally:
+            report.duration = time.perf_counter() - started
+            await pool.close()
+
+        logger.info(f"Published {report.count} messages: {report.summary()}")
+        return report
+
+    async def _send(
+            self,
+            session: aiohttp.ClientSession,
+            sequence: int,
+            payload: Payload,
+            scheduled_at: float,
+            report: PublishReport
+    ):
+        url = self.urls[sequence % len(self.urls)]
+        if self.protocol == "lightpush":
+            body = encode_lightpush_body(payload, self.content_topic, settings.DEFAULT_PUBSUB_TOPIC)
+        else:
+            body = encode_message_body(payload, self.content_topic)
+        sent_at = time.time()
+        started = time.perf_counter()
+        try:
+            async with session.post(url, data=body, headers=JSON_HEADERS) as response:
+                await response.read()
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Publish {sequence} to {url} failed: {e}")
+            status = 0
+        if status == 200:
+            report.payload_bytes += payload_size(payload)
+        report.record(sequence, scheduled_at or sent_at, sent_at, time.perf_counter() - started, status)
+
+    async def _closed_loop(self, session: aiohttp.ClientSession, payloads: Iterable[Payload], report: PublishReport):
+        # The event loop is single threaded, so workers can share the iterator
+        messages = enumerate(payloads)
+
+        async def worker():
+            for sequence, payload in messages:
+                await self._send(session, sequence, payload, 0.0, report)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def _open_loop(self, session: aiohttp.ClientSession, payloads: Iterable[Payload], report: PublishReport):
+        in_flight = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        wall_start = time.time()
+        start = time.perf_counter()
+
+        async def send(sequence: int, payload: Payload, scheduled_at: float):
+            try:
+                await self._send(session, sequence, payload, scheduled_at, report)
+            finally:
+                in_flight.release()
+
+        messages = iter(payloads)
+        for sequence in itertools.count():
+            offset = sequence / self.rate
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # When the node falls behind, waiting here shows up as schedule lag
+            await in_flight.acquire()
+            # Draw the payload only when it is due, so generated stamps match send time
+            payload = next(messages, None)
+            if payload is None:
+                in_flight.release()
+                break
+            task = asyncio.ensure_future(send(sequence, payload, wall_start + offset))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+def publish_many(
+        base_urls: Union[str, List[str]],
+        payloads: Iterable[Payload],
+        content_topic: str = settings.DEFAULT_TOPIC,
+        rate: Optional[float] = None,
+        concurrency: int = 64,
+        protocol: str = "relay"
+) -> PublishReport:
+    """Synchronous entry point for :class:`Publisher` for use in tests"""
+    publisher = Publisher(base_urls, content_topic=content_topic, rate=rate, concurrency=concurrency, protocol=protocol)
+    return asyncio.run(publisher.run(payloads))
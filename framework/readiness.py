@@ -0,0 +1,128 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict
+
+import docker
+import requests
+from docker.models.containers import Container
+from config.settings import settings
+from .timing import phase
+from .utils import backoff_delays, remaining_time
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReadinessReport:
+    """How long each phase of bringing a node up took, in seconds"""
+
+    container_name: str
+    phases: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def __str__(self) -> str:
+        phases = ", ".join(f"{name}={seconds:.3f}s" for name, seconds in self.phases.items())
+        return f"{self.container_name} ready in {self.total:.3f}s ({phases})"
+
+
+class NodeReadiness:
+    """Waits for a Waku node container to be usable without fixed sleeps
+
+    Container state changes are followed on the Docker events stream, then the
+    node's REST API is probed with a short, growing backoff until it answers.
+    """
+
+    def __init__(
+            self,
+            client: docker.DockerClient,
+            initial_delay: float = 0.05,
+            max_delay: float = 0.5,
+            backoff_factor: float = 1.5
+    ):
+        self.client = client
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff_factor = backoff_factor
+
+    def wait_until_ready(
+            self,
+            container: Container,
+            base_url: str,
+            timeout: float = settings.NODE_STARTUP_TIMEOUT
+    ) -> ReadinessReport:
+        """Block until the container is running and its REST API responds"""
+        report = ReadinessReport(container_name=container.name)
+        deadline = time.monotonic() + timeout
+
+        started = time.monotonic()
+        with phase("readiness.container_running"):
+            self.wait_for_running(container, timeout)
+        report.phases["container_running"] = time.monotonic() - started
+
+        started = time.monotonic()
+        with phase("readiness.rest_api"):
+            self.wait_for_api(base_url, max(deadline - time.monotonic(), 0))
+        report.phases["rest_api"] = time.monotonic() - started
+
+        logger.info(str(report))
+        return report
+
+    def wait_for_running(self, container: Container, timeout: float):
+        """Wait for the container to reach the running state via Docker events"""
+        # Subscribe before checking the state so a start in between is not missed
+        events = self.client.events(
+            decode=True,
+            until=int(time.time() + timeout) + 1,
+            filters={"container": container.id, "type": "container"}
+        )
+        try:
+            container.reload()
+            if container.status == "running":
+                return
+            self._raise_if_exited(container)
+
+            for event in events:
+                action = event.get("Action", event.get("status", ""))
+                if action == "start":
+                    container.reload()
+                    return
+                if action in ("die", "oom"):
+                    container.reload()
+                    self._raise_if_exited(container, reason=action)
+        finally:
+            events.close()
+
+        raise TimeoutError(f"Container {container.name} not running within {timeout} seconds")
+
+    def wait_for_api(self, base_url: str, timeout: float):
+        """Probe the debug info endpoint until it answers or the timeout expires"""
+        url = f"{base_url.rstrip('/')}{settings.DEBUG_INFO_ENDPOINT}"
+        deadline = time.monotonic() + remaining_time(timeout)
+        delays = backoff_delays(self.initial_delay, self.max_delay, self.backoff_factor)
+        last_error = None
+
+        while True:
+            try:
+                response = requests.get(url, timeout=min(self.max_delay * 2, 2))
+                if response.status_code == 200:
+                    return
+                last_error = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                last_error = e
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(next(delays), remaining))
+
+        raise TimeoutError(f"REST API at {base_url} not ready within {timeout:.1f} seconds: {last_error}")
+
+    @staticmethod
+    def _raise_if_exited(container: Container, reason: str = "exited"):
+        if container.status in ("exited", "dead"):
+            logs = container.logs(tail=20).decode(errors="replace")
+            raise RuntimeError(f"Container {container.name} {reason} during startup:\n{logs}")
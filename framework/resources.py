@@ -0,0 +1,151 @@
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import allure
+from docker.models.containers import Container
+from docker.types import CancellableStream
+from .buffers import TimeSeriesBuffer
+
+logger = logging.getLogger(__name__)
+
+STAT_FIELDS = ("cpu_percent", "memory_bytes", "net_rx_bytes", "net_tx_bytes", "block_read_bytes", "block_write_bytes")
+
+
+def parse_stats(stats: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    """Reduce one Docker stats document to the numbers we keep"""
+    cpu = stats.get("cpu_stats", {})
+    precpu = stats.get("precpu_stats", {})
+    if not cpu or "system_cpu_usage" not in cpu:
+        return None
+
+    cpu_delta = cpu["cpu_usage"]["total_usage"] - precpu.get("cpu_usage", {}).get("total_usage", 0)
+    system_delta = cpu["system_cpu_usage"] - precpu.get("system_cpu_usage", 0)
+    online_cpus = cpu.get("online_cpus") or len(cpu["cpu_usage"].get("percpu_usage") or [1])
+    cpu_percent = cpu_delta / system_delta * online_cpus * 100 if system_delta > 0 else 0.0
+
+    memory = stats.get("memory_stats", {})
+    memory_stats = memory.get("stats", {})
+    # Page cache is not part of the process footprint (cgroup v1 "cache", v2 "inactive_file")
+    cache = memory_stats.get("inactive_file", memory_stats.get("cache", 0))
+    memory_bytes = memory.get("usage", 0) - cache
+
+    networks = (stats.get("networks") or {}).values()
+    block_io = (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []
+
+    return {
+        "cpu_percent": cpu_percent,
+        "memory_bytes": memory_bytes,
+        "net_rx_bytes": sum(network.get("rx_bytes", 0) for network in networks),
+        "net_tx_bytes": sum(network.get("tx_bytes", 0) for network in networks),
+        "block_read_bytes": sum(entry["value"] for entry in block_io if entry.get("op", "").lower() == "read"),
+        "block_write_bytes": sum(entry["value"] for entry in block_io if entry.get("op", "").lower() == "write")
+    }
+
+
+def open_stats_stream(container: Container) -> CancellableStream:
+    """Streaming ``docker stats`` of a container that ``close()`` ends from any thread
+
+    ``Container.stats(stream=True)`` returns a bare generator with no handle on
+    its HTTP response, so the request is made the way docker-py makes its
+    cancellable log and event streams.
+    """
+    api = container.client.api
+    response = api._get(api._url("/containers/{0}/stats", container.id), params={"stream": True}, stream=True)
+    api._raise_for_status(response)
+    return CancellableStream(api._stream_helper(response, decode=True), response)
+
+
+class ResourceSampler:
+    """Samples CPU, memory, network and block I/O of node containers
+
+    One streaming ``docker stats`` connection is held per container and every
+    sample goes into fixed-size ring buffers, one per field.
+    """
+
+    def __init__(self, containers: List[Container], capacity: int = 3600):
+        self.containers = containers
+        self.capacity = capacity
+        self.buffers: Dict[str, Dict[str, TimeSeriesBuffer]] = {}
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._streams: List[CancellableStream] = []
+
+    def start(self) -> "ResourceSampler":
+        self._stop.clear()
+        for container in self.containers:
+            if not hasattr(container, "stats"):
+                logger.info(f"{container.name} has no Docker stats, not sampling it")
+                continue
+            try:
+                stream = open_stats_stream(container)
+            except Exception as e:
+                logger.warning(f"Could not open stats stream for {container.name}: {e}")
+                continue
+            self._streams.append(stream)
+            self.buffers[container.name] = {name: TimeSeriesBuffer(self.capacity) for name in STAT_FIELDS}
+            thread = threading.Thread(
+                target=self._sample,
+                args=(container, stream),
+                name=f"stats-{container.name}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _sample(self, container: Container, stream: CancellableStream):
+        buffers = self.buffers[container.name]
+        try:
+            for stats in stream:
+                if self._stop.is_set():
+                    return
+                values = parse_stats(stats)
+                if values is None:
+                    continue  # First document has no previous CPU reading
+                timestamp = time.time()
+                for name, value in values.items():
+                    buffers[name].append(timestamp, value)
+        except Exception as e:
+            # Closing the stream in stop() ends the loop with an error as well
+            if not self._stop.is_set():
+                logger.warning(f"Stats stream for {container.name} ended: {e}")
+
+    def stop(self, timeout: float = 2.0):
+        """Stop sampling: close every stats stream, which releases its connection, then join the threads"""
+        self._stop.set()
+        for stream in self._streams:
+            try:
+                stream.close()
+            except Exception as e:
+                logger.debug(f"Closing stats stream failed: {e}")
+        for thread in self._threads:
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning(f"{thread.name} did not stop within {timeout}s")
+        self._streams.clear()
+        self._threads.clear()
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Min/mean/max/last per field and node; byte counters also report their growth"""
+        result = {}
+        for node, buffers in self.buffers.items():
+            node_summary = {}
+            for name, buffer in buffers.items():
+                node_summary[name] = buffer.summary()
+                if name.endswith("_bytes") and name != "memory_bytes" and len(buffer):
+                    first = next(iter(buffer.samples()))[1]
+                    node_summary[name]["increase"] = buffer.latest()[1] - first
+            result[node] = node_summary
+        return result
+
+    def attach_to_allure(self, name: str = "Container resource usage"):
+        allure.attach(json.dumps(self.summary(), indent=2), name, allure.attachment_type.JSON)
+
+    def __enter__(self) -> "ResourceSampler":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
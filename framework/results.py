@@ -0,0 +1,342 @@
+import argparse
+import logging
+import math
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from statistics import mean, variance
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    git_commit TEXT NOT NULL DEFAULT '',
+    image TEXT NOT NULL DEFAULT '',
+    backend TEXT NOT NULL DEFAULT '',
+    host TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS samples (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    recorded_at REAL NOT NULL,
+    test TEXT NOT NULL DEFAULT '',
+    topology TEXT NOT NULL DEFAULT '',
+    metric TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_metric_time ON samples(metric, recorded_at);
+CREATE INDEX IF NOT EXISTS samples_run_metric ON samples(run_id, metric);
+CREATE INDEX IF NOT EXISTS runs_image ON runs(image, started_at);
+CREATE INDEX IF NOT EXISTS runs_commit ON runs(git_commit);
+"""
+
+# Metric names (last dotted part) where a drop is the regression; everything else regresses by growing
+HIGHER_IS_BETTER = ("delivery_ratio", "received", "delivered")
+HIGHER_IS_BETTER_PREFIXES = ("throughput_",)
+
+
+def git_commit(cwd: Optional[str] = None) -> str:
+    """Commit under test: ``GIT_COMMIT`` if set, else ``git rev-parse HEAD``"""
+    if os.environ.get("GIT_COMMIT"):
+        return os.environ["GIT_COMMIT"]
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def higher_is_better(metric: str) -> bool:
+    """Whether ``metric`` gets worse by dropping, judged on its last dotted part only"""
+    name = metric.rsplit(".", 1)[-1]
+    return name in HIGHER_IS_BETTER or name.startswith(HIGHER_IS_BETTER_PREFIXES)
+
+
+def flatten(values: Dict[str, Any], prefix: str = "") -> Iterable[Tuple[str, float]]:
+    """Numeric leaves of a nested summary as ``(dotted.name, value)`` pairs"""
+    for key, value in values.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            yield from flatten(value, name)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+            yield name, float(value)
+
+
+def _incomplete_beta(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta function I_x(a, b), by continued fraction"""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    if x > (a + 1) / (a + b + 2):
+        return 1.0 - _incomplete_beta(b, a, 1 - x)
+
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1 - x)) / a
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 300):
+        for numerator in (
+                m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))
+        ):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= c * d
+        if abs(c * d - 1.0) < 1e-12:
+            break
+    return front * result
+
+
+def welch_t_test(a: Sequence[float], b: Sequence[float]) -> Tuple[float, float, float]:
+    """Welch's unequal-variance t-test; returns ``(t, degrees_of_freedom, two_sided_p)``"""
+    if len(a) < 2 or len(b) < 2:
+        raise ValueError("Welch's t-test needs at least two samples per group")
+    mean_a, mean_b = mean(a), mean(b)
+    se_a, se_b = variance(a) / len(a), variance(b) / len(b)
+    if se_a + se_b == 0:
+        # Both groups constant: either identical or certainly different
+        return (0.0, math.inf, 1.0) if mean_a == mean_b else (math.copysign(math.inf, mean_b - mean_a), math.inf, 0.0)
+
+    t = (mean_b - mean_a) / math.sqrt(se_a + se_b)
+    df = (se_a + se_b) ** 2 / (se_a ** 2 / (len(a) - 1) + se_b ** 2 / (len(b) - 1))
+    p = _incomplete_beta(df / 2, 0.5, df / (df + t * t))
+    return t, df, p
+
+
+class ResultStore:
+    """SQLite history of benchmark and timing results
+
+    Every sample belongs to a run, which records the git commit, node image
+    and backend it ran against, so results can be compared across runs,
+    commits and nwaku versions. Samples are buffered and written in one
+    transaction per :meth:`flush`; WAL mode lets pytest-xdist workers write
+    to the same file.
+    """
+
+    def __init__(self, path: str = settings.RESULTS_DB):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        self._pending: List[Tuple[str, float, str, str, str, float]] = []
+        self._lock = threading.Lock()
+
+    def open_run(self, run_id: str, git_commit: str = "", image: str = "", backend: str = "") -> str:
+        """Register a run; workers of the same run may all call this"""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO runs (run_id, started_at, git_commit, image, backend, host) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, time.time(), git_commit, image, backend, socket.gethostname())
+            )
+        return run_id
+
+    def record(self, run_id: str, metric: str, value: float, test: str = "", topology: str = ""):
+        with self._lock:
+            self._pending.append((run_id, time.time(), test, topology, metric, float(value)))
+
+    def record_summary(self, run_id: str, summary: Dict[str, Any], prefix: str = "", test: str = "", topology: str = ""):
+        """Record every numeric leaf of a (nested) summary dict"""
+        recorded_at = time.time()
+        rows = [(run_id, recorded_at, test, topology, metric, value) for metric, value in flatten(summary, prefix)]
+        with self._lock:
+            self._pending.extend(rows)
+
+    def flush(self):
+        with self._lock:
+            rows, self._pending = self._pending, []
+            if rows:
+                with self._connection:
+                    self._connection.executemany(
+                        "INSERT INTO samples (run_id, recorded_at, test, topology, metric, value) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+    def _select_runs(self, selector: str) -> Tuple[str, List[Any]]:
+        """SQL condition on ``runs`` for ``run=<id>``, ``commit=<sha>``, ``image=<image or tag>`` or ``latest``"""
+        if selector == "latest":
+            return "runs.run_id = (SELECT run_id FROM runs ORDER BY started_at DESC LIMIT 1)", []
+        key, _, value = selector.partition("=")
+        if not value:
+            key, value = "run", selector
+        if key == "run":
+            return "runs.run_id = ?", [value]
+        if key == "commit":
+            return "runs.git_commit LIKE ?", [f"{value}%"]
+        if key == "image":
+            # A bare tag such as v0.24.0 matches any repository
+            return "(runs.image = ? OR runs.image LIKE ?)", [value, f"%:{value}"]
+        raise ValueError(f"Unknown run selector '{selector}', expected run=, commit=, image= or latest")
+
+    def runs(self, selector: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        condition, params = self._select_runs(selector) if selector else ("1", [])
+        cursor = self._connection.execute(
+            "SELECT runs.run_id, started_at, git_commit, image, backend, host, "
+            "(SELECT COUNT(*) FROM samples WHERE samples.run_id = runs.run_id) "
+            f"FROM runs WHERE {condition} ORDER BY started_at DESC LIMIT ?",
+            params + [limit]
+        )
+        fields = ("run_id", "started_at", "git_commit", "image", "backend", "host", "samples")
+        return [dict(zip(fields, row)) for row in cursor]
+
+    def samples(self, selector: str, metric: str = "*", topology: Optional[str] = None) -> Dict[str, List[float]]:
+        """Values per metric for the runs matching ``selector``; ``metric`` is a glob"""
+        condition, params = self._select_runs(selector)
+        query = (
+            "SELECT samples.metric, samples.value FROM samples JOIN runs ON runs.run_id = samples.run_id "
+            f"WHERE {condition} AND samples.metric GLOB ?"
+        )
+        params = params + [metric]
+        if topology is not None:
+            query += " AND samples.topology = ?"
+            params.append(topology)
+        values: Dict[str, List[float]] = {}
+        for name, value in self._connection.execute(query, params):
+            values.setdefault(name, []).append(value)
+        return values
+
+    def trend(self, metric: str, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Mean of ``metric`` per run, oldest first"""
+        cursor = self._connection.execute(
+            "SELECT runs.run_id, runs.started_at, runs.image, runs.git_commit, AVG(value), COUNT(*) "
+            "FROM samples JOIN runs ON runs.run_id = samples.run_id "
+            "WHERE samples.metric = ? AND samples.recorded_at >= ? "
+            "GROUP BY runs.run_id ORDER BY runs.started_at",
+            (metric, since or 0)
+        )
+        fields = ("run_id", "started_at", "image", "git_commit", "mean", "count")
+        return [dict(zip(fields, row)) for row in cursor]
+
+    def compare(
+            self,
+            baseline: str,
+            candidate: str,
+            metric: str = "*",
+            alpha: float = settings.RESULTS_ALPHA,
+            min_change: float = settings.RESULTS_MIN_CHANGE
+    ) -> List[Dict[str, Any]]:
+        """Compare every metric both selections have; flags significant changes for the worse
+
+        A metric regresses when Welch's t-test gives ``p < alpha`` and the mean
+        moved by at least ``min_change`` (relative) in the bad direction. A
+        zero baseline mean, usual for counts such as ``lost`` or ``errors``,
+        makes any significant move in the bad direction a regression.
+        """
+        before, after = self.samples(baseline, metric), self.samples(candidate, metric)
+        rows = []
+        for name in sorted(set(before) & set(after)):
+            a, b = before[name], after[name]
+            row: Dict[str, Any] = {
+                "metric": name,
+                "baseline_n": len(a),
+                "baseline_mean": mean(a),
+                "candidate_n": len(b),
+                "candidate_mean": mean(b),
+                "p_value": None,
+                "regression": False
+            }
+            base = row["baseline_mean"]
+            difference = row["candidate_mean"] - base
+            if base:
+                change = difference / abs(base)
+            else:
+                change = math.copysign(math.inf, difference) if difference else 0.0
+            row["change"] = change
+            if len(a) >= 2 and len(b) >= 2:
+                _, _, p = welch_t_test(a, b)
+                row["p_value"] = p
+                worse = -change if higher_is_better(name) else change
+                row["regression"] = p < alpha and worse >= min_change
+            rows.append(row)
+        return rows
+
+
+def _format_time(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m framework.results", description="Benchmark result history")
+    parser.add_argument("--db", default=settings.RESULTS_DB, help="Result database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    runs_parser = commands.add_parser("runs", help="List recorded runs")
+    runs_parser.add_argument("selector", nargs="?", help="run=<id>, commit=<sha>, image=<image or tag> or latest")
+    runs_parser.add_argument("--limit", type=int, default=20)
+
+    compare_parser = commands.add_parser("compare", help="Compare two runs, commits or images")
+    compare_parser.add_argument("baseline", help="run=<id>, commit=<sha>, image=<image or tag> or latest")
+    compare_parser.add_argument("candidate", help="Selector of the runs to check against the baseline")
+    compare_parser.add_argument("--metric", default="*", help="Glob of metric names")
+    compare_parser.add_argument("--alpha", type=float, default=settings.RESULTS_ALPHA)
+    compare_parser.add_argument("--min-change", type=float, default=settings.RESULTS_MIN_CHANGE)
+    compare_parser.add_argument("--all", action="store_true", help="Show unchanged metrics too")
+
+    trend_parser = commands.add_parser("trend", help="Mean of one metric per run over time")
+    trend_parser.add_argument("metric")
+    trend_parser.add_argument("--days", type=float, help="Only the last N days")
+
+    args = parser.parse_args(argv)
+    store = ResultStore(args.db)
+    try:
+        if args.command == "runs":
+            for run in store.runs(args.selector, args.limit):
+                print(
+                    f"{run['run_id']:<36} {_format_time(run['started_at'])}  {run['git_commit'][:10]:<10}  "
+                    f"{run['image'] or '-':<28} {run['backend']:<6} {run['samples']:>6} samples"
+                )
+            return 0
+
+        if args.command == "trend":
+            since = time.time() - args.days * 86400 if args.days else None
+            for point in store.trend(args.metric, since):
+                print(
+                    f"{_format_time(point['started_at'])}  {point['image'] or '-':<28} {point['git_commit'][:10]:<10}  "
+                    f"{point['mean']:>14.4f}  (n={point['count']})"
+                )
+            return 0
+
+        rows = store.compare(args.baseline, args.candidate, args.metric, args.alpha, args.min_change)
+        if not rows:
+            print(f"No metrics in common between {args.baseline} and {args.candidate}")
+            return 0
+        regressions = [row for row in rows if row["regression"]]
+        for row in rows:
+            if not (args.all or row["regression"] or (row["p_value"] is not None and row["p_value"] < args.alpha)):
+                continue
+            p_value = f"{row['p_value']:.4f}" if row["p_value"] is not None else "n/a"
+            print(
+                f"{'REGRESSION' if row['regression'] else '':<10} {row['metric']:<50} "
+                f"{row['baseline_mean']:>12.4f} -> {row['candidate_mean']:>12.4f}  "
+                f"{row['change']:>+8.1%}  p={p_value}  n={row['baseline_n']}/{row['candidate_n']}"
+            )
+        print(f"{len(rows)} metrics compared, {len(regressions)} significant regressions")
+        return 1 if regressions else 0
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import logging
+import os
+import uuid
+from typing import Any, Dict, Optional, Union
+
+import pytest
+from config.settings import settings
+from .results import ResultStore, git_commit
+
+logger = logging.getLogger(__name__)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("results", "persistent benchmark result history")
+    group.addoption(
+        "--results-db",
+        default=settings.RESULTS_DB,
+        help="SQLite file that benchmark results and phase timings are appended to; empty disables it"
+    )
+    group.addoption(
+        "--results-topology",
+        default="",
+        help="Label stored with results that do not name their own topology"
+    )
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(ResultsPlugin(config), "waku-results")
+
+
+class BenchmarkRecorder:
+    """Records one test's metrics into the run's result store"""
+
+    def __init__(self, plugin: "ResultsPlugin", test: str):
+        self.plugin = plugin
+        self.test = test
+
+    def record(self, metrics: Union[Dict[str, Any], float], name: str = "", topology: Optional[str] = None):
+        """Record a value as ``name``, or every numeric leaf of a summary dict under the ``name`` prefix"""
+        if topology is None:
+            topology = self.plugin.topology
+        if isinstance(metrics, dict):
+            self.plugin.record_summary(metrics, name, self.test, topology)
+        else:
+            self.plugin.record(name, metrics, self.test, topology)
+
+
+class ResultsPlugin:
+    """Appends each test's benchmark metrics and phase timings to the result store
+
+    All pytest-xdist workers of one run share the run id, so a run's samples
+    come together in the store. The run is registered on the first sample,
+    which keeps the xdist controller (which runs no tests) out of it.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.path = config.getoption("--results-db")
+        self.topology = config.getoption("--results-topology")
+        self.run_id = os.environ.get("PYTEST_XDIST_TESTRUNUID") or uuid.uuid4().hex
+        self.store: Optional[ResultStore] = None
+
+    def _open(self) -> Optional[ResultStore]:
+        if self.store is None and self.path:
+            if self.config.getoption("--backend", default=settings.BACKEND) == "docker":
+                image, backend = settings.DOCKER_IMAGE, "docker"
+            else:
+                image, backend = "", "fake"
+            self.store = ResultStore(self.path)
+            self.store.open_run(self.run_id, git_commit(str(self.config.rootpath)), image, backend)
+        return self.store
+
+    def record(self, metric: str, value: float, test: str = "", topology: str = ""):
+        store = self._open()
+        if store is not None:
+            store.record(self.run_id, metric, value, test, topology)
+
+    def record_summary(self, summary: Dict[str, Any], prefix: str = "", test: str = "", topology: str = ""):
+        store = self._open()
+        if store is not None:
+            store.record_summary(self.run_id, summary, prefix, test, topology)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        yield
+        if self.store is not None:
+            self.store.flush()
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        # Runs after the timing plugin has summarized every test's phases
+        timing = self.config.pluginmanager.get_plugin("waku-timing")
+        if timing is not None:
+            for test, phases in timing.tests.items():
+                for name, stats in phases.items():
+                    self.record_summary(
+                        {"mean_s": stats["mean_s"], "max_s": stats["max_s"]}, f"phase.{name}", test, self.topology
+                    )
+        if self.store is not None:
+            self.store.close()
+            logger.info(f"Results of run {self.run_id} stored in {self.path}")
+
+
+@pytest.fixture
+def benchmark_results(request) -> BenchmarkRecorder:
+    """Recorder appending the test's metrics to the persistent result store"""
+    return BenchmarkRecorder(request.config.pluginmanager.get_plugin("waku-results"), request.node.nodeid)
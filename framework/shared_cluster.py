@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from filelock import FileLock
+from config.settings import settings
+from .allocator import _pid_alive
+from .cluster import ClusterNode, NodeSpec
+from .waku_client import WakuClient
+
+logger = logging.getLogger(__name__)
+
+
+def current_run_id() -> str:
+    """Identifier shared by all pytest-xdist workers of one run, or this process's own"""
+    return os.environ.get("PYTEST_XDIST_TESTRUNUID", f"pid-{os.getpid()}")
+
+
+class SharedCluster:
+    """One cluster per test run, shared by every pytest-xdist worker
+
+    The first worker to attach builds the cluster while holding a file lock and
+    writes the node endpoints to a state file; workers that attach later read
+    the endpoints instead of starting their own nodes. Each attached process is
+    listed as a member, and the last member to detach tears the cluster down.
+    State left by an earlier run (another run id, or no live members) is torn
+    down and replaced.
+
+    The cluster must be treated as read-only: tests on different workers see
+    the same nodes at the same time.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            manager,
+            node_names: List[str],
+            run_id: Optional[str] = None,
+            state_dir: Optional[str] = None
+    ):
+        self.name = name
+        self.manager = manager
+        self.node_names = node_names
+        self.run_id = run_id or current_run_id()
+        self.pid = os.getpid()
+        state_dir = Path(state_dir or settings.LEASE_DIR)
+        state_dir.mkdir(parents=True, exist_ok=True)
+        self.state_file = state_dir / f"cluster-{name}.json"
+        self.lock = FileLock(str(state_dir / f"cluster-{name}.lock"))
+        self.nodes: Dict[str, ClusterNode] = {}
+
+    @contextmanager
+    def _state(self) -> Iterator[Dict[str, Any]]:
+        """Read, yield and write back the shared state under the file lock"""
+        with self.lock:
+            try:
+                state = json.loads(self.state_file.read_text())
+            except (FileNotFoundError, ValueError):
+                state = {}
+            yield state
+            if state:
+                tmp_file = self.state_file.with_suffix(".tmp")
+                tmp_file.write_text(json.dumps(state, indent=2))
+                os.replace(tmp_file, self.state_file)
+            else:
+                self.state_file.unlink(missing_ok=True)
+
+    def attach(self) -> Dict[str, ClusterNode]:
+        """Join the run's cluster, building it if this process is the first"""
+        with self._state() as state:
+            if state:
+                state["members"] = [pid for pid in state["members"] if _pid_alive(pid)]
+                if state["run_id"] != self.run_id or not state["members"]:
+                    logger.info(f"Replacing cluster {self.name} left by run {state['run_id']}")
+                    self._teardown(state)
+                    state.clear()
+
+            if state:
+                self.nodes = self._attach_nodes(state["nodes"])
+                logger.info(f"Attached to shared cluster {self.name} built by pid {state['builder']}")
+            else:
+                self.nodes = self._build()
+                state.update({
+                    "run_id": self.run_id,
+                    "builder": self.pid,
+                    "manager_id": getattr(self.manager, "manager_id", None),
+                    "network": getattr(self.manager, "network_name", None),
+                    "members": [],
+                    "nodes": {name: self._node_record(node) for name, node in self.nodes.items()}
+                })
+            state["members"].append(self.pid)
+        return self.nodes
+
+    def detach(self):
+        """Leave the cluster; the last member out tears it down"""
+        with self._state() as state:
+            if not state:
+                return
+            state["members"] = [pid for pid in state["members"] if pid != self.pid and _pid_alive(pid)]
+            if not state["members"]:
+                logger.info(f"Last member left shared cluster {self.name}, tearing it down")
+                self._teardown(state)
+                state.clear()
+
+    def _build(self) -> Dict[str, ClusterNode]:
+        self.manager.create_network()
+        # Every node after the first bootstraps from the first
+        root, *others = self.node_names
+        specs = [self.manager.node_spec(root)]
+        specs += [self.manager.node_spec(name, bootstrap_from=[root]) for name in others]
+        return self.manager.start_cluster(specs)
+
+    def _teardown(self, state: Dict[str, Any]):
+        if state.get("builder") != self.pid and state.get("manager_id"):
+            # Take over the builder's labelled containers and network
+            self.manager.adopt(state["manager_id"], state["network"])
+        try:
+            self.manager.cleanup(force=True)
+        except Exception as e:
+            logger.warning(f"Failed to tear down shared cluster {self.name}: {e}")
+
+    @staticmethod
+    def _node_record(node: ClusterNode) -> Dict[str, Any]:
+        return {
+            "ports": node.spec.ports,
+            "external_ip": node.spec.external_ip,
+            "bootstrap_from": node.spec.bootstrap_from,
+            "container_id": getattr(node.container, "id", None),
+            "base_url": node.base_url,
+            "enr_uri": node.enr_uri,
+            "metrics_url": node.metrics_url,
+            "peer_id": node.peer_id
+        }
+
+    def _attach_nodes(self, records: Dict[str, Dict[str, Any]]) -> Dict[str, ClusterNode]:
+        nodes = {}
+        for name, record in records.items():
+            nodes[name] = ClusterNode(
+                spec=NodeSpec(
+                    name=name,
+                    ports=record["ports"],
+                    external_ip=record["external_ip"],
+                    bootstrap_from=record["bootstrap_from"]
+                ),
+                container=self.manager.get_container(record["container_id"]),
+                client=WakuClient(record["base_url"]),
+                base_url=record["base_url"],
+                enr_uri=record["enr_uri"],
+                metrics_url=record["metrics_url"],
+                peer_id=record.get("peer_id", "")
+            )
+        return nodes
@@ -0,0 +1,62 @@
+import json
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from filelock import FileLock
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# How a topic was subscribed on a node: relay content topics, or filter topics of a light node
+SUBSCRIPTION_KINDS = ("relay", "filter")
+
+
+class SubscriptionLedger:
+    """Content topics subscribed on each node, so a reused node can be reset fully
+
+    nwaku cannot list a node's relay subscriptions, so every client records
+    what it subscribes here, keyed by the node's REST base URL. The ledger is
+    a JSON file guarded by a file lock in ``LEASE_DIR``, so warm containers
+    adopted by a later worker or session are reset as well.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or os.path.join(settings.LEASE_DIR, "subscriptions.json"))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = FileLock(str(self.path.with_suffix(".lock")))
+
+    @contextmanager
+    def _entries(self) -> Iterator[Dict[str, Dict[str, List[str]]]]:
+        """Read, yield and write back the ledger under the file lock"""
+        with self.lock:
+            try:
+                entries = json.loads(self.path.read_text())
+            except (FileNotFoundError, ValueError):
+                entries = {}
+            yield entries
+            tmp_file = self.path.with_suffix(".tmp")
+            tmp_file.write_text(json.dumps(entries))
+            os.replace(tmp_file, self.path)
+
+    def add(self, base_url: str, kind: str, topics: Iterable[str]):
+        with self._entries() as entries:
+            node = entries.setdefault(base_url.rstrip("/"), {})
+            node[kind] = sorted(set(node.get(kind, [])) | set(topics))
+
+    def remove(self, base_url: str, kind: str, topics: Optional[Iterable[str]] = None):
+        """Forget ``topics`` of one kind, or all topics of that kind"""
+        with self._entries() as entries:
+            node = entries.get(base_url.rstrip("/"), {})
+            if kind in node:
+                node[kind] = sorted(set(node[kind]) - set(topics)) if topics is not None else []
+
+    def pop(self, base_url: str) -> Dict[str, List[str]]:
+        """Forget and return everything subscribed on a node, e.g. when it is reset or replaced"""
+        with self._entries() as entries:
+            return entries.pop(base_url.rstrip("/"), {})
+
+
+ledger = SubscriptionLedger()
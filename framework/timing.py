@@ -0,0 +1,73 @@
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+
+class PhaseTimings:
+    """Thread-safe accumulator of durations per named phase"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases: Dict[str, List[float]] = {}
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self._phases.setdefault(name, []).append(seconds)
+
+    def collect(self) -> Dict[str, List[float]]:
+        """Return everything recorded so far and start over"""
+        with self._lock:
+            phases, self._phases = self._phases, {}
+        return phases
+
+
+# Process-wide recorder; the timing plugin collects it around every test
+timings = PhaseTimings()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the block as one occurrence of ``name``, whether or not it raises"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.record(name, time.perf_counter() - started)
+
+
+def timed(name: str) -> Callable:
+    """Decorator form of :func:`phase`"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_retry_wait(name: str) -> Callable[[Any], None]:
+    """tenacity ``before_sleep`` hook recording each backoff sleep as ``<name>.retry_wait``"""
+    def before_sleep(retry_state):
+        timings.record(f"{name}.retry_wait", retry_state.next_action.sleep)
+        logger.debug(f"Retrying {name} after attempt {retry_state.attempt_number}")
+    return before_sleep
+
+
+def summarize(phases: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    """Count, total, mean and max seconds of every phase"""
+    return {
+        name: {
+            "count": len(durations),
+            "total_s": round(sum(durations), 6),
+            "mean_s": round(sum(durations) / len(durations), 6),
+            "max_s": round(max(durations), 6)
+        }
+        for name, durations in sorted(phases.items())
+        if durations
+    }
@@ -0,0 +1,161 @@
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pytest
+from config.settings import settings
+from .timing import summarize, timings
+
+logger = logging.getLogger(__name__)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("timing", "per-phase timing report")
+    group.addoption(
+        "--timing-report",
+        default=settings.TIMING_REPORT,
+        help="Where to write the JSON phase timing report"
+    )
+    group.addoption(
+        "--timing-baseline",
+        default=settings.TIMING_BASELINE,
+        help="Timing report of a previous run to check this run's phases against"
+    )
+    group.addoption(
+        "--timing-threshold",
+        type=float,
+        default=settings.TIMING_REGRESSION_THRESHOLD,
+        help="Flag a phase whose mean duration exceeds the baseline mean by this factor"
+    )
+    group.addoption(
+        "--timing-fail-on-regression",
+        action="store_true",
+        default=settings.TIMING_FAIL_ON_REGRESSION,
+        help="Fail the run on timing regressions instead of only reporting them"
+    )
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(TimingPlugin(config), "waku-timing")
+
+
+def find_regressions(
+        phases: Dict[str, Dict[str, float]],
+        baseline: Dict[str, Dict[str, float]],
+        threshold: float,
+        min_seconds: float = settings.TIMING_MIN_REGRESSION_SECONDS
+) -> List[Dict[str, Any]]:
+    """Phases whose mean grew past ``threshold`` times the baseline and by at least ``min_seconds``"""
+    regressions = []
+    for name, current in phases.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        mean, baseline_mean = current["mean_s"], previous["mean_s"]
+        if mean > baseline_mean * threshold and mean - baseline_mean >= min_seconds:
+            regressions.append({
+                "phase": name,
+                "mean_s": mean,
+                "baseline_mean_s": baseline_mean,
+                "ratio": round(mean / baseline_mean, 2) if baseline_mean else None
+            })
+    return regressions
+
+
+class TimingPlugin:
+    """Collects the instrumented phase timings of every test into one JSON report
+
+    Under pytest-xdist each worker hands its raw durations to the controller
+    through ``workeroutput``; the controller merges them, checks the baseline,
+    writes the report and sets the run's exit status.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.tests: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self.worker_tests: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self.phases: Dict[str, List[float]] = {}
+        self.regressions: List[Dict[str, Any]] = []
+        self.report_path: Optional[Path] = None
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        # Fixture setup and teardown run inside the protocol, so module-scoped
+        # cluster start-up counts towards the first test that needs it
+        yield
+        collected = timings.collect()
+        if collected:
+            self.tests[item.nodeid] = summarize(collected)
+            for name, durations in collected.items():
+                self.phases.setdefault(name, []).extend(durations)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        output = getattr(node, "workeroutput", {}).get("waku_timing")
+        if output:
+            for name, durations in output["phases"].items():
+                self.phases.setdefault(name, []).extend(durations)
+            self.worker_tests.update(output["tests"])
+
+    def _load_baseline(self, path: str) -> Optional[Dict[str, Dict[str, float]]]:
+        try:
+            with open(path) as f:
+                return json.load(f)["phases"]
+        except FileNotFoundError:
+            logger.warning(f"Timing baseline {path} not found, skipping regression check")
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Timing baseline {path} is not a timing report: {e}")
+        return None
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_sessionfinish(self, session, exitstatus):
+        if hasattr(self.config, "workeroutput"):
+            # pytest-xdist worker: the controller reports for the whole run
+            self.config.workeroutput["waku_timing"] = {"phases": self.phases, "tests": self.tests}
+            return
+
+        phases = summarize(self.phases)
+
+        baseline_path = self.config.getoption("--timing-baseline")
+        if baseline_path:
+            baseline = self._load_baseline(baseline_path)
+            if baseline is not None:
+                self.regressions = find_regressions(phases, baseline, self.config.getoption("--timing-threshold"))
+
+        path = Path(self.config.getoption("--timing-report"))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({
+                "created": time.time(),
+                "baseline": baseline_path or None,
+                "phases": phases,
+                "regressions": self.regressions,
+                "tests": {**self.worker_tests, **self.tests}
+            }, f, indent=2)
+        self.report_path = path
+
+        if self.regressions and self.config.getoption("--timing-fail-on-regression"):
+            if session.exitstatus == pytest.ExitCode.OK:
+                session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.report_path is None:
+            return
+
+        terminalreporter.section("phase timings")
+        slowest = sorted(summarize(self.phases).items(), key=lambda item: item[1]["total_s"], reverse=True)
+        for name, stats in slowest[:10]:
+            terminalreporter.write_line(
+                f"{name:<40} {stats['count']:>5}x  total {stats['total_s']:>9.3f}s  "
+                f"mean {stats['mean_s']:>8.3f}s  max {stats['max_s']:>8.3f}s"
+            )
+        terminalreporter.write_line(f"Timing report: {self.report_path}")
+
+        for regression in self.regressions:
+            terminalreporter.write_line(
+                f"REGRESSION {regression['phase']}: mean {regression['mean_s']:.3f}s "
+                f"vs baseline {regression['baseline_mean_s']:.3f}s",
+                red=True
+            )
@@ -0,0 +1,230 @@
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import yaml
+from config.settings import settings
+from .cluster import ClusterNode, NodeSpec
+from .profiles import get_profile
+
+logger = logging.getLogger(__name__)
+
+SHAPES = ("star", "chain", "ring", "mesh", "random_regular", "tiered")
+
+Edge = Tuple[int, int]
+
+
+@dataclass
+class TopologySpec:
+    """Declarative description of a cluster layout
+
+    ``shape`` is one of :data:`SHAPES`. ``degree`` applies to ``random_regular``;
+    ``tiers`` lists the sizes of the bootstrap tiers of a ``tiered`` layout (the
+    remaining nodes form the last tier), each node connecting to
+    ``tier_fanout`` nodes of the tier above it. ``profile`` names a node
+    profile or gives its options as a dict.
+    """
+
+    shape: str
+    size: int
+    degree: int = 3
+    tiers: List[int] = field(default_factory=lambda: [1])
+    tier_fanout: int = 2
+    max_bootstrap: int = 3
+    seed: Optional[int] = None
+    name_prefix: str = "waku_node"
+    log_level: str = settings.NODE_LOG_LEVEL
+    profile: Union[str, Dict[str, Any], None] = None
+
+    def __post_init__(self):
+        if self.shape not in SHAPES:
+            raise ValueError(f"Unknown topology shape '{self.shape}', expected one of {SHAPES}")
+        if self.size < 1:
+            raise ValueError("Topology size must be at least 1")
+        # Fail on a bad profile before any node starts
+        get_profile(self.profile)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TopologySpec":
+        known = {spec_field.name for spec_field in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"Unknown topology options: {sorted(unknown)}")
+        return cls(**data)
+
+    @classmethod
+    def from_yaml(cls, path: str) -> "TopologySpec":
+        with open(path) as f:
+            return cls.from_dict(yaml.safe_load(f))
+
+    def node_names(self) -> List[str]:
+        width = len(str(self.size))
+        return [f"{self.name_prefix}{index:0{width}d}" for index in range(1, self.size + 1)]
+
+    def edges(self) -> Set[Edge]:
+        """Undirected links between node indexes, each as ``(low, high)``"""
+        n = self.size
+        rng = random.Random(self.seed)
+
+        if self.shape == "star":
+            edges = {(0, i) for i in range(1, n)}
+        elif self.shape == "chain":
+            edges = {(i, i + 1) for i in range(n - 1)}
+        elif self.shape == "ring":
+            edges = {(i, i + 1) for i in range(n - 1)}
+            if n > 2:
+                edges.add((0, n - 1))
+        elif self.shape == "mesh":
+            edges = {(i, j) for i in range(n) for j in range(i + 1, n)}
+        elif self.shape == "random_regular":
+            edges = self._random_regular(rng)
+        else:
+            edges = self._tiered(rng)
+        return edges
+
+    def _random_regular(self, rng: random.Random) -> Set[Edge]:
+        n, k = self.size, self.degree
+        if k >= n or (n * k) % 2:
+            raise ValueError(f"No {k}-regular graph on {n} nodes")
+
+        # Pairing model: shuffle k stubs per node and pair them, retrying on self-loops or duplicates
+        for _ in range(1000):
+            stubs = [node for node in range(n) for _ in range(k)]
+            rng.shuffle(stubs)
+            edges = set()
+            for a, b in zip(stubs[::2], stubs[1::2]):
+                edge = (min(a, b), max(a, b))
+                if a == b or edge in edges:
+                    break
+                edges.add(edge)
+            else:
+                return edges
+        raise ValueError(f"Could not generate a random {k}-regular graph on {n} nodes")
+
+    def _tiered(self, rng: random.Random) -> Set[Edge]:
+        bounds, start = [], 0
+        for tier_size in self.tiers:
+            if start >= self.size:
+                break
+            bounds.append((start, min(start + tier_size, self.size)))
+            start += tier_size
+        if start < self.size:
+            bounds.append((start, self.size))
+
+        first_start, first_end = bounds[0]
+        edges = {(i, j) for i in range(first_start, first_end) for j in range(i + 1, first_end)}
+        for (upper_start, upper_end), (lower_start, lower_end) in zip(bounds, bounds[1:]):
+            upper = list(range(upper_start, upper_end))
+            for node in range(lower_start, lower_end):
+                for parent in rng.sample(upper, min(self.tier_fanout, len(upper))):
+                    edges.add((parent, node))
+        return edges
+
+    def roots(self) -> List[int]:
+        """Nodes that start first, without bootstrap nodes"""
+        if self.shape == "tiered":
+            return list(range(min(self.tiers[0], self.size)))
+        return [0]
+
+    def plan(self) -> Tuple[Dict[int, List[int]], List[Edge], Dict[int, int]]:
+        """Split the edges into bootstrap dependencies and links made after start-up
+
+        Nodes are layered by breadth-first distance from the roots. Each node
+        bootstraps from up to ``max_bootstrap`` neighbours one layer closer, so
+        every layer starts as soon as the one before it is up. All remaining
+        edges become static links. Returns ``(bootstrap, static_links, depth)``.
+        """
+        edges = self.edges()
+        neighbours: Dict[int, Set[int]] = {node: set() for node in range(self.size)}
+        for a, b in edges:
+            neighbours[a].add(b)
+            neighbours[b].add(a)
+
+        depth: Dict[int, int] = {}
+        frontier = self.roots()
+        for root in frontier:
+            depth[root] = 0
+        while len(depth) < self.size:
+            while frontier:
+                next_frontier = []
+                for node in frontier:
+                    for neighbour in sorted(neighbours[node]):
+                        if neighbour not in depth:
+                            depth[neighbour] = depth[node] + 1
+                            next_frontier.append(neighbour)
+                frontier = next_frontier
+            # Disconnected remainder: its lowest node becomes another root
+            unreached = [node for node in range(self.size) if node not in depth]
+            if unreached:
+                depth[unreached[0]] = 0
+                frontier = [unreached[0]]
+
+        bootstrap: Dict[int, List[int]] = {}
+        covered: Set[Edge] = set()
+        for node in range(self.size):
+            parents = sorted(n for n in neighbours[node] if depth[n] == depth[node] - 1)[:self.max_bootstrap]
+            bootstrap[node] = parents
+            covered.update((min(node, parent), max(node, parent)) for parent in parents)
+
+        static_links = sorted(edges - covered)
+        return bootstrap, static_links, depth
+
+
+class Topology:
+    """Brings a :class:`TopologySpec` up on a node manager and wires the extra links"""
+
+    def __init__(self, spec: TopologySpec):
+        self.spec = spec
+        self.names = spec.node_names()
+        self.bootstrap, self.static_links, self.depth = spec.plan()
+        self.nodes: Dict[str, ClusterNode] = {}
+        # time.monotonic() when start() began, for discovery times measured from bring-up
+        self.started_at: Optional[float] = None
+
+    @property
+    def layers(self) -> int:
+        return max(self.depth.values(), default=-1) + 1
+
+    def node_specs(self, manager) -> List[NodeSpec]:
+        """Node specs with ports and IPs from the manager's allocator"""
+        specs = []
+        for index, name in enumerate(self.names):
+            spec = manager.node_spec(name, bootstrap_from=[self.names[parent] for parent in self.bootstrap[index]])
+            spec.log_level = self.spec.log_level
+            spec.profile = get_profile(self.spec.profile)
+            specs.append(spec)
+        return specs
+
+    def start(self, manager, max_workers: Optional[int] = None) -> Dict[str, ClusterNode]:
+        """Start every layer concurrently, then connect the static links"""
+        self.started_at = time.monotonic()
+        logger.info(
+            f"Starting {self.spec.shape} topology: {self.spec.size} nodes, {self.layers} layers, "
+            f"{len(self.static_links)} static links"
+        )
+        self.nodes = manager.start_cluster(self.node_specs(manager), max_workers=max_workers)
+        self.connect_static_links()
+        return self.nodes
+
+    def connect_static_links(self):
+        if not self.static_links:
+            return
+
+        multiaddrs = {name: node.multiaddr for name, node in self.nodes.items()}
+        peers_to_add: Dict[str, List[str]] = {}
+        for a, b in self.static_links:
+            peers_to_add.setdefault(self.names[b], []).append(multiaddrs[self.names[a]])
+
+        def connect(item: Tuple[str, List[str]]):
+            name, peers = item
+            self.nodes[name].client.add_peers(peers)
+
+        with ThreadPoolExecutor(max_workers=min(len(peers_to_add), 32)) as executor:
+            list(executor.map(connect, peers_to_add.items()))
+        logger.info(f"Connected {len(self.static_links)} static links")
+
+    def as_fixture(self) -> Dict[str, Any]:
+        return {name: node.as_fixture() for name, node in self.nodes.items()}
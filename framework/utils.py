@@ -1,43 +1,204 @@
+import contextvars
+import random
+import threading
 import time
 import logging
-from typing import Callable, Any
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Any, Dict, Iterator, Optional
+from .timing import timed
 
 logger = logging.getLogger(__name__)
 
+# Monotonic expiry time shared by all waits in the current deadline scope
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("wait_deadline", default=None)
+
+
+@dataclass
+class WaitResult:
+    """Outcome of a wait; truthy when the condition was met"""
+
+    success: bool
+    elapsed: float
+    attempts: int
+    description: str = "condition"
+    value: Any = None
+    error: Optional[BaseException] = None
+
+    def __bool__(self) -> bool:
+        return self.success
+
+
+@contextmanager
+def deadline_scope(timeout: float) -> Iterator[float]:
+    """Bound every wait inside the block by a shared deadline
+
+    Nested scopes can only shorten the deadline, never extend it. Yields the
+    monotonic expiry time.
+    """
+    expires_at = time.monotonic() + timeout
+    outer = _deadline.get()
+    if outer is not None:
+        expires_at = min(expires_at, outer)
+
+    token = _deadline.set(expires_at)
+    try:
+        yield expires_at
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time(timeout: Optional[float] = None) -> float:
+    """Seconds left for a wait of ``timeout`` under the current deadline scope"""
+    expires_at = _deadline.get()
+    remaining = float("inf") if expires_at is None else expires_at - time.monotonic()
+    if timeout is not None:
+        remaining = min(remaining, timeout)
+    return max(remaining, 0.0)
+
+
+def backoff_delays(
+        initial: float = 0.01,
+        maximum: float = 1.0,
+        factor: float = 2.0,
+        jitter: float = 0.2
+) -> Iterator[float]:
+    """Exponentially growing, capped delays with +/- ``jitter`` relative randomisation"""
+    delay = initial
+    while True:
+        yield delay * random.uniform(1 - jitter, 1 + jitter)
+        delay = min(delay * factor, maximum)
+
+
+@timed("utils.wait_until")
+def wait_until(
+        condition_func: Callable[[], Any],
+        timeout: float = 30,
+        description: str = "condition",
+        initial_interval: float = 0.01,
+        max_interval: float = 1.0,
+        cancel: Optional[threading.Event] = None
+) -> WaitResult:
+    """Poll a condition with exponential backoff until it returns a truthy value"""
+    start_time = time.monotonic()
+    expires_at = start_time + remaining_time(timeout)
+    delays = backoff_delays(initial_interval, max_interval)
+    attempts = 0
+    last_error = None
+
+    while True:
+        attempts += 1
+        try:
+            value = condition_func()
+            if value:
+                elapsed = time.monotonic() - start_time
+                logger.info(f"Condition met: {description} ({elapsed:.3f}s, {attempts} attempts)")
+                return WaitResult(True, elapsed, attempts, description, value=value)
+        except Exception as e:
+            last_error = e
+            logger.debug(f"Error checking condition '{description}': {e}")
+
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0 or (cancel is not None and cancel.is_set()):
+            break
+
+        delay = min(next(delays), remaining)
+        if cancel is not None:
+            if cancel.wait(delay):
+                break
+        else:
+            time.sleep(delay)
+
+    elapsed = time.monotonic() - start_time
+    if cancel is None or not cancel.is_set():
+        logger.error(f"Timeout waiting for condition: {description} ({elapsed:.3f}s)")
+    return WaitResult(False, elapsed, attempts, description, error=last_error)
+
+
 def wait_for_condition(
         condition_func: Callable[[], bool],
         timeout: int = 30,
-        interval: int = 2,
+        interval: float = 2,
         description: str = "condition"
-) -> bool:
-    """Wait for a condition to be true"""
-    start_time = time.time()
+) -> WaitResult:
+    """Wait for a condition to be true
 
-    while time.time() - start_time < timeout:
-        try:
-            if condition_func():
-                logger.info(f"Condition met: {description}")
-                return True
-        except Exception as e:
-            logger.debug(f"Error checking condition '{description}': {e}")
+    Polling starts within milliseconds and backs off up to ``interval`` seconds.
+    """
+    return wait_until(condition_func, timeout=timeout, description=description, max_interval=interval)
+
+
+def wait_for_all(
+        conditions: Dict[str, Callable[[], Any]],
+        timeout: float = 30,
+        max_interval: float = 1.0
+) -> Dict[str, WaitResult]:
+    """Wait for several conditions at once; returns one result per description"""
+    if not conditions:
+        return {}
+
+    with deadline_scope(timeout), ThreadPoolExecutor(max_workers=len(conditions)) as executor:
+        futures = {
+            description: executor.submit(
+                contextvars.copy_context().run,
+                wait_until, condition_func, timeout, description, 0.01, max_interval
+            )
+            for description, condition_func in conditions.items()
+        }
+        return {description: future.result() for description, future in futures.items()}
+
+
+def wait_for_any(
+        conditions: Dict[str, Callable[[], Any]],
+        timeout: float = 30,
+        max_interval: float = 1.0
+) -> WaitResult:
+    """Wait until the first of several conditions is met and stop polling the rest"""
+    if not conditions:
+        raise ValueError("wait_for_any needs at least one condition")
+
+    start_time = time.monotonic()
+    done = threading.Event()
+    winner: Dict[str, WaitResult] = {}
+    lock = threading.Lock()
+
+    def run(description: str, condition_func: Callable[[], Any]):
+        result = wait_until(condition_func, timeout, description, 0.01, max_interval, cancel=done)
+        if result:
+            with lock:
+                winner.setdefault("result", result)
+            done.set()
+
+    with deadline_scope(timeout), ThreadPoolExecutor(max_workers=len(conditions)) as executor:
+        for description, condition_func in conditions.items():
+            executor.submit(contextvars.copy_context().run, run, description, condition_func)
+
+    elapsed = time.monotonic() - start_time
+    if "result" in winner:
+        return winner["result"]
 
-        time.sleep(interval)
+    description = " or ".join(conditions)
+    logger.error(f"Timeout waiting for any condition: {description} ({elapsed:.3f}s)")
+    return WaitResult(False, elapsed, 0, description)
 
-    logger.error(f"Timeout waiting for condition: {description}")
-    return False
 
+@timed("utils.retry_on_exception")
 def retry_on_exception(
         func: Callable,
         max_attempts: int = 3,
         delay: float = 1.0,
-        exceptions: tuple = (Exception,)
+        exceptions: tuple = (Exception,),
+        max_delay: float = 10.0
 ) -> Any:
-    """Retry function execution on exceptions"""
+    """Retry function execution on exceptions with jittered exponential backoff"""
+    delays = backoff_delays(initial=delay, maximum=max_delay)
     for attempt in range(max_attempts):
         try:
             return func()
         except exceptions as e:
-            if attempt == max_attempts - 1:
+            remaining = remaining_time()
+            if attempt == max_attempts - 1 or remaining <= 0:
                 raise
             logger.warning(f"Attempt {attempt + 1} failed: {e}. Retrying...")
-            time.sleep(delay * (attempt + 1))
\ No newline at end of file
+            time.sleep(min(next(delays), remaining))
@@ -1,10 +1,15 @@
 import requests
 import logging
 import json
-from typing import Dict, Any, List, Optional
+import uuid
+from typing import Dict, Any, Iterable, Iterator, List, Optional
 from urllib.parse import quote
 from tenacity import retry, stop_after_attempt, wait_exponential
 from config.settings import settings
+from .decoding import WakuMessage, decode_messages, decode_store_page, loads
+from .payloads import Payload, encode_lightpush_body, encode_message_body
+from .subscriptions import ledger
+from .timing import record_retry_wait, timed
 
 logger = logging.getLogger(__name__)
 
@@ -19,9 +24,11 @@ class WakuClient:
             'Accept': 'application/json'
         })
 
+    @timed("waku_client.get_node_info")
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10)
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        before_sleep=record_retry_wait("waku_client.get_node_info")
     )
     def get_node_info(self) -> Dict[str, Any]:
         """Get node debug information"""
@@ -35,52 +42,210 @@ class WakuClient:
         node_info = self.get_node_info()
         return node_info.get('enrUri', '')
 
+    def get_peer_id(self) -> str:
+        """Extract the libp2p peer ID from the node's listen addresses"""
+        return self.peer_id_from_info(self.get_node_info())
+
+    @staticmethod
+    def peer_id_from_info(node_info: Dict[str, Any]) -> str:
+        """libp2p peer ID in the listen addresses of a ``get_node_info`` response"""
+        for address in node_info.get('listenAddresses', []):
+            if '/p2p/' in address:
+                return address.rsplit('/p2p/', 1)[1]
+        return ''
+
     def subscribe_to_topic(self, topics: List[str]) -> bool:
         """Subscribe to relay topics"""
         url = f"{self.base_url}{settings.SUBSCRIPTIONS_ENDPOINT}"
         response = self.session.post(url, json=topics)
         response.raise_for_status()
+        ledger.add(self.base_url, "relay", topics)
+        return response.status_code == 200
+
+    def unsubscribe_from_topic(self, topics: List[str]) -> bool:
+        """Unsubscribe from relay topics"""
+        url = f"{self.base_url}{settings.SUBSCRIPTIONS_ENDPOINT}"
+        response = self.session.delete(url, json=topics)
+        response.raise_for_status()
+        ledger.remove(self.base_url, "relay", topics)
         return response.status_code == 200
 
+    def reset_state(self, topics: Iterable[str] = ()):
+        """Drain cached messages and drop subscriptions so a node can be reused
+
+        Covers ``topics`` plus every relay and filter topic any client
+        subscribed on this node, as recorded in the subscription ledger.
+        """
+        subscribed = ledger.pop(self.base_url)
+        relay_topics = sorted(set(topics) | set(subscribed.get("relay", [])))
+        for topic in relay_topics:
+            try:
+                self.get_messages(topic)
+            except requests.HTTPError:
+                pass  # Not subscribed, nothing cached
+        if relay_topics:
+            self.unsubscribe_from_topic(relay_topics)
+
+        for topic in subscribed.get("filter", []):
+            try:
+                self.get_filter_messages(topic)
+            except requests.HTTPError:
+                pass
+        if subscribed.get("filter"):
+            self.filter_unsubscribe_all()
+        logger.info(f"Reset node state at {self.base_url}: {len(relay_topics)} relay topics, "
+                    f"{len(subscribed.get('filter', []))} filter topics")
+
     def publish_message(
             self,
-            payload: str,
+            payload: Payload,
             content_topic: str,
             timestamp: Optional[int] = None
     ) -> bool:
-        """Publish a message to a topic"""
+        """Publish a message to a topic
+
+        ``payload`` is base64 text or raw bytes, which are encoded once.
+        """
         url = f"{self.base_url}{settings.MESSAGES_ENDPOINT}"
+        body = encode_message_body(payload, content_topic, timestamp)
+        response = self.session.post(url, data=body)
+        response.raise_for_status()
+        return response.status_code == 200
 
-        message_data = {
-            "payload": payload,
-            "contentTopic": content_topic
-        }
+    def get_messages(self, content_topic: str) -> List[WakuMessage]:
+        """Retrieve messages for a topic"""
+        encoded_topic = quote(content_topic, safe='')
+        url = f"{self.base_url}{settings.MESSAGES_ENDPOINT}/{encoded_topic}"
+        response = self.session.get(url)
+        response.raise_for_status()
+        return decode_messages(response.content)
 
-        if timestamp:
-            message_data["timestamp"] = timestamp
+    def lightpush_message(
+            self,
+            payload: Payload,
+            content_topic: str,
+            timestamp: Optional[int] = None,
+            pubsub_topic: str = settings.DEFAULT_PUBSUB_TOPIC
+    ) -> bool:
+        """Publish through the node's lightpush service node instead of relay"""
+        url = f"{self.base_url}{settings.LIGHTPUSH_ENDPOINT}"
+        body = encode_lightpush_body(payload, content_topic, pubsub_topic, timestamp)
+        response = self.session.post(url, data=body)
+        response.raise_for_status()
+        return response.status_code == 200
 
-        response = self.session.post(url, json=message_data)
+    def _filter_request(self, method: str, path: str, body: Dict[str, Any]) -> bool:
+        body["requestId"] = str(uuid.uuid4())
+        response = self.session.request(method, f"{self.base_url}{path}", json=body)
         response.raise_for_status()
         return response.status_code == 200
 
-    def get_messages(self, content_topic: str) -> List[Dict[str, Any]]:
-        """Retrieve messages for a topic"""
+    def filter_subscribe(self, content_topics: List[str], pubsub_topic: str = settings.DEFAULT_PUBSUB_TOPIC) -> bool:
+        """Subscribe the node to content topics on its filter service node"""
+        body: Dict[str, Any] = {"contentFilters": content_topics}
+        if pubsub_topic:
+            body["pubsubTopic"] = pubsub_topic
+        subscribed = self._filter_request("POST", settings.FILTER_SUBSCRIPTIONS_ENDPOINT, body)
+        ledger.add(self.base_url, "filter", content_topics)
+        return subscribed
+
+    def filter_unsubscribe(self, content_topics: List[str], pubsub_topic: str = settings.DEFAULT_PUBSUB_TOPIC) -> bool:
+        """Remove filter subscriptions for content topics"""
+        body: Dict[str, Any] = {"contentFilters": content_topics}
+        if pubsub_topic:
+            body["pubsubTopic"] = pubsub_topic
+        unsubscribed = self._filter_request("DELETE", settings.FILTER_SUBSCRIPTIONS_ENDPOINT, body)
+        ledger.remove(self.base_url, "filter", content_topics)
+        return unsubscribed
+
+    def filter_unsubscribe_all(self) -> bool:
+        """Remove every filter subscription of the node"""
+        unsubscribed = self._filter_request("DELETE", f"{settings.FILTER_SUBSCRIPTIONS_ENDPOINT}/all", {})
+        ledger.remove(self.base_url, "filter")
+        return unsubscribed
+
+    def get_filter_messages(self, content_topic: str) -> List[WakuMessage]:
+        """Retrieve messages pushed to the node by filter for a topic"""
         encoded_topic = quote(content_topic, safe='')
-        url = f"{self.base_url}{settings.MESSAGES_ENDPOINT}/{encoded_topic}"
+        url = f"{self.base_url}{settings.FILTER_MESSAGES_ENDPOINT}/{encoded_topic}"
         response = self.session.get(url)
         response.raise_for_status()
-        return response.json()
+        return decode_messages(response.content)
 
+    def store_pages(
+            self,
+            content_topics: List[str],
+            page_size: int = settings.STORE_PAGE_SIZE,
+            ascending: bool = True,
+            start_time: Optional[int] = None,
+            end_time: Optional[int] = None,
+            peer_addr: Optional[str] = None
+    ) -> Iterator[List[WakuMessage]]:
+        """Query a store node page by page, following the cursor
+
+        Only one page is held at a time. ``peer_addr`` is the multiaddr of the
+        store node to query; without it the node uses its configured store peer.
+        Times are Unix nanoseconds.
+        """
+        url = f"{self.base_url}{settings.STORE_ENDPOINT}"
+        params: Dict[str, Any] = {
+            "contentTopics": ",".join(content_topics),
+            "pageSize": page_size,
+            "ascending": "true" if ascending else "false"
+        }
+        if start_time is not None:
+            params["startTime"] = start_time
+        if end_time is not None:
+            params["endTime"] = end_time
+        if peer_addr:
+            params["peerAddr"] = peer_addr
+
+        cursor: Optional[Dict[str, Any]] = None
+        while True:
+            response = self.session.get(url, params={**params, **self._cursor_params(cursor)})
+            response.raise_for_status()
+            messages, cursor = decode_store_page(response.content)
+            if messages:
+                yield messages
+            if cursor is None:
+                return
+
+    @staticmethod
+    def _cursor_params(cursor: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """The cursor's fields go back as query parameters of the next request"""
+        if not cursor:
+            return {}
+        # The message digest may be wrapped as {"data": "<base64>"}
+        return {
+            key: value.get("data") if isinstance(value, dict) else value
+            for key, value in cursor.items()
+            if value is not None
+        }
+
+    def query_store(self, content_topics: List[str], **kwargs) -> Iterator[WakuMessage]:
+        """Stream stored messages one by one; takes the options of :meth:`store_pages`"""
+        for page in self.store_pages(content_topics, **kwargs):
+            yield from page
+
+    @timed("waku_client.get_peers")
     @retry(
         stop=stop_after_attempt(10),
-        wait=wait_exponential(multiplier=2, min=5, max=30)
+        wait=wait_exponential(multiplier=2, min=5, max=30),
+        before_sleep=record_retry_wait("waku_client.get_peers")
     )
     def get_peers(self) -> List[Dict[str, Any]]:
         """Get connected peers"""
         url = f"{self.base_url}{settings.PEERS_ENDPOINT}"
         response = self.session.get(url)
         response.raise_for_status()
-        return response.json()
+        return loads(response.content)
+
+    def add_peers(self, multiaddrs: List[str]) -> bool:
+        """Ask the node to connect to the given peers"""
+        url = f"{self.base_url}{settings.PEERS_ENDPOINT}"
+        response = self.session.post(url, json=multiaddrs)
+        response.raise_for_status()
+        return response.status_code == 200
 
     def wait_for_peer_connection(self, expected_peer_id: str, timeout: int = 60) -> bool:
         """Wait for a specific peer to be connected"""
@@ -0,0 +1,75 @@
+import subprocess
+import sys
+import pytest
+import allure
+from framework.allocator import FIRST_HOST_OFFSET, ResourceAllocator
+
+def dead_pid() -> int:
+    """Pid of a process that has already exited"""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+@allure.epic("Waku Node Testing")
+@allure.feature("Resource Allocation")
+@pytest.mark.basic
+class TestResourceAllocator:
+    """Port, subnet and IP leases shared between workers through the lease file"""
+
+    @allure.story("Stable Non-Colliding Leases")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_leases_are_stable_and_distinct(self, tmp_path):
+        """Test that a key keeps its ports and IP and that different keys never collide"""
+        allocator = ResourceAllocator(lease_dir=str(tmp_path))
+
+        node1 = allocator.allocate_ports("node1")
+        node2 = allocator.allocate_ports("node2")
+        assert allocator.allocate_ports("node1") == node1
+        assert not set(node1.values()) & set(node2.values())
+
+        subnet, gateway = allocator.allocate_subnet()
+        ip1, ip2 = allocator.allocate_ip("node1"), allocator.allocate_ip("node2")
+        assert gateway.endswith(".1")
+        assert ip1 != ip2 and allocator.allocate_ip("node1") == ip1
+        assert int(ip1.rsplit(".", 1)[1]) >= FIRST_HOST_OFFSET
+
+    @allure.story("Lease Release Isolation")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_release_frees_only_own_leases(self, tmp_path):
+        """Test that releasing one allocator leaves another's leases in place and frees its own"""
+        first = ResourceAllocator(lease_dir=str(tmp_path), worker_id="gw0")
+        second = ResourceAllocator(lease_dir=str(tmp_path), worker_id="gw1")
+        first_ports, first_subnet = first.allocate_ports("node"), first.allocate_subnet()
+        second_ports, second_subnet = second.allocate_ports("node"), second.allocate_subnet()
+        assert first_ports != second_ports and first_subnet != second_subnet
+
+        first.release_all()
+        with second._leases() as leases:
+            owners = {lease["owner"] for table in leases.values() for lease in table.values()}
+        assert owners == {second.owner}
+
+        third = ResourceAllocator(lease_dir=str(tmp_path), worker_id="gw2")
+        assert third.allocate_ports("other") == first_ports, "Released port block was not reused"
+        assert third.allocate_subnet() == first_subnet, "Released subnet was not reused"
+
+    @allure.story("Stale And Persistent Leases")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_dead_process_leases(self, tmp_path):
+        """Test that leases of dead processes are reclaimed, except persistent ones kept for their worker"""
+        pid = dead_pid()
+        owner = ResourceAllocator(lease_dir=str(tmp_path), worker_id="gw0", persistent=True)
+        warm_ports = owner.allocate_ports("warm")
+        owner.allocate_ports("cold")
+        with owner._leases() as leases:
+            for lease in leases["ports"].values():
+                lease["pid"] = pid
+                lease["persistent"] = lease["key"] == "warm"
+
+        other_worker = ResourceAllocator(lease_dir=str(tmp_path), worker_id="gw1", persistent=True)
+        assert other_worker.allocate_ports("warm") != warm_ports
+        next_run = ResourceAllocator(lease_dir=str(tmp_path), worker_id="gw0", persistent=True)
+        assert next_run.allocate_ports("warm") == warm_ports
+
+        with next_run._leases() as leases:
+            keys = sorted(lease["key"] for lease in leases["ports"].values())
+        assert keys == ["warm", "warm"], "Stale non-persistent lease was not reclaimed"
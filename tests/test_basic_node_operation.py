@@ -1,7 +1,10 @@
 import pytest
 import allure
 import time
+import requests
 from config.settings import settings
+from framework.async_waku_client import run_on_cluster
+from framework.waku_client import WakuClient
 
 @allure.epic("Waku Node Testing")
 @allure.feature("Basic Node Operations")
@@ -55,9 +58,28 @@ class TestBasicNodeOperation:
 
         # Make sure at least one message has the expected payload and topic
         found = any(
-            msg.get("payload") == settings.DEFAULT_MESSAGE and
-            msg.get("contentTopic") == settings.DEFAULT_TOPIC
+            msg.payload == settings.DEFAULT_MESSAGE and
+            msg.content_topic == settings.DEFAULT_TOPIC
             for msg in messages
         )
 
         assert found, f"Message with payload '{settings.DEFAULT_MESSAGE}' on topic '{settings.DEFAULT_TOPIC}' not found"
+
+    @allure.story("Node State Reset For Reuse")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_reset_state_drops_every_subscription(self, single_node):
+        """Test that a reset drops topics subscribed by any client, not only RESET_TOPICS"""
+        topics = ["/reset-test/1/sync/proto", "/reset-test/1/async/proto"]
+
+        with allure.step("Subscribe through other clients and publish to the topics"):
+            WakuClient(single_node['base_url']).subscribe_to_topic(topics[:1])
+            run_on_cluster([single_node['base_url']], "subscribe_to_topic", topics[1:])
+            for topic in topics:
+                single_node['client'].publish_message(settings.DEFAULT_MESSAGE, topic, int(time.time() * 1e9))
+
+        with allure.step("Reset the node"):
+            single_node['client'].reset_state()
+
+        for topic in topics + [settings.DEFAULT_TOPIC]:
+            with pytest.raises(requests.HTTPError):
+                single_node['client'].get_messages(topic)
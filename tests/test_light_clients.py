@@ -0,0 +1,65 @@
+import pytest
+import allure
+import json
+from config.settings import settings
+from framework.propagation import light_client_benchmark
+from framework.utils import wait_for_condition
+
+@allure.epic("Waku Node Testing")
+@allure.feature("Light Clients")
+@pytest.mark.advanced
+class TestLightClients:
+    """Lightpush and filter through a service node"""
+
+    @allure.story("Lightpush To Filter Subscriber")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_lightpush_reaches_filter_subscriber(self, light_nodes):
+        """Test that a message lightpushed by one light node is delivered by filter to another"""
+        sender, receiver = list(light_nodes['light'].values())[:2]
+        content_topic = "/test/1/light-smoke/proto"
+
+        with allure.step("Subscribe the receiving light node through filter"):
+            assert receiver['client'].filter_subscribe([content_topic]), "Filter subscription failed"
+            light_nodes['relay']['client'].subscribe_to_topic([content_topic])
+
+        with allure.step("Lightpush a message from the sending light node"):
+            assert sender['client'].lightpush_message(settings.DEFAULT_MESSAGE, content_topic), "Lightpush failed"
+
+        received = []
+
+        def filter_delivered():
+            received.extend(receiver['client'].get_filter_messages(content_topic))
+            return bool(received)
+
+        assert wait_for_condition(filter_delivered, timeout=settings.MESSAGE_PROPAGATION_TIMEOUT), \
+            "Message was not delivered through filter"
+        assert received[0].payload == settings.DEFAULT_MESSAGE, f"Unexpected payload: {received[0]}"
+
+        relayed = light_nodes['relay']['client'].get_messages(content_topic)
+        assert any(message.payload == settings.DEFAULT_MESSAGE for message in relayed), \
+            "Lightpushed message did not reach the service node's relay peer"
+        receiver['client'].filter_unsubscribe([content_topic])
+
+    @allure.story("Light Client Load")
+    @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.slow
+    @pytest.mark.benchmark
+    def test_light_client_load(self, light_nodes, resource_sampler, benchmark_results):
+        """Measure push latency, filter delivery latency and service node resources under many light clients"""
+        light_urls = {name: node['base_url'] for name, node in light_nodes['light'].items()}
+
+        with allure.step("Run simulated light clients through the service node"):
+            summary = light_client_benchmark(
+                light_urls,
+                clients=20,
+                messages_per_client=20,
+                rate=5,
+                sampler=resource_sampler,
+                service_container=light_nodes['service']['container'].name
+            )
+
+            allure.attach(json.dumps(summary, indent=2), "Light client benchmark", allure.attachment_type.JSON)
+            benchmark_results.record(summary, "light_clients", topology="service+light")
+
+        assert summary["push"]["errors"] == 0, f"Lightpush requests failed: {summary['push']}"
+        assert summary["filter_delivery"]["lost"] == 0, f"Filter lost messages: {summary['filter_delivery']}"
@@ -0,0 +1,50 @@
+import math
+import pytest
+import allure
+from framework.metrics import MetricsCollector, parse_prometheus_text
+
+@allure.epic("Waku Node Testing")
+@allure.feature("Node Metrics")
+@pytest.mark.basic
+class TestPrometheusParser:
+    """Parsing of the Prometheus text exposition format served by nwaku"""
+
+    @allure.story("Exposition Lines")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_parse_names_labels_and_values(self):
+        """Test plain, labelled, timestamped and special values and skipped lines"""
+        text = [
+            "# HELP waku_peers Number of peers",
+            "# TYPE waku_peers gauge",
+            "waku_peers 4",
+            'libp2p_network_bytes_total{direction="in"} 1.5e3',
+            'waku_node_errors{type="decode failure",origin="a}b"} 2 1700000000000',
+            "process_start_time_seconds 1.7e9 1700000000000",
+            'waku_histogram_bucket{le="+Inf"} +Inf',
+            "",
+            "garbage_without_value",
+            "waku_bad_value abc"
+        ]
+
+        parsed = list(parse_prometheus_text(text))
+
+        assert parsed[:4] == [
+            ("waku_peers", "waku_peers", 4.0),
+            ("libp2p_network_bytes_total", 'libp2p_network_bytes_total{direction="in"}', 1500.0),
+            ("waku_node_errors", 'waku_node_errors{type="decode failure",origin="a}b"}', 2.0),
+            ("process_start_time_seconds", "process_start_time_seconds", 1.7e9)
+        ]
+        assert parsed[4][:2] == ("waku_histogram_bucket", 'waku_histogram_bucket{le="+Inf"}')
+        assert math.isinf(parsed[4][2])
+        assert len(parsed) == 5
+
+    @allure.story("Snapshot Delta")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_delta_between_snapshots(self):
+        """Test the per-series change between two scrapes"""
+        before = {"node1": {"waku_peers": 1.0, "bytes": 100.0}}
+        after = {"node1": {"waku_peers": 3.0, "bytes": 250.0, "new": 1.0}, "node2": {"bytes": 5.0}}
+
+        delta = MetricsCollector.delta(before, after)
+
+        assert delta == {"node1": {"waku_peers": 2.0, "bytes": 150.0, "new": 1.0}, "node2": {"bytes": 5.0}}
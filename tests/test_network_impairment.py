@@ -0,0 +1,71 @@
+import pytest
+import allure
+import json
+from config.settings import settings
+from framework.async_waku_client import run_on_cluster
+from framework.impairment import Impairment
+from framework.propagation import PropagationTracker, impairment_sweep
+
+@allure.epic("Waku Node Testing")
+@allure.feature("Network Impairment")
+@pytest.mark.advanced
+class TestNetworkImpairment:
+    """Relay behaviour over delayed and lossy links"""
+
+    @allure.story("Impairment Applies And Reverts")
+    @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.slow
+    def test_delay_applies_and_reverts(self, two_nodes, network_impairment):
+        """Test that a delay on node2's link slows delivery to node1 and that clearing it restores the link"""
+        node1_url = two_nodes['node1']['base_url']
+        node2_url = two_nodes['node2']['base_url']
+        run_on_cluster([node1_url, node2_url], "subscribe_to_topic", [settings.DEFAULT_TOPIC])
+
+        def median_latency_ms() -> float:
+            tracker = PropagationTracker({"node1": node1_url}).start()
+            tracker.publish(node2_url, count=10, rate=20)
+            result = tracker.stop()
+            assert result.lost("node1") == 0, f"Messages lost: {result.node_summary('node1')}"
+            return result.node_summary("node1")["p50_ms"]
+
+        with allure.step("Delay node2's link to node1 by 200ms"):
+            network_impairment.apply(two_nodes['node2']['container'], Impairment(delay_ms=200), peers=[two_nodes['node1']['ip']])
+            impaired = median_latency_ms()
+
+        with allure.step("Clear the impairment"):
+            network_impairment.clear(two_nodes['node2']['container'])
+            cleared = median_latency_ms()
+
+        allure.attach(
+            json.dumps({"impaired_p50_ms": impaired, "cleared_p50_ms": cleared}, indent=2),
+            "Delivery latency",
+            allure.attachment_type.JSON
+        )
+        assert impaired >= 180, f"Impaired link delivered in {impaired}ms"
+        assert cleared < 100, f"Link still slow after clearing: {cleared}ms"
+
+    @allure.story("Impairment Sweep")
+    @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.slow
+    @pytest.mark.benchmark
+    def test_impairment_sweep(self, two_nodes, network_impairment, benchmark_results):
+        """Measure how relay latency and delivery ratio degrade as links get worse"""
+        node1_url = two_nodes['node1']['base_url']
+        node2_url = two_nodes['node2']['base_url']
+        run_on_cluster([node1_url, node2_url], "subscribe_to_topic", [settings.DEFAULT_TOPIC])
+
+        with allure.step("Publish from node1 to node2 at each impairment level"):
+            rows = impairment_sweep(
+                network_impairment,
+                [two_nodes['node1'], two_nodes['node2']],
+                node1_url,
+                {"node2": node2_url}
+            )
+
+            allure.attach(json.dumps(rows, indent=2), "Impairment sweep", allure.attachment_type.JSON)
+            for row in rows:
+                benchmark_results.record(row, f"impairment_sweep.delay_{row['delay_ms']:g}ms", topology="pair")
+
+        assert rows[0]["delivery_ratio"] == 1.0, f"Messages lost on unimpaired links: {rows[0]}"
+        worst = rows[-1]
+        assert worst["delivery_p50_ms"] >= worst["delay_ms"] - worst["jitter_ms"], f"Delay not applied: {worst}"
@@ -0,0 +1,65 @@
+import pytest
+import allure
+from config.settings import settings
+from framework.async_waku_client import run_on_cluster
+from framework.peer_monitor import PeerGraphMonitor, wait_for_relay_mesh
+from framework.propagation import PropagationTracker
+from framework.topology import SHAPES
+
+TOPOLOGIES = [{"shape": shape, "size": 6, "seed": 7} for shape in SHAPES]
+
+@allure.epic("Waku Node Testing")
+@allure.feature("Network Topologies")
+@pytest.mark.advanced
+@pytest.mark.slow
+@pytest.mark.parametrize("waku_topology", TOPOLOGIES, indirect=True, ids=SHAPES)
+class TestNetworkTopology:
+    """Test suite for discovery and relay across generated cluster layouts"""
+
+    @allure.story("Peer Discovery Across Topology")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_peer_graph_converges(self, waku_topology):
+        """Test that every node finds a peer and the nodes form one connected graph within the startup SLO"""
+        nodes = {name: node.base_url for name, node in waku_topology.nodes.items()}
+
+        with allure.step("Wait for peer graph to converge"):
+            # Discovery times count from the start of the cluster bring-up
+            with PeerGraphMonitor(nodes, since=waku_topology.started_at) as monitor:
+                converged = monitor.wait_for_convergence(settings.PEER_CONNECTION_TIMEOUT)
+                monitor.attach_to_allure()
+
+        summary = monitor.summary()
+        assert converged, f"Peer graph did not converge: {summary}"
+        assert summary["time_to_convergence_s"] <= settings.DISCOVERY_CONVERGENCE_SLO, \
+            f"Convergence took {summary['time_to_convergence_s']}s from bring-up, SLO is {settings.DISCOVERY_CONVERGENCE_SLO}s: {summary}"
+
+    @allure.story("Relay Across Topology")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_relay_reaches_every_node(self, waku_topology, benchmark_results):
+        """Test that messages published on one node reach all others"""
+        publisher, *subscribers = waku_topology.nodes.values()
+
+        with allure.step("Subscribe every node to topic"):
+            results = run_on_cluster(
+                [node.base_url for node in waku_topology.nodes.values()],
+                "subscribe_to_topic",
+                [settings.DEFAULT_TOPIC]
+            )
+            assert all(result is True for result in results.values()), \
+                f"Failed to subscribe nodes to topic: {results}"
+
+        with allure.step("Wait for the relay mesh"):
+            assert wait_for_relay_mesh(list(results)), "Not every node has a relay peer"
+
+        with allure.step("Publish stamped messages and track delivery"):
+            tracker = PropagationTracker({node.name: node.base_url for node in subscribers}).start()
+            tracker.publish(publisher.base_url, count=20, rate=20)
+            result = tracker.stop()
+
+            result.attach_to_allure()
+            label = f"{waku_topology.spec.shape}-{len(waku_topology.nodes)}"
+            for node in subscribers:
+                benchmark_results.record(result.node_summary(node.name), "topology_relay", topology=label)
+
+        lost = {node.name: result.lost(node.name) for node in subscribers if result.lost(node.name)}
+        assert not lost, f"Messages lost: {lost}"
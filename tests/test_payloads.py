@@ -0,0 +1,33 @@
+import base64
+import json
+import pytest
+import allure
+from framework.payloads import encode_lightpush_body, encode_message_body
+
+@allure.epic("Waku Node Testing")
+@allure.feature("Request Payloads")
+@pytest.mark.basic
+class TestPayloadEncoding:
+    """Request bodies built without the json= round trip"""
+
+    @allure.story("String Payloads Are Escaped")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_str_payload_is_valid_json(self):
+        """Test that quotes, backslashes and non-ASCII characters in a str payload survive encoding"""
+        payload = 'say "hi" \\ naïve ✓'
+        body = json.loads(encode_message_body(payload, "/test/1/quote\"d/proto", timestamp=42))
+
+        assert body == {"payload": payload, "contentTopic": "/test/1/quote\"d/proto", "timestamp": 42}
+        assert json.loads(encode_lightpush_body(payload, "/test/1/a/proto", "/waku/2/rs/0/0")) == {
+            "pubsubTopic": "/waku/2/rs/0/0",
+            "message": {"payload": payload, "contentTopic": "/test/1/a/proto"}
+        }
+
+    @allure.story("Binary Payloads Are Base64 Encoded")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_bytes_payload_is_base64(self):
+        """Test that bytes-like payloads are base64-encoded exactly once"""
+        raw = bytes(range(256))
+        for payload in (raw, bytearray(raw), memoryview(raw)):
+            body = json.loads(encode_message_body(payload, "/test/1/a/proto"))
+            assert base64.b64decode(body["payload"]) == raw
@@ -0,0 +1,98 @@
+import pytest
+import allure
+from framework.results import ResultStore, flatten, welch_t_test
+
+@allure.epic("Waku Node Testing")
+@allure.feature("Benchmark Result History")
+@pytest.mark.basic
+class TestResultStore:
+    """Statistics and run comparison behind the benchmark regression CLI"""
+
+    @allure.story("Welch's t-test")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_welch_t_test_matches_reference(self):
+        """Test t, degrees of freedom and p-value against a known result"""
+        t, df, p = welch_t_test([1, 2, 3, 4, 5], [2, 4, 6, 8, 10])
+
+        assert t == pytest.approx(1.8974, abs=1e-4)
+        assert df == pytest.approx(5.8824, abs=1e-4)
+        assert p == pytest.approx(0.1075, abs=1e-4)
+
+    @allure.story("Welch's t-test Edge Cases")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_welch_t_test_constant_and_small_groups(self):
+        """Test constant groups and groups too small for a variance"""
+        assert welch_t_test([3, 3, 3], [3, 3])[2] == 1.0
+        assert welch_t_test([3, 3, 3], [4, 4])[2] == 0.0
+        with pytest.raises(ValueError):
+            welch_t_test([1], [1, 2])
+
+    @allure.story("Regression Direction")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_compare_flags_only_changes_for_the_worse(self, tmp_path):
+        """Test that latency growth and throughput drops regress, and the opposite moves do not"""
+        store = ResultStore(str(tmp_path / "results.db"))
+        store.open_run("base", image="wakuorg/nwaku:v0.24.0")
+        store.open_run("new", image="wakuorg/nwaku:v0.25.0")
+        baseline = [10.0, 10.5, 9.5, 10.2, 9.8, 10.1]
+        slower = [value * 1.5 for value in baseline]
+        for before, after in zip(baseline, slower):
+            store.record("base", "relay.p50_ms", before)
+            store.record("new", "relay.p50_ms", after)
+            store.record("base", "relay.throughput_msgs_per_s", after)
+            store.record("new", "relay.throughput_msgs_per_s", before)
+            store.record("base", "sweep.delivery_ratio", before)
+            store.record("new", "sweep.delivery_ratio", after)
+            store.record("base", "publish.p95_ms", before)
+            store.record("new", "publish.p95_ms", before * 1.01)
+        store.flush()
+
+        rows = {row["metric"]: row for row in store.compare("image=v0.24.0", "image=v0.25.0")}
+        store.close()
+
+        assert rows["relay.p50_ms"]["regression"], "Slower latency was not flagged"
+        assert rows["relay.throughput_msgs_per_s"]["regression"], "Lower throughput was not flagged"
+        assert not rows["sweep.delivery_ratio"]["regression"], "Higher delivery ratio was flagged"
+        assert not rows["publish.p95_ms"]["regression"], "A 1% change passed the minimum change"
+
+    @allure.story("Zero Baselines")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_compare_flags_growth_from_zero(self, tmp_path):
+        """Test that losses appearing on a loss-free baseline regress, including loss ratios"""
+        store = ResultStore(str(tmp_path / "results.db"))
+        store.open_run("base")
+        store.open_run("new")
+        for lost in (28, 30, 31, 29, 32, 30):
+            store.record("base", "relay.lost", 0)
+            store.record("new", "relay.lost", lost)
+            store.record("base", "relay.loss_ratio", 0.0)
+            store.record("new", "relay.loss_ratio", lost / 100)
+            store.record("base", "relay.errors", 0)
+            store.record("new", "relay.errors", 0)
+        store.flush()
+
+        rows = {row["metric"]: row for row in store.compare("run=base", "run=new")}
+        store.close()
+
+        assert rows["relay.lost"]["regression"], "Messages lost on a loss-free baseline were not flagged"
+        assert rows["relay.loss_ratio"]["regression"], "A higher loss ratio was not flagged"
+        assert not rows["relay.errors"]["regression"], "An unchanged zero was flagged"
+        assert rows["relay.errors"]["change"] == 0.0
+
+    @allure.story("Run Selectors")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_selectors_and_flatten(self, tmp_path):
+        """Test run, commit, image and latest selectors and summary flattening"""
+        store = ResultStore(str(tmp_path / "results.db"))
+        store.open_run("r1", git_commit="abc123", image="wakuorg/nwaku:v0.24.0", backend="docker")
+        store.record_summary("r1", {"relay": {"p50_ms": 1.5, "ok": True, "shape": "star"}, "lost": 0})
+        store.flush()
+
+        for selector in ("run=r1", "r1", "commit=abc", "image=v0.24.0", "image=wakuorg/nwaku:v0.24.0", "latest"):
+            assert store.samples(selector) == {"relay.p50_ms": [1.5], "lost": [0.0]}, selector
+        assert store.samples("image=v0.25.0") == {}
+        with pytest.raises(ValueError):
+            store.samples("branch=main")
+        store.close()
+
+        assert dict(flatten({"a": {"b": 1, "c": float("nan")}, "d": None})) == {"a.b": 1.0}
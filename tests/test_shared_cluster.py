@@ -0,0 +1,76 @@
+import pytest
+import allure
+from config.settings import settings
+from framework.allocator import ResourceAllocator
+from framework.async_waku_client import run_on_cluster
+from framework.peer_monitor import PeerGraphMonitor
+
+@allure.epic("Waku Node Testing")
+@allure.feature("Shared Cluster")
+@pytest.mark.basic
+class TestSharedCluster:
+    """Read-only checks against the cluster shared by all workers"""
+
+    @allure.story("Node Info On Every Node")
+    @allure.severity(allure.severity_level.CRITICAL)
+    @pytest.mark.smoke
+    def test_every_node_reports_info(self, shared_cluster):
+        """Test that every shared node answers with its debug information"""
+        with allure.step("Get debug information from every node"):
+            results = run_on_cluster(
+                [node.base_url for node in shared_cluster.values()],
+                "get_node_info"
+            )
+
+        failed = {url: result for url, result in results.items() if not isinstance(result, dict)}
+        assert not failed, f"Nodes failed to report info: {failed}"
+
+        enr_uris = {result.get("enrUri") for result in results.values()}
+        assert len(enr_uris) == len(shared_cluster), "Nodes report duplicate ENRs"
+
+    @allure.story("Shared Cluster Peer Graph")
+    @allure.severity(allure.severity_level.NORMAL)
+    @pytest.mark.slow
+    def test_shared_nodes_are_connected(self, shared_cluster):
+        """Test that the shared nodes form one connected peer graph"""
+        nodes = {name: node.base_url for name, node in shared_cluster.items()}
+
+        with allure.step("Wait for peer graph to converge"):
+            with PeerGraphMonitor(nodes) as monitor:
+                converged = monitor.wait_for_convergence(settings.PEER_CONNECTION_TIMEOUT)
+                monitor.attach_to_allure()
+
+        assert converged, f"Shared cluster is not connected: {monitor.summary()}"
+
+    @allure.story("Module Cluster Beside Shared Cluster")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_module_cluster_beside_shared_cluster(self, shared_cluster, two_nodes):
+        """Test that a module's nodes run next to the shared cluster without sharing endpoints"""
+        shared_urls = {node.base_url for node in shared_cluster.values()}
+        module_urls = {node['base_url'] for node in two_nodes.values()}
+        assert not shared_urls & module_urls, "Module nodes reuse shared cluster endpoints"
+
+        with allure.step("Get debug information from every node of both clusters"):
+            results = run_on_cluster(sorted(shared_urls | module_urls), "get_node_info")
+
+        failed = {url: result for url, result in results.items() if not isinstance(result, dict)}
+        assert not failed, f"Nodes failed to report info: {failed}"
+
+    @allure.story("Separate Leases For Shared And Module Clusters")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_shared_and_module_leases_are_separate(self, tmp_path):
+        """Test that allocators in one process get their own subnet and keep their leases on the other's release"""
+        shared = ResourceAllocator(lease_dir=str(tmp_path), scope="shared")
+        module = ResourceAllocator(lease_dir=str(tmp_path))
+
+        shared_subnet, _ = shared.allocate_subnet()
+        module_subnet, _ = module.allocate_subnet()
+        assert shared_subnet != module_subnet, "Shared and module clusters got the same subnet"
+        shared_ports = shared.allocate_ports("waku_shared1")
+        assert module.allocate_ports("waku_node1") != shared_ports
+
+        module.release_all()
+        with shared._leases() as leases:
+            owners = {lease["owner"] for table in leases.values() for lease in table.values()}
+        assert owners == {shared.owner}, "Releasing the module cluster freed shared cluster leases"
+        assert shared.allocate_ports("waku_shared1") == shared_ports
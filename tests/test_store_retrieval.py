@@ -0,0 +1,54 @@
+import pytest
+import allure
+import json
+from config.settings import settings
+from framework.async_waku_client import run_on_cluster
+from framework.peer_monitor import PeerGraphMonitor
+from framework.propagation import PropagationTracker
+from framework.utils import wait_until
+
+@allure.epic("Waku Node Testing")
+@allure.feature("Store Retrieval")
+@pytest.mark.advanced
+class TestStoreRetrieval:
+    """Message retrieval through the store protocol"""
+
+    @allure.story("Store Holds More Than The Relay Cache")
+    @allure.severity(allure.severity_level.CRITICAL)
+    @pytest.mark.slow
+    def test_store_returns_every_message(self, store_nodes, benchmark_results):
+        """Test that a store node returns every published message, beyond the 100-message relay cache"""
+        relay_url = store_nodes['relay']['base_url']
+        nodes = {"relay": relay_url, "store": store_nodes['store']['base_url']}
+
+        with allure.step("Wait for the nodes to connect"):
+            with PeerGraphMonitor(nodes) as monitor:
+                assert monitor.wait_for_convergence(settings.PEER_CONNECTION_TIMEOUT), "Nodes failed to connect"
+
+        with allure.step("Publish 1000 stamped messages from the relay node"):
+            run_on_cluster(list(nodes.values()), "subscribe_to_topic", [settings.DEFAULT_TOPIC])
+            tracker = PropagationTracker({})
+            report = tracker.publish(relay_url, count=1000, concurrency=8)
+
+        assert report.errors == 0, f"{report.errors} publish requests failed"
+
+        with allure.step("Page through the store node's archive from the relay node"):
+            # Messages reach the store node over relay, so the archive fills up after publishing returns
+            def stored():
+                delivery = tracker.verify_store(store_nodes['relay']['client'], peer_addr=store_nodes['store']['multiaddr'])
+                return delivery if delivery.unique >= tracker.published else None
+
+            result = wait_until(
+                stored, timeout=settings.MESSAGE_PROPAGATION_TIMEOUT, description="store archive complete",
+                initial_interval=0.2
+            )
+            delivery = result.value or tracker.verify_store(
+                store_nodes['relay']['client'], peer_addr=store_nodes['store']['multiaddr']
+            )
+
+            summary = {"published": tracker.published, "stored": delivery.unique, "duplicates": delivery.duplicates}
+            allure.attach(json.dumps(summary, indent=2), "Store retrieval", allure.attachment_type.JSON)
+            benchmark_results.record(report.summary(), "store.publish", topology="relay+store")
+
+        assert delivery.unique == tracker.published, f"Messages missing from the store: {summary}"
+        assert delivery.duplicates == 0, f"Store returned duplicates: {summary}"
@@ -0,0 +1,75 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+import allure
+from framework.timing import PhaseTimings, summarize
+from framework.timing_plugin import TimingPlugin, find_regressions
+
+@allure.epic("Waku Node Testing")
+@allure.feature("Phase Timings")
+@pytest.mark.basic
+class TestPhaseTimings:
+    """Phase summaries and the timing regression gate"""
+
+    @allure.story("Phase Summary")
+    @allure.severity(allure.severity_level.NORMAL)
+    def test_collect_and_summarize(self):
+        """Test that collected durations are summarized and the recorder starts over"""
+        recorder = PhaseTimings()
+        for seconds in (0.5, 1.5, 1.0):
+            recorder.record("docker.containers_run", seconds)
+
+        summary = summarize(recorder.collect())
+        assert summary == {"docker.containers_run": {"count": 3, "total_s": 3.0, "mean_s": 1.0, "max_s": 1.5}}
+        assert recorder.collect() == {}
+
+    @allure.story("Regression Gate")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_find_regressions_threshold_and_floor(self):
+        """Test that a phase regresses only past the ratio and the absolute floor"""
+        baseline = {
+            "slower": {"mean_s": 1.0},
+            "tiny": {"mean_s": 0.01},
+            "within": {"mean_s": 1.0},
+            "faster": {"mean_s": 1.0}
+        }
+        current = {
+            "slower": {"mean_s": 2.0},
+            "tiny": {"mean_s": 0.05},
+            "within": {"mean_s": 1.4},
+            "faster": {"mean_s": 0.5},
+            "new_phase": {"mean_s": 10.0}
+        }
+
+        regressions = find_regressions(current, baseline, threshold=1.5, min_seconds=0.25)
+
+        assert regressions == [{"phase": "slower", "mean_s": 2.0, "baseline_mean_s": 1.0, "ratio": 2.0}]
+
+    @allure.story("Parallel Runs")
+    @allure.severity(allure.severity_level.CRITICAL)
+    def test_controller_merges_workers_and_fails_the_run(self, tmp_path):
+        """Test that the xdist controller gates the run on the phases of all workers"""
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text(json.dumps({"phases": {"docker.containers_run": {"mean_s": 1.0}}}))
+        options = {
+            "--timing-baseline": str(baseline),
+            "--timing-threshold": 1.5,
+            "--timing-report": str(tmp_path / "timing.json"),
+            "--timing-fail-on-regression": True
+        }
+        plugin = TimingPlugin(SimpleNamespace(getoption=options.get))
+
+        for worker, seconds in (("gw0", 2.0), ("gw1", 3.0)):
+            plugin.pytest_testnodedown(SimpleNamespace(workeroutput={"waku_timing": {
+                "phases": {"docker.containers_run": [seconds]},
+                "tests": {f"test_{worker}": {"docker.containers_run": {"mean_s": seconds}}}
+            }}), None)
+        session = SimpleNamespace(exitstatus=pytest.ExitCode.OK)
+        plugin.pytest_sessionfinish(session, session.exitstatus)
+
+        report = json.loads((tmp_path / "timing.json").read_text())
+        assert report["phases"]["docker.containers_run"]["count"] == 2
+        assert set(report["tests"]) == {"test_gw0", "test_gw1"}
+        assert [regression["phase"] for regression in report["regressions"]] == ["docker.containers_run"]
+        assert session.exitstatus == pytest.ExitCode.TESTS_FAILED